@@ -0,0 +1,97 @@
+from starlette.datastructures import Headers
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.gzip import GZipMiddleware, IdentityResponder
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: responses fall back to gzip
+    brotli = None
+
+from app.core.config import settings
+from app.services.rate_limiter import rate_limiter, IP_LIMIT
+
+# Probes and scrapes must never be throttled, nor Stripe's webhook deliveries
+# (they come from a few shared IPs and are verified by signature)
+RATE_LIMIT_EXEMPT_PREFIXES = ("/health", "/metrics", "/api/v1/webhooks/stripe")
+
+
+class IPRateLimitMiddleware(BaseHTTPMiddleware):
+    """
+    Per-IP token bucket applied to every HTTP request.
+    Per-user/per-plan limits are enforced by RateLimitChecker in permissions.py.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        if not settings.RATE_LIMIT_ENABLED or request.url.path.startswith(RATE_LIMIT_EXEMPT_PREFIXES):
+            return await call_next(request)
+
+        client_ip = request.client.host if request.client else "unknown"
+        result = await rate_limiter.acheck(f"ip:{client_ip}", IP_LIMIT)
+        if not result.allowed:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests. Please slow down."},
+                headers={"Retry-After": result.retry_after_header},
+            )
+        return await call_next(request)
+
+
+
+def accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    """True if the Accept-Encoding header allows `coding` (q > 0)."""
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        if name.strip().lower() != coding:
+            continue
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+class BrotliResponder(IdentityResponder):
+    """Starlette's gzip responder logic (size/type/encoding checks) with brotli."""
+
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = 4):
+        super().__init__(app, minimum_size)
+        self.quality = quality
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        if more_body:
+            # Flush per chunk so streamed responses aren't held back
+            return self._compressor.process(body) + self._compressor.flush()
+        return self._compressor.process(body) + self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least `minimum_size` bytes.
+
+    Brotli is used when the client accepts it and the `brotli` package is
+    installed, gzip (Starlette's GZipMiddleware) otherwise.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and brotli is not None:
+            if accepts_encoding(Headers(scope=scope).get("accept-encoding", ""), "br"):
+                await BrotliResponder(self.app, self.minimum_size, self.brotli_quality)(scope, receive, send)
+                return
+        await self.gzip(scope, receive, send)
@@ -0,0 +1,33 @@
+"""
+Opaque keyset cursors for paginated endpoints.
+
+A cursor is the sort key of the last item of a page, JSON-encoded and
+base64url-wrapped so clients treat it as a token; the next page starts
+strictly after it. Paginated endpoints return the cursor of the next page
+in the X-Next-Cursor header.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, List
+
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor with `size` values, or raise 400."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
@@ -7,6 +7,8 @@ from app.api.deps import get_current_user
 from app.db.models import User, UserRole, Agent
 from app.db.base import get_db # <-- ADDED IMPORT for get_db
 from app.core.plans import PLANS
+from app.core.config import settings
+from app.services.rate_limiter import rate_limiter, plan_limit
 
 ROLE_HIERARCHY = {
     UserRole.viewer: 1,
@@ -47,4 +49,25 @@ class UsageChecker:
             if current_user.token_usage_this_month >= plan["limits"]["max_tokens_per_month"]:
                 raise HTTPException(status_code=403, detail=f"Monthly token limit reached.")
                 
-        return current_user
\ No newline at end of file
+        return current_user
+
+class RateLimitChecker:
+    """Per-user token bucket whose size depends on the user's plan tier."""
+
+    def __init__(self, scope: str = "api"):
+        self.scope = scope
+
+    def __call__(self, current_user: User = Depends(get_current_user)):
+        if not settings.RATE_LIMIT_ENABLED:
+            return current_user
+
+        result = rate_limiter.check(f"user:{current_user.id}:{self.scope}", plan_limit(current_user.plan, self.scope))
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded for your plan. Please slow down.",
+                headers={"Retry-After": result.retry_after_header},
+            )
+        return current_user
+
+rate_limit_api = RateLimitChecker(scope="api")
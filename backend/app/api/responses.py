@@ -0,0 +1,18 @@
+"""
+JSON response class backed by orjson.
+
+Endpoints with a `response_model` are already serialized straight to bytes
+by Pydantic (FastAPI's fast path, which a custom response class would turn
+off), so this is used where endpoints return plain dicts/lists: analytics,
+the projected agent list and the app-level health routes.
+"""
+
+from typing import Any
+
+import orjson
+from starlette.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -1,18 +1,25 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from .endpoints import login, users, agents, tools, subscriptions, webhooks, admin, plans, auth, integrations # <-- ADD integrations
+from .endpoints import login, users, agents, tools, subscriptions, webhooks, admin, plans, auth, integrations, search # <-- ADD integrations
+
+from app.api.permissions import rate_limit_api
 
 api_router = APIRouter()
 
+# Routers whose endpoints all require a logged-in user get the per-user,
+# per-plan rate limit; everything else is covered by the per-IP middleware
+user_rate_limited = [Depends(rate_limit_api)]
+
 api_router.include_router(login.router, tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(agents.router, prefix="/agents", tags=["agents"])
+api_router.include_router(agents.router, prefix="/agents", tags=["agents"], dependencies=user_rate_limited)
 api_router.include_router(tools.router, prefix="/tools", tags=["tools"])
-api_router.include_router(subscriptions.router, prefix="/subscriptions", tags=["subscriptions"])
+api_router.include_router(subscriptions.router, prefix="/subscriptions", tags=["subscriptions"], dependencies=user_rate_limited)
 api_router.include_router(webhooks.router, prefix="/webhooks", tags=["webhooks"])
-api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(search.router, prefix="/search", tags=["search"], dependencies=user_rate_limited)
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"], dependencies=user_rate_limited)
 api_router.include_router(plans.router, prefix="/plans", tags=["plans"])
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 # --- THIS IS THE FIX ---
-api_router.include_router(integrations.router, prefix="/integrations", tags=["integrations"])
+api_router.include_router(integrations.router, prefix="/integrations", tags=["integrations"], dependencies=user_rate_limited)
 # --- END OF FIX ---s
\ No newline at end of file
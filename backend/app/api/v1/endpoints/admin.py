@@ -8,14 +8,16 @@ from app.crud import crud_stats
 
 from fastapi import APIRouter, Depends
 from fastapi.responses import Response 
-from app.db.base import get_db
+from app.db.base import get_read_db
 from app.db.models import AuditLog
 from app.api.permissions import allow_admin_only
+from app.api.responses import ORJSONResponse
+from app.services import context_cache, preflight_service
 
 router = APIRouter()
 
 @router.get("/reports/audit-log", dependencies=[Depends(allow_admin_only)])
-def export_audit_log(db: Session = Depends(get_db)):
+def export_audit_log(db: Session = Depends(get_read_db)):
     """
     Exports the complete audit log as a CSV file. Admin only.
     """
@@ -52,11 +54,27 @@ def export_audit_log(db: Session = Depends(get_db)):
     )
 
 
-@router.get("/analytics", dependencies=[Depends(allow_admin_only)])
-def get_system_analytics(db: Session = Depends(get_db)):
+@router.get("/analytics", dependencies=[Depends(allow_admin_only)], response_class=ORJSONResponse)
+def get_system_analytics(db: Session = Depends(get_read_db)):
     """
     Retrieves system-wide analytics. Admin only.
     """
     # Just one simple function call!
     analytics = crud_stats.get_platform_analytics(db)
-    return analytics
\ No newline at end of file
+    return analytics
+
+@router.get("/context-cache", dependencies=[Depends(allow_admin_only)], response_class=ORJSONResponse)
+def get_context_cache_stats():
+    """
+    Context cache hits, misses and cached input tokens per agent in this
+    worker since it started. Admin only.
+    """
+    return context_cache.agent_stats()
+
+@router.get("/readiness", dependencies=[Depends(allow_admin_only)], response_class=ORJSONResponse)
+def get_readiness_details():
+    """
+    The preflight checks with their details (credentials source and path,
+    project, errors). Admin only; /health/ready only says which checks pass.
+    """
+    return preflight_service.get_readiness()
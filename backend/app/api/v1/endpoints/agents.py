@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.db.base import get_db
+from app.db.base import get_db, get_read_db
 from app.schemas import agent as agent_schema, chat as chat_schema
 from app.crud import crud_agent, crud_chat
 from app.api.deps import get_current_user
@@ -10,11 +12,18 @@ from app.db.models import User, UserRole
 from app.db import models
 from app.services.audit_service import log_activity
 from app.api.permissions import allow_user_and_admin, allow_all_roles, UsageChecker
+from app.api.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from app.api.responses import ORJSONResponse
+from app.services import retention_service
 
 router = APIRouter()
 
 check_agent_limit = UsageChecker(check_agents=True)
 
+# Columns a listing can project with `fields=`; the default matches agent_schema.Agent
+AGENT_LIST_FIELDS = ("id", "name", "system_prompt", "tools", "sub_agents", "owner_id", "created_at")
+DEFAULT_AGENT_LIST_FIELDS = ("id", "name", "system_prompt", "tools", "sub_agents", "owner_id")
+
 @router.post("/", response_model=agent_schema.Agent, dependencies=[Depends(allow_user_and_admin), Depends(check_agent_limit)])
 def create_agent(
     agent_in: agent_schema.AgentCreate,
@@ -27,18 +36,52 @@ def create_agent(
 
 @router.get("/", response_model=List[agent_schema.Agent], dependencies=[Depends(allow_all_roles)])
 def read_agents(
-    db: Session = Depends(get_db),
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. id,name"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Retrieve agents.
     - Admins and Viewers see all agents.
     - Users see only their own agents.
+    - `limit` enables pagination (ordered by id, next page via X-Next-Cursor).
+    - `fields` selects columns at the SQL level, e.g. to skip system prompts.
+    - Responses carry an ETag; a matching If-None-Match returns 304.
     """
-    if current_user.role in [UserRole.admin, UserRole.viewer]:
-        return db.query(models.Agent).all()
-    else: # UserRole.user
-        return crud_agent.get_agents_by_owner(db=db, owner_id=current_user.id)
+    owner_id = None if current_user.role in [UserRole.admin, UserRole.viewer] else current_user.id
+
+    columns = DEFAULT_AGENT_LIST_FIELDS
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = set(requested) - set(AGENT_LIST_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        # id is always included, it is the pagination key
+        columns = tuple(dict.fromkeys(["id", *requested]))
+
+    # The ETag is known before touching the agents table, so unchanged lists cost one small query
+    version = crud_agent.get_agents_version(db, owner_id)
+    variant = hashlib.sha1(f"{owner_id}|{limit}|{cursor}|{','.join(columns)}".encode()).hexdigest()[:12]
+    etag = f'W/"agents-{version}-{variant}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    after_id = None
+    if cursor:
+        (after_id,) = decode_cursor(cursor, 1)
+        if not isinstance(after_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows = crud_agent.list_agents(db, columns, owner_id=owner_id, limit=limit, after_id=after_id)
+    if limit is not None and len(rows) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+    # Plain rows: orjson handles the datetimes without a jsonable_encoder pass
+    return ORJSONResponse([dict(row._mapping) for row in rows], headers=headers)
 
 @router.get("/{agent_id}", response_model=agent_schema.Agent, dependencies=[Depends(allow_all_roles)])
 def read_agent_by_id(
@@ -64,13 +107,19 @@ def read_agent_by_id(
 @router.get("/{agent_id}/history", response_model=List[chat_schema.ChatMessage], dependencies=[Depends(allow_all_roles)])
 def get_agent_chat_history(
     agent_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Retrieve chat history for a specific agent.
     - Admins and Viewers can see any history.
     - Users can only see history for their own agents.
+    - Without `limit`, returns all messages still in the database.
+    - With `limit`, returns the newest page; older pages (including archived
+      messages past the plan's retention horizon) follow the X-Next-Cursor header.
     """
     agent = crud_agent.get_agent_by_id(db, agent_id)
     if not agent:
@@ -80,6 +129,20 @@ def get_agent_chat_history(
     if current_user.role == UserRole.user and agent.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to access this agent's history")
 
+    if limit is not None or cursor is not None:
+        limit = limit or 50
+        before = None
+        if cursor:
+            timestamp, message_id = decode_cursor(cursor, 2)
+            try:
+                before = (datetime.fromisoformat(timestamp), int(message_id))
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        page = retention_service.get_history_page(db, agent_id, limit, before)
+        if len(page) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(page[0]["timestamp"].isoformat(), page[0]["id"])
+        return page
+
     history = db.query(models.ChatMessage)\
         .filter(models.ChatMessage.agent_id == agent_id)\
         .order_by(models.ChatMessage.timestamp.asc())\
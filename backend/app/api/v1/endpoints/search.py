@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.db.base import get_read_db
+from app.schemas import chat as chat_schema
+from app.crud import crud_agent, crud_chat
+from app.api.deps import get_current_user
+from app.db.models import User, UserRole
+from app.api.permissions import allow_all_roles
+from app.api.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+
+router = APIRouter()
+
+@router.get("/messages", response_model=List[chat_schema.ChatSearchResult], dependencies=[Depends(allow_all_roles)])
+def search_messages(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    agent_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Full-text search over chat messages, best match first.
+    - Without `agent_id`, searches the current user's own messages.
+    - With `agent_id`, searches that agent's history (same access rules as /agents/{id}/history).
+    - Further pages follow the X-Next-Cursor header.
+    """
+    user_id = current_user.id
+    if agent_id is not None:
+        agent = crud_agent.get_agent_by_id(db, agent_id)
+        if not agent:
+            raise HTTPException(status_code=404, detail="Agent not found")
+        if current_user.role == UserRole.user and agent.owner_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to access this agent's history")
+        if current_user.role != UserRole.user:
+            user_id = None
+
+    after = None
+    if cursor:
+        rank, message_id = decode_cursor(cursor, 2)
+        try:
+            after = (float(rank), int(message_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    results = crud_chat.search_messages(db, q, user_id=user_id, agent_id=agent_id, limit=limit, after=after)
+    if len(results) == limit:
+        last = results[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["rank"], last["id"])
+    return results
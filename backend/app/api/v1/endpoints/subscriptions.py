@@ -1,15 +1,14 @@
-import stripe
 from fastapi import APIRouter, Depends, Request, HTTPException
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.stripe_client import get_stripe
 from app.db.base import get_db
 from app.api.deps import get_current_user
 from app.db.models import User
 from app.crud import crud_user
-
-stripe.api_key = settings.STRIPE_SECRET_KEY
+from app.services.entity_cache import user_cache
 
 router = APIRouter()
 
@@ -18,6 +17,7 @@ def create_checkout_session(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    stripe = get_stripe()
     customer_id = current_user.stripe_customer_id
     if not customer_id:
         # Create a new Stripe customer
@@ -25,6 +25,7 @@ def create_checkout_session(
         customer_id = customer.id
         current_user.stripe_customer_id = customer_id
         db.commit()
+        user_cache.invalidate(current_user.email)
 
     try:
         checkout_session = stripe.checkout.Session.create(
@@ -50,7 +51,8 @@ def create_portal_session(
 ):
     if not current_user.stripe_customer_id:
         raise HTTPException(status_code=400, detail="User is not a Stripe customer.")
-        
+
+    stripe = get_stripe()
     portal_session = stripe.billing_portal.Session.create(
         customer=current_user.stripe_customer_id,
         return_url='http://localhost:3000/dashboard/billing',
@@ -1,9 +1,11 @@
-import stripe
+import json
+
 from fastapi import APIRouter, Depends, Request, Header, HTTPException
 from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.core.stripe_client import get_stripe
 from app.db.base import get_db
-from app.db.models import User
+from app.services import stripe_inbox
 
 router = APIRouter()
 
@@ -13,9 +15,14 @@ async def stripe_webhook(
     stripe_signature: str = Header(None),
     db: Session = Depends(get_db)
 ):
+    """
+    Verify and store the event, then acknowledge right away.
+    Plan/usage changes are applied by the inbox worker (app/services/stripe_inbox.py).
+    """
+    stripe = get_stripe()
     payload = await request.body()
     try:
-        event = stripe.Webhook.construct_event(
+        stripe.Webhook.construct_event(
             payload=payload, sig_header=stripe_signature, secret=settings.STRIPE_WEBHOOK_SECRET
         )
     except ValueError as e:
@@ -23,41 +30,8 @@ async def stripe_webhook(
     except stripe.error.SignatureVerificationError as e:
         raise HTTPException(status_code=400, detail="Invalid signature")
 
-    # Handle the event
-    event_type = event['type']
-    data_object = event['data']['object']
-    
-    if event_type == 'checkout.session.completed':
-        user_id = data_object.get('client_reference_id')
-        user = db.query(User).filter(User.id == user_id).first()
-        if user:
-            user.stripe_subscription_id = data_object.get('subscription')
-            user.stripe_customer_id = data_object.get('customer')
-            user.plan = 'pro'
-            # Also reset their token usage upon initial subscription
-            user.token_usage_this_month = 0
-            db.commit()
-            print(f"User {user.id} successfully subscribed to Pro plan.")
-            
-    elif event_type == 'customer.subscription.deleted':
-        user = db.query(User).filter(User.stripe_subscription_id == data_object.id).first()
-        if user:
-            user.plan = 'free'
-            user.stripe_subscription_id = None
-            db.commit()
-            print(f"User {user.id} subscription canceled, downgraded to Free plan.")
-
-    # --- ADD THIS NEW EVENT HANDLER ---
-    elif event_type == 'invoice.payment_succeeded':
-        # This event occurs for every successful recurring payment
-        subscription_id = data_object.get('subscription')
-        if subscription_id:
-            user = db.query(User).filter(User.stripe_subscription_id == subscription_id).first()
-            if user:
-                # Reset the user's monthly token usage
-                user.token_usage_this_month = 0
-                db.commit()
-                print(f"User {user.id} subscription renewed. Token usage reset.")
-    # --- END OF NEW HANDLER ---
-
-    return {"status": "success"}
\ No newline at end of file
+    # Redeliveries of an event already in the inbox are acknowledged without reprocessing
+    if not stripe_inbox.record_event(db, json.loads(payload)):
+        return {"status": "duplicate"}
+    stripe_inbox.notify()
+    return {"status": "accepted"}
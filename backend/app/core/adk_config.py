@@ -27,10 +27,85 @@ class ADKConfig:
     
     # Logging configuration
     LOG_LEVEL = os.getenv("ADK_LOG_LEVEL", "INFO")
+    # Per-module overrides, e.g. "app.services.adk_agent_service=DEBUG,socketio=INFO"
+    LOG_LEVELS = os.getenv("ADK_LOG_LEVELS", "socketio=WARNING,engineio=WARNING,httpx=WARNING")
+    # Keep one in N hot-path debug records per sample key
+    LOG_SAMPLE_RATES = {
+        "token": int(os.getenv("ADK_LOG_SAMPLE_TOKEN", 100)),
+        "event": int(os.getenv("ADK_LOG_SAMPLE_EVENT", 10)),
+    }
+    # Socket.IO / Engine.IO internal packet logging (very verbose)
+    SOCKETIO_LOGGING = os.getenv("ADK_SOCKETIO_LOGGING", "false").lower() == "true"
+    
+    # Socket.IO transport settings
+    # Long-polling costs a request per batch of frames; disable it to force WebSocket
+    SOCKETIO_ALLOW_POLLING = os.getenv("ADK_SOCKETIO_ALLOW_POLLING", "true").lower() == "true"
+    SOCKETIO_COMPRESSION_THRESHOLD = int(os.getenv("ADK_SOCKETIO_COMPRESSION_THRESHOLD", 1024))  # bytes, polling
+    # Opt-in MessagePack wire mode served on its own path
+    SOCKETIO_BINARY_ENABLED = os.getenv("ADK_SOCKETIO_BINARY_ENABLED", "true").lower() == "true"
+    SOCKETIO_BINARY_PATH = "/socket.io-msgpack/"
     
     # Performance settings
     MAX_TOKENS_PER_REQUEST = 2048  # Reduced to avoid quota limits
     REQUEST_TIMEOUT = 30  # seconds
+    TURN_CANCEL_TIMEOUT = 5  # seconds to wait for a cancelled turn to persist its partial answer
+    
+    # Composite agents (see agent_composition): parallel branches per agent and
+    # the default time a branch gets before it is cut off
+    MAX_SUB_AGENTS = int(os.getenv("ADK_MAX_SUB_AGENTS", 5))
+    BRANCH_TIMEOUT = float(os.getenv("ADK_BRANCH_TIMEOUT", 30))  # seconds
+    
+    # Upstream quota governor (see llm_governor): per-model requests/tokens per minute
+    MODEL_QUOTAS = {
+        "gemini-2.0-flash-exp": {"rpm": 10, "tpm": 4_000_000},
+        "gemini-1.5-flash": {"rpm": 15, "tpm": 1_000_000},
+    }
+    LLM_MAX_CONCURRENCY = int(os.getenv("ADK_LLM_MAX_CONCURRENCY", 8))  # AIMD upper bound
+    LLM_QUEUE_TIMEOUT = float(os.getenv("ADK_LLM_QUEUE_TIMEOUT", 30))  # seconds a call may wait for capacity
+    LLM_MAX_RETRIES = int(os.getenv("ADK_LLM_MAX_RETRIES", 3))  # retries of a throttled call
+    LLM_BACKOFF_BASE = 1.0  # seconds
+    LLM_BACKOFF_MAX = 30.0  # seconds
+    LLM_DECREASE_COOLDOWN = 5.0  # seconds between concurrency cuts
+    
+    # Tool output budgets (see tool_events), in estimated tokens: outputs over
+    # budget are compressed before they reach the model. Per-tool overrides by
+    # function name, e.g. "tavily_search_tool=800,read_artifact_tool=4000"; 0 disables
+    TOOL_OUTPUT_BUDGET = int(os.getenv("ADK_TOOL_OUTPUT_BUDGET", 1500))
+    TOOL_OUTPUT_BUDGETS = os.getenv("ADK_TOOL_OUTPUT_BUDGETS", "")
+    
+    # Provider-side caching of long system prompts + tool schemas (see context_cache):
+    # "genai" or "none"
+    CONTEXT_CACHE_BACKEND = os.getenv("ADK_CONTEXT_CACHE_BACKEND", "genai")
+    CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("ADK_CONTEXT_CACHE_MIN_TOKENS", 2048))  # smaller prefixes are sent as is
+    CONTEXT_CACHE_TTL = int(os.getenv("ADK_CONTEXT_CACHE_TTL", 3600))  # seconds
+    CONTEXT_CACHE_REFRESH_MARGIN = 300  # extend entries expiring within this many seconds
+    CONTEXT_CACHE_FAILURE_COOLDOWN = 600  # seconds before a prefix that failed to cache is tried again
+    
+    # Per-session mailbox: "queue", "coalesce" or "supersede" (see chat_mailbox)
+    MAILBOX_POLICY = os.getenv("ADK_MAILBOX_POLICY", "coalesce")
+    MAILBOX_MAX_DEPTH = int(os.getenv("ADK_MAILBOX_MAX_DEPTH", 5))
+    MAILBOX_COALESCE_WINDOW = float(os.getenv("ADK_MAILBOX_COALESCE_WINDOW", 0))  # seconds
+    
+    # Resumable streams: how long a disconnected chat (and its running turn) is kept,
+    # and how many events of the current turn are buffered for replay
+    RESUME_GRACE_PERIOD = int(os.getenv("ADK_RESUME_GRACE_PERIOD", 60))  # seconds, 0 disables
+    STREAM_BUFFER_SIZE = int(os.getenv("ADK_STREAM_BUFFER_SIZE", 2048))  # events per turn
+    
+    # /voice: answers are spoken sentence by sentence while they are generated
+    # (see voice_service). Unacknowledged audio frames per socket before the
+    # sender waits, how long it waits before dropping the turn's audio (frames
+    # are acked on receipt, so this doesn't depend on playback; a client with
+    # a full playback queue pauses the stream instead), and how many sentences
+    # are synthesized ahead of the one being sent
+    VOICE_MAX_INFLIGHT_FRAMES = int(os.getenv("ADK_VOICE_MAX_INFLIGHT_FRAMES", 8))
+    VOICE_ACK_TIMEOUT = float(os.getenv("ADK_VOICE_ACK_TIMEOUT", 10))  # seconds
+    VOICE_PREFETCH_SENTENCES = int(os.getenv("ADK_VOICE_PREFETCH_SENTENCES", 2))
+    VOICE_CHUNK_MIN_CHARS = 20  # shorter sentences are merged with the next
+    VOICE_CHUNK_MAX_CHARS = 250  # longer ones are split at a comma or space
+    
+    # Preflight / readiness settings
+    PREFLIGHT_REFRESH_INTERVAL = int(os.getenv("ADK_PREFLIGHT_REFRESH_INTERVAL", 300))  # full re-check, seconds
+    PREFLIGHT_WATCH_INTERVAL = int(os.getenv("ADK_PREFLIGHT_WATCH_INTERVAL", 5))  # credentials file poll, seconds
     
     @classmethod
     def get_model_config(cls) -> Dict[str, Any]:
@@ -42,6 +117,36 @@ class ADKConfig:
             "timeout": cls.REQUEST_TIMEOUT
         }
     
+    @classmethod
+    def get_model_quota(cls, model: str) -> Dict[str, int]:
+        """RPM/TPM quota for a model; ADK_LLM_RPM / ADK_LLM_TPM override it"""
+        quota = dict(cls.MODEL_QUOTAS.get(model, {"rpm": 10, "tpm": 1_000_000}))
+        if os.getenv("ADK_LLM_RPM"):
+            quota["rpm"] = int(os.getenv("ADK_LLM_RPM"))
+        if os.getenv("ADK_LLM_TPM"):
+            quota["tpm"] = int(os.getenv("ADK_LLM_TPM"))
+        return quota
+    
+    @classmethod
+    def get_tool_output_budget(cls, tool_name: str) -> int:
+        """Output budget of a tool in tokens, 0 for unlimited"""
+        for override in cls.TOOL_OUTPUT_BUDGETS.split(","):
+            name, _, budget = override.partition("=")
+            if name.strip() == tool_name and budget.strip():
+                return int(budget)
+        return cls.TOOL_OUTPUT_BUDGET
+    
+    @classmethod
+    def get_socketio_transport_config(cls) -> Dict[str, Any]:
+        """Engine.IO transport options shared by the JSON and msgpack servers"""
+        config = {
+            "http_compression": True,
+            "compression_threshold": cls.SOCKETIO_COMPRESSION_THRESHOLD,
+        }
+        if not cls.SOCKETIO_ALLOW_POLLING:
+            config["transports"] = ["websocket"]
+        return config
+    
     @classmethod
     def get_runner_config(cls) -> Dict[str, Any]:
         """Get runner configuration for ADK"""
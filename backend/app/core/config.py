@@ -5,6 +5,16 @@ class Settings:
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    # Optional read replicas (comma-separated) for read-only endpoints; they may lag the primary
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", 30))  # seconds to wait for a connection
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds, -1 disables
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))  # PostgreSQL only, 0 disables
+    # Monthly partitions created ahead for partitioned tables (see app/db/partitioning.py)
+    DB_PARTITION_MONTHS_AHEAD: int = int(os.getenv("DB_PARTITION_MONTHS_AHEAD", 3))
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY")
@@ -17,6 +27,12 @@ class Settings:
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY")
     TAVILY_API_KEY: str = os.getenv("TAVILY_API_KEY")
     ELEVENLABS_API_KEY: str = os.getenv("ELEVENLABS_API_KEY")
+
+    # Spoken answers on the /voice namespace ("elevenlabs" or "tone", a local stand-in; see voice_service)
+    VOICE_TTS_BACKEND: str = os.getenv("VOICE_TTS_BACKEND", "elevenlabs")
+    ELEVENLABS_VOICE_ID: str = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
+    ELEVENLABS_MODEL_ID: str = os.getenv("ELEVENLABS_MODEL_ID", "eleven_flash_v2_5")  # lowest-latency model
+    ELEVENLABS_OUTPUT_FORMAT: str = os.getenv("ELEVENLABS_OUTPUT_FORMAT", "mp3_44100_128")
     
     # Twilio
     TWILIO_ACCOUNT_SID: str = os.getenv("TWILIO_ACCOUNT_SID")
@@ -37,13 +53,62 @@ class Settings:
     # Sentry
     SENTRY_DSN: str = os.getenv("SENTRY_DSN")
 
-settings = Settings()
+    # Redis (shared state for multi-worker deployments)
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+    # Rate limiting - per-plan limits live in app/core/plans.py
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "redis"
+    RATE_LIMIT_IP_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_IP_PER_MINUTE", 300))
+    RATE_LIMIT_IP_BURST: int = int(os.getenv("RATE_LIMIT_IP_BURST", 60))
+
+    # Archive for chat history past the plan's retention horizon ("local" or "s3")
+    ARCHIVE_BACKEND: str = os.getenv("ARCHIVE_BACKEND", "local")
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", "/usr/src/app/archive")
+    ARCHIVE_S3_BUCKET: str = os.getenv("ARCHIVE_S3_BUCKET")
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", 5000))  # max messages per segment
+
+    # ADK artifacts, e.g. large tool outputs ("disk" or "memory"; see artifact_store)
+    ARTIFACT_BACKEND: str = os.getenv("ARTIFACT_BACKEND", "disk")
+    ARTIFACT_DIR: str = os.getenv("ARTIFACT_DIR", "/usr/src/app/artifacts")
+    ARTIFACT_MAX_BYTES: int = int(os.getenv("ARTIFACT_MAX_BYTES", 2 * 1024 ** 3))  # whole store
+    ARTIFACT_USER_QUOTA_BYTES: int = int(os.getenv("ARTIFACT_USER_QUOTA_BYTES", 100 * 1024 ** 2))
+    ARTIFACT_INLINE_LIMIT: int = int(os.getenv("ARTIFACT_INLINE_LIMIT", 4096))  # bigger tool outputs become artifacts
+
+    # Entity cache for users/agents/tools ("memory" or "redis" as a shared second tier)
+    ENTITY_CACHE_BACKEND: str = os.getenv("ENTITY_CACHE_BACKEND", "memory")
+    ENTITY_CACHE_LOCAL_TTL: int = int(os.getenv("ENTITY_CACHE_LOCAL_TTL", 30))  # seconds, per process
+    ENTITY_CACHE_TTL: int = int(os.getenv("ENTITY_CACHE_TTL", 300))  # seconds, Redis tier
+    ENTITY_CACHE_MAX_ENTRIES: int = int(os.getenv("ENTITY_CACHE_MAX_ENTRIES", 10000))
 
-# Validation Check
-# ... (settings = Settings() line) ...
+    # Decrypted per-user tool credentials are cached in-process for this long (seconds)
+    TOOL_CREDENTIALS_TTL: int = int(os.getenv("TOOL_CREDENTIALS_TTL", 60))
 
-# --- VALIDATION CHECKS ---
-if not settings.ENCRYPTION_KEY:
-    raise ValueError("FATAL ERROR: ENCRYPTION_KEY is not set.")
-if not settings.GOOGLE_CLIENT_ID or not settings.GOOGLE_CLIENT_SECRET:
-    raise ValueError("FATAL ERROR: GOOGLE_CLIENT_ID or GOOGLE_CLIENT_SECRET is not set in the .env file.")
\ No newline at end of file
+    # Stripe webhook inbox (events are stored, then applied by a background worker)
+    STRIPE_INBOX_WORKER: bool = os.getenv("STRIPE_INBOX_WORKER", "true").lower() == "true"  # run it in this process
+    STRIPE_INBOX_POLL_INTERVAL: float = float(os.getenv("STRIPE_INBOX_POLL_INTERVAL", 5))  # seconds
+    STRIPE_INBOX_BATCH_SIZE: int = int(os.getenv("STRIPE_INBOX_BATCH_SIZE", 100))
+    STRIPE_INBOX_MAX_ATTEMPTS: int = int(os.getenv("STRIPE_INBOX_MAX_ATTEMPTS", 8))
+
+    # Scheduled maintenance jobs (app/services/jobs.py). With SCHEDULER_ENABLED=false
+    # the API process only runs per-process jobs; run `python -m app.worker` instead.
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    SCHEDULER_MAX_CONCURRENCY: int = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", 2))
+    SCHEDULER_TICK_SECONDS: float = float(os.getenv("SCHEDULER_TICK_SECONDS", 30))
+    SCHEDULER_HISTORY_DAYS: int = int(os.getenv("SCHEDULER_HISTORY_DAYS", 30))  # job runs and processed webhook events
+
+    # HTTP response compression (brotli when installed and accepted, else gzip)
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", 1024))  # bytes
+
+    # Share the LLM quota across workers ("memory" or "redis")
+    LLM_GOVERNOR_BACKEND: str = os.getenv("LLM_GOVERNOR_BACKEND", "memory")
+
+    def validate(self):
+        """Fail fast on missing required settings; called from app startup."""
+        if not self.ENCRYPTION_KEY:
+            raise ValueError("FATAL ERROR: ENCRYPTION_KEY is not set.")
+        if not self.GOOGLE_CLIENT_ID or not self.GOOGLE_CLIENT_SECRET:
+            raise ValueError("FATAL ERROR: GOOGLE_CLIENT_ID or GOOGLE_CLIENT_SECRET is not set in the .env file.")
+
+settings = Settings()
@@ -0,0 +1,142 @@
+"""
+Logging pipeline for the backend.
+
+Log records are handed to a queue on the calling thread and formatted and
+written as JSON lines by a background listener thread, so request handlers
+and the chat hot path never block on formatting or stream I/O.
+
+- Every record carries the correlation id bound with `bind_session()`.
+- Records logged with `extra={"sample": "<key>"}` are sampled: only one in
+  `ADKConfig.LOG_SAMPLE_RATES[key]` is kept (used for per-token/per-event logs).
+- The root level comes from `ADKConfig.LOG_LEVEL`, and per-module overrides
+  from `ADKConfig.LOG_LEVELS` (``module=LEVEL,module=LEVEL``).
+"""
+
+import atexit
+import contextvars
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from app.core.adk_config import adk_config
+
+# Correlation id for the current socket session / request
+session_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("session_id", default=None)
+
+# Attributes present on every LogRecord; anything else was passed via `extra`
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "session_id", "sample"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def bind_session(session_id: Optional[str]) -> contextvars.Token:
+    """Bind a correlation id to the current context (inherited by tasks created from it)."""
+    return session_id_var.set(session_id)
+
+
+class CorrelationFilter(logging.Filter):
+    """Attach the bound correlation id to each record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.session_id = session_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in N records for each sample key; unsampled records always pass."""
+
+    def __init__(self, rates: Dict[str, int]):
+        super().__init__()
+        self.rates = rates
+        self._counters = {key: itertools.count() for key in rates}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample", None)
+        if key is None or key not in self.rates:
+            return True
+        return next(self._counters[key]) % self.rates[key] == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "session_id", None):
+            payload["session_id"] = record.session_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats the message on the caller's thread; here only
+    the correlation id is captured (it lives in a contextvar) and the record
+    is enqueued as-is.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def parse_module_levels(spec: str) -> Dict[str, str]:
+    """Parse ``"module=LEVEL,module=LEVEL"`` into a dict."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        if name and level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging():
+    """Install the queue-based JSON logging pipeline on the root logger."""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(adk_config.LOG_SAMPLE_RATES))
+    queue_handler.addFilter(CorrelationFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(adk_config.LOG_LEVEL.upper())
+
+    for name, level in parse_module_levels(adk_config.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,111 @@
+"""
+Prometheus metrics for the backend.
+
+These are registered on the default registry and served on /metrics by the
+instrumentator set up in app.main.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+TURN_CANCEL_LATENCY = Histogram(
+    "adk_turn_cancel_latency_seconds",
+    "Time from a turn cancellation request until the turn task has finished",
+    ["reason"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+LLM_CONCURRENCY_LIMIT = Gauge(
+    "adk_llm_concurrency_limit",
+    "Current AIMD concurrency limit for upstream model calls",
+    ["model"],
+)
+LLM_INFLIGHT = Gauge("adk_llm_inflight", "Model calls currently in flight", ["model"])
+LLM_QUEUE_DEPTH = Gauge("adk_llm_queue_depth", "Model calls waiting for quota or concurrency", ["model"])
+LLM_QUEUE_WAIT = Histogram(
+    "adk_llm_queue_wait_seconds",
+    "Time a model call waited before being admitted",
+    ["model"],
+    buckets=(0.001, 0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30),
+)
+LLM_THROTTLES = Counter("adk_llm_throttled_total", "Model calls rejected by the provider with 429", ["model"])
+
+CONTEXT_CACHE_REQUESTS = Counter(
+    "adk_context_cache_requests_total",
+    "Model calls with a cacheable prefix: hit, created, skipped (recent failure) or error (sent uncached)",
+    ["result"],
+)
+CONTEXT_CACHE_TOKENS = Counter("adk_context_cache_tokens_total", "Input tokens served from provider context caches")
+
+ARTIFACT_SAVES = Counter("adk_artifact_saves_total", "Artifact saves that stored a new blob or reused one", ["result"])
+ARTIFACT_EVICTIONS = Counter("adk_artifact_evictions_total", "Artifact versions evicted, by user_quota or capacity", ["reason"])
+
+TOOL_DURATION = Histogram(
+    "adk_tool_duration_seconds",
+    "Duration of agent tool calls",
+    ["tool"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+TOOL_OUTPUT_COMPRESSED = Counter(
+    "adk_tool_output_compressed_total", "Tool outputs compressed to fit their output budget", ["tool"]
+)
+
+VOICE_TIME_TO_FIRST_AUDIO = Histogram(
+    "adk_voice_time_to_first_audio_seconds",
+    "Time from the start of a spoken turn until its first audio frame was sent",
+    ["backend"],
+    buckets=(0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10),
+)
+VOICE_STALLS = Counter(
+    "adk_voice_stalls_total", "Spoken turns whose audio was dropped because the client stopped acknowledging frames"
+)
+
+ENTITY_CACHE_REQUESTS = Counter(
+    "entity_cache_requests_total",
+    "Entity cache lookups by tier that answered (hit_local, hit_redis) or miss",
+    ["cache", "result"],
+)
+
+STRIPE_EVENTS = Counter(
+    "stripe_webhook_events_total",
+    "Stripe webhook events by outcome (received, duplicate, processed, retry, failed, ignored)",
+    ["type", "result"],
+)
+STRIPE_INBOX_LAG = Gauge("stripe_inbox_lag_seconds", "Age of the oldest unprocessed Stripe event")
+STRIPE_PROCESSING_DELAY = Histogram(
+    "stripe_event_processing_delay_seconds",
+    "Time from receiving a Stripe event until it was applied",
+    buckets=(0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600),
+)
+
+JOB_RUNS = Counter("scheduler_job_runs_total", "Scheduled job runs by outcome", ["job", "status"])
+JOB_DURATION = Histogram(
+    "scheduler_job_duration_seconds",
+    "Duration of scheduled job runs",
+    ["job"],
+    buckets=(0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600),
+)
+JOB_LAST_SUCCESS = Gauge("scheduler_job_last_success_timestamp_seconds", "Unix time of the last successful run", ["job"])
+
+
+class DBPoolCollector:
+    """Reports connection pool utilization of each engine at scrape time."""
+
+    def __init__(self, engines):
+        # engines() -> {"primary": engine, "replica-0": engine, ...}
+        self._engines = engines
+
+    def collect(self):
+        families = {
+            "size": GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["role"]),
+            "checkedout": GaugeMetricFamily("db_pool_checked_out", "Connections currently in use", labels=["role"]),
+            "checkedin": GaugeMetricFamily("db_pool_checked_in", "Idle connections in the pool", labels=["role"]),
+            "overflow": GaugeMetricFamily("db_pool_overflow", "Connections opened beyond the pool size", labels=["role"]),
+        }
+        for role, engine in self._engines().items():
+            for name, family in families.items():
+                # Not every pool class implements every counter (SingletonThreadPool.size is an int)
+                getter = getattr(engine.pool, name, None)
+                if callable(getter):
+                    family.add_metric([role], getter())
+        return list(families.values())
@@ -5,6 +5,17 @@ PLANS = {
         "limits": {
             "max_agents": 2,
             "max_tokens_per_month": 50000,
+        },
+        # Token buckets: sustained rate per minute plus allowed burst
+        "rate_limits": {
+            "api_per_minute": 60,
+            "api_burst": 20,
+            "chat_per_minute": 10,
+            "chat_burst": 3,
+        },
+        # Messages older than this are moved from the database to the archive
+        "retention": {
+            "hot_history_days": 30,
         }
     },
     "pro": {
@@ -12,6 +23,15 @@ PLANS = {
         "limits": {
             "max_agents": 20,
             "max_tokens_per_month": 1000000,
+        },
+        "rate_limits": {
+            "api_per_minute": 300,
+            "api_burst": 60,
+            "chat_per_minute": 60,
+            "chat_burst": 10,
+        },
+        "retention": {
+            "hot_history_days": 365,
         }
     }
 }
\ No newline at end of file
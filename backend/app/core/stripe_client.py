@@ -0,0 +1,11 @@
+from app.core.config import settings
+
+
+def get_stripe():
+    """
+    The `stripe` module configured with the secret key.
+    Imported on first use so the SDK stays off the app's import path.
+    """
+    import stripe
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    return stripe
@@ -1,10 +1,47 @@
+from typing import Optional, Sequence
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.db import models
 from app.schemas import agent as agent_schema
+from app.services.entity_cache import agent_cache, snapshot, attach
+
+def bump_agents_version(db: Session, owner_id: int):
+    """Invalidate cached agent lists of this owner (committed with the caller's change)."""
+    db.query(models.User)\
+        .filter(models.User.id == owner_id)\
+        .update({models.User.agents_version: models.User.agents_version + 1}, synchronize_session=False)
+
+def get_agents_version(db: Session, owner_id: Optional[int] = None) -> str:
+    """Version of one owner's agent list, or of all agents when owner_id is None."""
+    if owner_id is not None:
+        version = db.query(models.User.agents_version).filter(models.User.id == owner_id).scalar()
+        return str(version or 0)
+    # Every agent change bumps some owner; deleting a user changes the count
+    users, total = db.query(func.count(models.User.id), func.coalesce(func.sum(models.User.agents_version), 0)).one()
+    return f"{users}.{total}"
+
+def list_agents(
+    db: Session,
+    columns: Sequence[str],
+    owner_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+):
+    """Agent rows with only the requested columns, ordered by id."""
+    query = db.query(*[getattr(models.Agent, column) for column in columns])
+    if owner_id is not None:
+        query = query.filter(models.Agent.owner_id == owner_id)
+    if after_id is not None:
+        query = query.filter(models.Agent.id > after_id)
+    query = query.order_by(models.Agent.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
 
 def create_agent(db: Session, agent: agent_schema.AgentCreate, owner_id: int):
     db_agent = models.Agent(**agent.dict(), owner_id=owner_id)
     db.add(db_agent)
+    bump_agents_version(db, owner_id)
     db.commit()
     db.refresh(db_agent)
     return db_agent
@@ -13,7 +50,13 @@ def get_agents_by_owner(db: Session, owner_id: int):
     return db.query(models.Agent).filter(models.Agent.owner_id == owner_id).all()
 
 def get_agent_by_id(db: Session, agent_id: int):
-    return db.query(models.Agent).filter(models.Agent.id == agent_id).first()
+    cached = agent_cache.get(agent_id)
+    if cached is not None:
+        return attach(db, models.Agent, cached)
+    agent = db.query(models.Agent).filter(models.Agent.id == agent_id).first()
+    if agent is not None:
+        agent_cache.set(agent_id, snapshot(agent))
+    return agent
 
 # ... (existing imports and create/get functions) ...
 from app.schemas import agent as agent_schema
@@ -25,13 +68,17 @@ def update_agent(db: Session, db_agent: models.Agent, agent_in: agent_schema.Age
     for key, value in update_data.items():
         setattr(db_agent, key, value)
     db.add(db_agent)
+    bump_agents_version(db, db_agent.owner_id)
     db.commit()
     db.refresh(db_agent)
+    agent_cache.invalidate(db_agent.id)
     return db_agent
 
 def delete_agent(db: Session, agent_id: int) -> models.Agent:
     agent = db.query(models.Agent).filter(models.Agent.id == agent_id).first()
     if agent:
         db.delete(agent)
+        bump_agents_version(db, agent.owner_id)
         db.commit()
+        agent_cache.invalidate(agent_id)
     return agent
\ No newline at end of file
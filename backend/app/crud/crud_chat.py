@@ -1,5 +1,7 @@
+import re
+from sqlalchemy import DateTime, Float, text
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.db import models
 from app.schemas import chat as chat_schema # We will create this schema next
@@ -18,4 +20,81 @@ def get_chat_history_for_agent(db: Session, agent_id: int, owner_id: int) -> Lis
         .filter(models.ChatMessage.agent_id == agent_id)\
         .filter(models.Agent.owner_id == owner_id)\
         .order_by(models.ChatMessage.timestamp.asc())\
-        .all()
\ No newline at end of file
+        .all()
+
+def _fts5_query(query: str) -> str:
+    """Quote each word so user input can't use (or break) FTS5 query syntax."""
+    return " ".join(f'"{term}"' for term in re.findall(r"\w+", query))
+
+
+def search_messages(
+    db: Session,
+    query: str,
+    user_id: Optional[int] = None,
+    agent_id: Optional[int] = None,
+    limit: int = 20,
+    after: Optional[Tuple[float, int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Full-text search over message content, best match first.
+
+    Uses the `content_tsv` GIN index on PostgreSQL and the `chat_messages_fts`
+    FTS5 table on SQLite (both kept up to date on insert, see migration 0005).
+    `after` is the (rank, id) of the last result of the previous page.
+    Archived messages are not searched.
+    """
+    params: Dict[str, Any] = {"limit": limit}
+    scope = ""
+    if user_id is not None:
+        scope += " AND m.user_id = :user_id"
+        params["user_id"] = user_id
+    if agent_id is not None:
+        scope += " AND m.agent_id = :agent_id"
+        params["agent_id"] = agent_id
+    page = "1 = 1"
+    if after is not None:
+        params["after_rank"], params["after_id"] = after
+
+    if db.bind.dialect.name == "postgresql":
+        params["q"] = query
+        if after is not None:
+            # ts_rank_cd returns real; compare in the same precision
+            page = "(rank < CAST(:after_rank AS real) OR (rank = CAST(:after_rank AS real) AND id < :after_id))"
+        sql = f"""
+            SELECT p.id, p.agent_id, p.role, p."timestamp", p.rank,
+                   ts_headline('english', p.content, websearch_to_tsquery('english', :q),
+                               'StartSel=<mark>, StopSel=</mark>, MaxFragments=2') AS snippet
+            FROM (
+                SELECT * FROM (
+                    SELECT m.id, m.agent_id, m.role, m."timestamp", m.content,
+                           ts_rank_cd(m.content_tsv, query) AS rank
+                    FROM chat_messages m, websearch_to_tsquery('english', :q) query
+                    WHERE m.content_tsv @@ query{scope}
+                ) ranked
+                WHERE {page}
+                ORDER BY rank DESC, id DESC
+                LIMIT :limit
+            ) p
+            ORDER BY p.rank DESC, p.id DESC
+        """
+    else:
+        params["q"] = _fts5_query(query)
+        if not params["q"]:
+            return []
+        if after is not None:
+            page = "(rank < :after_rank OR (rank = :after_rank AND id < :after_id))"
+        sql = f"""
+            SELECT * FROM (
+                SELECT m.id, m.agent_id, m.role, m."timestamp",
+                       -bm25(chat_messages_fts) AS rank,
+                       snippet(chat_messages_fts, 0, '<mark>', '</mark>', '…', 16) AS snippet
+                FROM chat_messages_fts JOIN chat_messages m ON m.id = chat_messages_fts.rowid
+                WHERE chat_messages_fts MATCH :q{scope}
+            )
+            WHERE {page}
+            ORDER BY rank DESC, id DESC
+            LIMIT :limit
+        """
+
+    statement = text(sql).columns(timestamp=DateTime(timezone=True), rank=Float)
+    return [dict(row._mapping) for row in db.execute(statement, params)]
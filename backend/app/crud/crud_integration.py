@@ -4,6 +4,7 @@ from typing import List
 from app.db import models
 from app.schemas import integration as integration_schema
 from app.services.encryption_service import encrypt_token
+from app.services.tool_registry import invalidate_user_credentials
 
 def create_user_integration(db: Session, integration: integration_schema.UserIntegrationCreate, owner_id: int) -> models.UserIntegration:
     """
@@ -19,6 +20,7 @@ def create_user_integration(db: Session, integration: integration_schema.UserInt
     db.add(db_integration)
     db.commit()
     db.refresh(db_integration)
+    invalidate_user_credentials(owner_id, db_integration.service_name)
     return db_integration
 
 def get_integrations_by_owner(db: Session, owner_id: int) -> List[models.UserIntegration]:
@@ -39,5 +41,6 @@ def delete_integration(db: Session, integration_id: int, owner_id: int) -> model
     if db_integration:
         db.delete(db_integration)
         db.commit()
+        invalidate_user_credentials(owner_id, db_integration.service_name)
     
     return db_integration
\ No newline at end of file
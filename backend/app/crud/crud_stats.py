@@ -2,72 +2,106 @@
 
 from sqlalchemy.orm import Session
 from sqlalchemy import func, text
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
 
 from app.db import models
 
+def _rollup_day(db: Session, day: date) -> models.AnalyticsDaily:
+    """Aggregate one UTC day of chat_messages into an AnalyticsDaily row."""
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    in_day = (models.ChatMessage.timestamp >= start, models.ChatMessage.timestamp < start + timedelta(days=1))
+    messages = db.query(func.count(models.ChatMessage.id)).filter(*in_day).scalar()
+    ai_messages, response_time_sum, response_time_count = db.query(
+        func.count(models.ChatMessage.id),
+        func.sum(models.ChatMessage.response_time_seconds),
+        func.count(models.ChatMessage.response_time_seconds),
+    ).filter(*in_day, models.ChatMessage.role == 'ai').one()
+
+    # token_usage is JSON, summed in Python for database compatibility
+    total_tokens = 0
+    usages = db.query(models.ChatMessage.token_usage).filter(
+        *in_day, models.ChatMessage.role == 'ai', models.ChatMessage.token_usage.isnot(None)
+    )
+    for (usage,) in usages.yield_per(1000):
+        if usage and 'total_tokens' in usage:
+            total_tokens += usage['total_tokens']
+
+    return models.AnalyticsDaily(
+        day=day,
+        messages=messages,
+        ai_messages=ai_messages,
+        total_tokens=total_tokens,
+        response_time_sum=float(response_time_sum or 0),
+        response_time_count=response_time_count,
+        updated_at=datetime.now(timezone.utc),
+    )
+
+
+def rollup_daily_analytics(db: Session, now: Optional[datetime] = None) -> dict:
+    """
+    Refresh the per-day rollups read by get_platform_analytics.
+    Recomputes today and yesterday (late writes); the first run backfills
+    every day since the oldest message.
+    """
+    today = (now or datetime.now(timezone.utc)).date()
+    last_day = db.query(func.max(models.AnalyticsDaily.day)).scalar()
+    if last_day is not None:
+        day = min(last_day, today - timedelta(days=1))
+    else:
+        oldest = db.query(func.min(models.ChatMessage.timestamp)).scalar()
+        if oldest is None:
+            return {"days": 0}
+        day = oldest.date()
+
+    days = 0
+    while day <= today:
+        db.merge(_rollup_day(db, day))
+        db.commit()
+        day += timedelta(days=1)
+        days += 1
+    return {"days": days}
+
+
 def get_platform_analytics(db: Session):
     """
     Gathers various analytics from across the platform.
+    Message, token and latency figures come from the daily rollups kept by
+    the analytics_rollup job, so this never scans chat_messages.
     """
-    # 1. Total Users: Counts every row in the 'users' table.
-    # SQL equivalent: SELECT COUNT(id) FROM users;
+    # 1. Total Users and Agents: small tables, counted live.
     total_users = db.query(func.count(models.User.id)).scalar()
-
-    # 2. Total Agents: Counts every row in the 'agents' table.
-    # SQL equivalent: SELECT COUNT(id) FROM agents;
     total_agents = db.query(func.count(models.Agent.id)).scalar()
 
-    # 3. Total Messages: Counts every row in the 'chat_messages' table.
-    # SQL equivalent: SELECT COUNT(id) FROM chat_messages;
-    total_messages = db.query(func.count(models.ChatMessage.id)).scalar()
-    
-    # 4. Average Response Time:
-    # SQL equivalent: SELECT AVG(response_time_seconds) FROM chat_messages WHERE role = 'ai';
-    avg_response_time = db.query(func.avg(models.ChatMessage.response_time_seconds))\
-        .filter(models.ChatMessage.role == 'ai', models.ChatMessage.response_time_seconds.isnot(None))\
-        .scalar()
-        
-    # 5. Total Tokens Used:
-    # This is a two-step process for database compatibility.
-    # Step 5a: Get all the JSON objects containing token usage for AI messages.
-    token_usage_results = db.query(models.ChatMessage.token_usage)\
-        .filter(models.ChatMessage.role == 'ai', models.ChatMessage.token_usage.isnot(None))\
-        .all()
-        
-    # Step 5b: Sum the 'total_tokens' value from each JSON object in Python.
-    total_tokens = 0
-    if token_usage_results:
-        for usage in token_usage_results:
-            # usage[0] is the JSON object, e.g., {"total_tokens": 120}
-            if usage[0] and 'total_tokens' in usage[0]:
-                total_tokens += usage[0]['total_tokens']
+    # 2. Totals over all days: messages (including archived ones), tokens
+    #    and the average AI response time.
+    total_messages, total_tokens, response_time_sum, response_time_count = db.query(
+        func.sum(models.AnalyticsDaily.messages),
+        func.sum(models.AnalyticsDaily.total_tokens),
+        func.sum(models.AnalyticsDaily.response_time_sum),
+        func.sum(models.AnalyticsDaily.response_time_count),
+    ).one()
+    avg_response_time = response_time_sum / response_time_count if response_time_count else 0
 
-    # 6. Time-Series Data for a Chart (Messages over the last 7 days)
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    messages_last_7_days = db.query(
-        func.date(models.ChatMessage.timestamp).label('date'), # Group by day, not by second
-        func.count(models.ChatMessage.id).label('count')      # Count messages per day
-    ).filter(
-        models.ChatMessage.timestamp >= seven_days_ago       # Only from the last week
-    ).group_by(
-        func.date(models.ChatMessage.timestamp)              # The aggregation key
-    ).order_by(
-        func.date(models.ChatMessage.timestamp)              # Order chronologically
-    ).all()
+    # 3. Time-Series Data for a Chart (Messages over the last 7 days)
+    seven_days_ago = (datetime.now(timezone.utc) - timedelta(days=7)).date()
+    messages_last_7_days = db.query(models.AnalyticsDaily.day, models.AnalyticsDaily.messages)\
+        .filter(models.AnalyticsDaily.day >= seven_days_ago, models.AnalyticsDaily.messages > 0)\
+        .order_by(models.AnalyticsDaily.day)\
+        .all()
 
-    # 7. Format the time-series data into a clean list of objects for the frontend chart.
+    # 4. Format the time-series data into a clean list of objects for the frontend chart.
     time_series_data = [
-        {"date": result.date.strftime("%Y-%m-%d"), "messages": result.count}
+        {"date": result.day.strftime("%Y-%m-%d"), "messages": result.messages}
         for result in messages_last_7_days
     ]
 
-    # 8. Return everything in a single, well-structured dictionary.
+    # 5. Return everything in a single, well-structured dictionary.
     return {
         "total_users": total_users,
         "total_agents": total_agents,
-        "total_messages": total_messages,
-        "avg_response_time": float(avg_response_time) if avg_response_time else 0,
-        "total_tokens_used": total_tokens,
+        "total_messages": int(total_messages or 0),
+        "avg_response_time": float(avg_response_time),
+        "total_tokens_used": int(total_tokens or 0),
         "messages_time_series": time_series_data
-    }
\ No newline at end of file
+    }
@@ -3,16 +3,24 @@ from typing import List
 
 from app.db import models
 from app.schemas import tool as tool_schema
+from app.services.entity_cache import tool_cache, snapshot, attach
 
 def create_tool(db: Session, tool: tool_schema.ToolCreate) -> models.Tool:
     db_tool = models.Tool(**tool.dict())
     db.add(db_tool)
     db.commit()
     db.refresh(db_tool)
+    tool_cache.invalidate("public")
+    tool_cache.invalidate("registry")
     return db_tool
 
 def get_public_tools(db: Session) -> List[models.Tool]:
-    return db.query(models.Tool).filter(models.Tool.is_public == True).all()
+    cached = tool_cache.get("public")
+    if cached is not None:
+        return [attach(db, models.Tool, values) for values in cached]
+    tools = db.query(models.Tool).filter(models.Tool.is_public == True).all()
+    tool_cache.set("public", [snapshot(tool) for tool in tools])
+    return tools
 
 def get_tool_by_langchain_key(db: Session, key: str) -> models.Tool:
     return db.query(models.Tool).filter(models.Tool.langchain_key == key).first()
\ No newline at end of file
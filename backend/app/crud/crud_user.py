@@ -2,9 +2,20 @@ from sqlalchemy.orm import Session
 from app.db import models
 from app.schemas import user as user_schema
 from app.core.security import get_password_hash
+from app.services.entity_cache import user_cache, agent_cache, snapshot, attach
 
 def get_user_by_email(db: Session, email: str):
-    return db.query(models.User).filter(models.User.email == email).first()
+    # Runs on every authenticated request (get_current_user), so it is served from the cache
+    cached = user_cache.get(email)
+    if cached is not None:
+        return attach(db, models.User, cached)
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if user is not None:
+        user_cache.set(email, snapshot(user))
+    return user
+
+def get_user_by_id(db: Session, user_id: int):
+    return db.query(models.User).filter(models.User.id == user_id).first()
 
 # Update create_user to accept an optional role
 def create_user(db: Session, user: user_schema.UserCreate, role: models.UserRole = models.UserRole.user):
@@ -24,12 +35,15 @@ def create_user(db: Session, user: user_schema.UserCreate, role: models.UserRole
 from app.schemas.user import UserUpdate
 
 def update_user(db: Session, db_user: models.User, user_in: UserUpdate) -> models.User:
+    old_email = db_user.email
     update_data = user_in.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_user, key, value)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    user_cache.invalidate(old_email)
+    user_cache.invalidate(db_user.email)
     return db_user
 
 # ... (existing imports and functions) ...
@@ -41,6 +55,11 @@ def get_all_users(db: Session, skip: int = 0, limit: int = 100) -> List[models.U
 def delete_user(db: Session, user_id: int) -> models.User:
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if user:
+        email = user.email
+        agent_ids = [agent.id for agent in user.agents]
         db.delete(user)
         db.commit()
+        user_cache.invalidate(email)
+        for agent_id in agent_ids:
+            agent_cache.invalidate(agent_id)
     return user
\ No newline at end of file
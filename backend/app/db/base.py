@@ -1,15 +1,67 @@
+import itertools
+
+from prometheus_client import REGISTRY
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import DBPoolCollector
+
+
+def _engine_options(url: str) -> dict:
+    """Pool and timeout settings from the environment (SQLite keeps its own pool)."""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING, "pool_recycle": settings.DB_POOL_RECYCLE}
+    if url.startswith("sqlite"):
+        return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    if url.startswith("postgresql") and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
 
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Read-only traffic (history, analytics, exports, listings) goes to the replicas
+# round-robin; without replicas it shares the primary.
+replica_engines = [
+    create_engine(url, **_engine_options(url))
+    for url in (u.strip() for u in settings.DATABASE_REPLICA_URLS.split(","))
+    if url
+]
+_read_session_factories = itertools.cycle(
+    [sessionmaker(autocommit=False, autoflush=False, bind=e) for e in replica_engines] or [SessionLocal]
+)
+
+
+def ReadSessionLocal():
+    return next(_read_session_factories)()
+
+
+def _pool_engines():
+    engines = {"primary": engine}
+    engines.update({f"replica-{i}": e for i, e in enumerate(replica_engines)})
+    return engines
+
+
+REGISTRY.register(DBPoolCollector(_pool_engines))
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    """Session for read-only endpoints; never write through it."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,83 @@
+"""
+Versioned schema migrations.
+
+Each module in `versions/` is named `<NNNN>_<description>.py` and defines
+`upgrade(conn)`. Migrations run in order inside their own transaction, and
+applied versions are recorded in the `schema_migrations` table. A module can
+set `TRANSACTIONAL = False` to run on an autocommit connection (needed for
+CREATE INDEX CONCURRENTLY). Migrations must be idempotent, because version
+0001 creates the schema from the current models.
+
+On PostgreSQL an advisory lock keeps several workers starting at once from
+migrating concurrently.
+"""
+
+import importlib
+import logging
+import pkgutil
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_LOCK_ID = 72_615_001  # arbitrary, shared by every worker
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(64) PRIMARY KEY,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def available_migrations() -> List[Tuple[str, object]]:
+    """(version, module) for every migration, in order."""
+    from app.db.migrations import versions
+
+    names = sorted(info.name for info in pkgutil.iter_modules(versions.__path__))
+    return [(name.split("_", 1)[0], importlib.import_module(f"{versions.__name__}.{name}")) for name in names]
+
+
+def applied_versions(engine: Engine) -> set:
+    with engine.begin() as conn:
+        conn.execute(text(_CREATE_TABLE))
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def pending_migrations(engine: Engine) -> List[Tuple[str, object]]:
+    applied = applied_versions(engine)
+    return [(version, module) for version, module in available_migrations() if version not in applied]
+
+
+def _apply(engine: Engine, version: str, module):
+    description = (module.__doc__ or "").strip().split("\n")[0]
+    logger.info(f"Applying migration {version}: {description}")
+    if getattr(module, "TRANSACTIONAL", True):
+        with engine.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:v)"), {"v": version})
+    else:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            module.upgrade(conn)
+            conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:v)"), {"v": version})
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Apply all pending migrations; returns the versions applied."""
+    is_postgres = engine.dialect.name == "postgresql"
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if is_postgres:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _LOCK_ID})
+        try:
+            # Checked after taking the lock so a worker that waited sees the others' work
+            pending = pending_migrations(engine)
+            for version, module in pending:
+                _apply(engine, version, module)
+            if pending:
+                logger.info(f"Applied {len(pending)} migration(s)")
+            return [version for version, _ in pending]
+        finally:
+            if is_postgres:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _LOCK_ID})
@@ -0,0 +1,40 @@
+"""
+Migration command line.
+
+    python -m app.db.migrations upgrade            apply pending migrations
+    python -m app.db.migrations status             list applied and pending versions
+    python -m app.db.migrations partition [TABLE]  convert chat_messages/audit_logs to monthly partitions
+"""
+
+import argparse
+import logging
+
+from app.db.base import engine
+from app.db.migrations import applied_versions, available_migrations, run_migrations
+from app.db.partitioning import PARTITIONED_TABLES, partition_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["upgrade", "status", "partition"])
+    parser.add_argument("tables", nargs="*", default=list(PARTITIONED_TABLES))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    if args.command == "upgrade":
+        applied = run_migrations(engine)
+        print(f"Applied: {', '.join(applied) or 'nothing to do'}")
+    elif args.command == "status":
+        applied = applied_versions(engine)
+        for version, module in available_migrations():
+            description = (module.__doc__ or "").strip().split("\n")[0]
+            print(f"{'applied' if version in applied else 'pending':<8} {version}  {description}")
+    else:
+        run_migrations(engine)
+        for table in args.tables:
+            with engine.begin() as conn:
+                partition_table(conn, table)
+
+
+if __name__ == "__main__":
+    main()
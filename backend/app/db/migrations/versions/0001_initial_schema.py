@@ -0,0 +1,9 @@
+"""Initial schema (all tables of app.db.models)."""
+
+from app.db import models  # noqa: F401  (registers the tables on Base.metadata)
+from app.db.base import Base
+
+
+def upgrade(conn):
+    # checkfirst keeps this a no-op on databases created by the old create_all startup
+    Base.metadata.create_all(bind=conn, checkfirst=True)
@@ -0,0 +1,9 @@
+"""Add chat_messages.status for partial answers of cancelled turns."""
+
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    columns = {column["name"] for column in inspect(conn).get_columns("chat_messages")}
+    if "status" not in columns:
+        conn.execute(text("ALTER TABLE chat_messages ADD COLUMN status VARCHAR"))
@@ -0,0 +1,22 @@
+"""Composite indexes for history, per-user analytics, audit export and agent listing."""
+
+from sqlalchemy import inspect, text
+
+# Built without locking writes on PostgreSQL, which needs an autocommit connection
+TRANSACTIONAL = False
+
+INDEXES = [
+    ("ix_chat_messages_agent_id_timestamp", "chat_messages", '(agent_id, "timestamp")'),
+    ("ix_chat_messages_user_id_agent_id", "chat_messages", "(user_id, agent_id)"),
+    ("ix_audit_logs_timestamp", "audit_logs", '("timestamp")'),
+    ("ix_agents_owner_id", "agents", "(owner_id)"),
+]
+
+
+def upgrade(conn):
+    inspector = inspect(conn)
+    concurrently = "CONCURRENTLY " if conn.dialect.name == "postgresql" else ""
+    for name, table, columns in INDEXES:
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            conn.execute(text(f"CREATE INDEX {concurrently}{name} ON {table} {columns}"))
@@ -0,0 +1,7 @@
+"""Manifest table for archived chat history segments."""
+
+from app.db.models import ChatArchiveSegment
+
+
+def upgrade(conn):
+    ChatArchiveSegment.__table__.create(bind=conn, checkfirst=True)
@@ -0,0 +1,40 @@
+"""Full-text search index over chat_messages.content."""
+
+from sqlalchemy import inspect, text
+
+from app.db.partitioning import is_partitioned
+
+TRANSACTIONAL = False
+
+_SQLITE_STATEMENTS = [
+    # External-content FTS5 table: the text lives only in chat_messages
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts "
+    "USING fts5(content, content='chat_messages', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_fts_insert AFTER INSERT ON chat_messages BEGIN "
+    "INSERT INTO chat_messages_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_fts_delete AFTER DELETE ON chat_messages BEGIN "
+    "INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_fts_update AFTER UPDATE OF content ON chat_messages BEGIN "
+    "INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO chat_messages_fts(rowid, content) VALUES (new.id, new.content); END",
+    "INSERT INTO chat_messages_fts(chat_messages_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade(conn):
+    if conn.dialect.name == "postgresql":
+        columns = {column["name"] for column in inspect(conn).get_columns("chat_messages")}
+        if "content_tsv" not in columns:
+            conn.execute(text(
+                "ALTER TABLE chat_messages ADD COLUMN content_tsv tsvector "
+                "GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED"
+            ))
+        # Partitioned parents can't build indexes concurrently
+        concurrently = "" if is_partitioned(conn, "chat_messages") else "CONCURRENTLY "
+        conn.execute(text(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS ix_chat_messages_content_tsv "
+            "ON chat_messages USING GIN (content_tsv)"
+        ))
+    elif conn.dialect.name == "sqlite":
+        for statement in _SQLITE_STATEMENTS:
+            conn.execute(text(statement))
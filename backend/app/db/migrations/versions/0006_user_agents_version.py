@@ -0,0 +1,9 @@
+"""Add users.agents_version for conditional GET on the agent list."""
+
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    columns = {column["name"] for column in inspect(conn).get_columns("users")}
+    if "agents_version" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN agents_version INTEGER NOT NULL DEFAULT 0"))
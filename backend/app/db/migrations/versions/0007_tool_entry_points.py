@@ -0,0 +1,25 @@
+"""Add tools.entry_point and tools.credential_service for the tool registry."""
+
+from sqlalchemy import inspect, text
+
+# Implementations of the tools seeded before the registry existed
+BUILTIN_TOOLS = {
+    "tavily_search": ("app.tools.builtin:tavily_search_tool", "TAVILY"),
+    "send_sms": ("app.tools.builtin:send_sms_tool", "TWILIO"),
+}
+
+
+def upgrade(conn):
+    columns = {column["name"] for column in inspect(conn).get_columns("tools")}
+    if "entry_point" not in columns:
+        conn.execute(text("ALTER TABLE tools ADD COLUMN entry_point VARCHAR"))
+    if "credential_service" not in columns:
+        conn.execute(text("ALTER TABLE tools ADD COLUMN credential_service VARCHAR"))
+    for function_name, (entry_point, service) in BUILTIN_TOOLS.items():
+        conn.execute(
+            text(
+                "UPDATE tools SET entry_point = :entry_point, credential_service = :service "
+                "WHERE function_name = :function_name AND entry_point IS NULL"
+            ),
+            {"entry_point": entry_point, "service": service, "function_name": function_name},
+        )
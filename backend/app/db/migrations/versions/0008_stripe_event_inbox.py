@@ -0,0 +1,7 @@
+"""Inbox table for Stripe webhook events."""
+
+from app.db.models import StripeEvent
+
+
+def upgrade(conn):
+    StripeEvent.__table__.create(bind=conn, checkfirst=True)
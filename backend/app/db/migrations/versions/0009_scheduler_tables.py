@@ -0,0 +1,8 @@
+"""Tables for the job scheduler (schedules/leases, run history) and daily analytics rollups."""
+
+from app.db.models import AnalyticsDaily, JobRun, ScheduledJob
+
+
+def upgrade(conn):
+    for model in (ScheduledJob, JobRun, AnalyticsDaily):
+        model.__table__.create(bind=conn, checkfirst=True)
@@ -0,0 +1,9 @@
+"""Add agents.sub_agents for parallel fan-out agents."""
+
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    columns = {column["name"] for column in inspect(conn).get_columns("agents")}
+    if "sub_agents" not in columns:
+        conn.execute(text("ALTER TABLE agents ADD COLUMN sub_agents JSON"))
@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, ForeignKey, DateTime, Text,
-    JSON, Enum, Boolean, Numeric
+    JSON, Enum, Boolean, Numeric, Index, Date, Float
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -25,6 +25,8 @@ class User(Base):
     plan = Column(String, default="free")
     token_usage_this_month = Column(Integer, default=0)
     provider = Column(String, nullable=True)
+    # Bumped on every change to this user's agents; drives the agent list ETag
+    agents_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # --- THIS IS THE FIX ---
     # Add the fields needed for Stripe integration
@@ -45,12 +47,16 @@ class Agent(Base):
     name = Column(String, index=True, nullable=False)
     system_prompt = Column(Text, nullable=False)
     tools = Column(JSON, nullable=True)
+    # Specialists run in parallel before the agent answers (see agent_composition)
+    sub_agents = Column(JSON, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     owner = relationship("User", back_populates="agents")
     chat_history = relationship("ChatMessage", back_populates="agent")
 
+    __table_args__ = (Index("ix_agents_owner_id", "owner_id"),)
+
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
     id = Column(Integer, primary_key=True, index=True)
@@ -62,10 +68,93 @@ class ChatMessage(Base):
     response_time_seconds = Column(Numeric(10, 4), nullable=True)
     tool_calls = Column(JSON, nullable=True)
     token_usage = Column(JSON, nullable=True)
+    # None for complete messages, "cancelled" for partial answers of cancelled turns
+    status = Column(String, nullable=True)
 
     agent = relationship("Agent", back_populates="chat_history")
     user = relationship("User", back_populates="messages")
 
+    # Keep in sync with migrations/versions/0003_hot_path_indexes.py
+    __table_args__ = (
+        Index("ix_chat_messages_agent_id_timestamp", "agent_id", "timestamp"),
+        Index("ix_chat_messages_user_id_agent_id", "user_id", "agent_id"),
+    )
+
+class ChatArchiveSegment(Base):
+    """Manifest entry for one compressed file of archived chat messages."""
+    __tablename__ = "chat_archive_segments"
+    id = Column(Integer, primary_key=True, index=True)
+    agent_id = Column(Integer, nullable=False)
+    key = Column(String, unique=True, nullable=False)
+    first_timestamp = Column(DateTime(timezone=True), nullable=False)
+    last_timestamp = Column(DateTime(timezone=True), nullable=False)
+    first_message_id = Column(Integer, nullable=False)
+    last_message_id = Column(Integer, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index("ix_chat_archive_segments_agent_id_last_timestamp", "agent_id", "last_timestamp"),)
+
+class StripeEvent(Base):
+    """Verified Stripe webhook event waiting for (or done with) processing."""
+    __tablename__ = "stripe_events"
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String, unique=True, nullable=False)  # Stripe's evt_... id, dedupes redeliveries
+    type = Column(String, nullable=False)
+    customer_id = Column(String, nullable=True)  # events of one customer are applied in order
+    created = Column(Integer, nullable=False)  # Stripe's event timestamp (unix seconds)
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, processed, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_stripe_events_status_created", "status", "created"),
+        Index("ix_stripe_events_customer_id_created", "customer_id", "created"),
+    )
+
+class ScheduledJob(Base):
+    """Schedule and lease of a shared maintenance job (see app/services/scheduler.py)."""
+    __tablename__ = "scheduled_jobs"
+    name = Column(String, primary_key=True)
+    schedule = Column(String, nullable=False)  # cron expression, UTC
+    enabled = Column(Boolean, nullable=False, default=True)
+    next_run_at = Column(DateTime(timezone=True), nullable=False)
+    lease_owner = Column(String, nullable=True)  # "host:pid" of the worker running it
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    last_status = Column(String, nullable=True)
+    last_duration_seconds = Column(Float, nullable=True)
+
+class JobRun(Base):
+    """History of scheduled job runs."""
+    __tablename__ = "job_runs"
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String, nullable=False)
+    worker = Column(String, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    status = Column(String, nullable=False)  # succeeded, failed
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (Index("ix_job_runs_job_name_started_at", "job_name", "started_at"),)
+
+class AnalyticsDaily(Base):
+    """Per-day message totals, maintained by the analytics_rollup job."""
+    __tablename__ = "analytics_daily"
+    day = Column(Date, primary_key=True)
+    messages = Column(Integer, nullable=False, default=0)
+    ai_messages = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+    response_time_sum = Column(Float, nullable=False, default=0)
+    response_time_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class Tool(Base):
     __tablename__ = "tools"
     id = Column(Integer, primary_key=True, index=True)
@@ -73,6 +162,10 @@ class Tool(Base):
     description = Column(String, nullable=False)
     function_name = Column(String, unique=True, nullable=False)
     is_public = Column(Boolean, default=True)
+    # Implementation as "package.module:function" (see app/services/tool_registry.py)
+    entry_point = Column(String, nullable=True)
+    # UserIntegration.service_name whose token is passed to the tool, e.g. "TWILIO"
+    credential_service = Column(String, nullable=True)
 
 
 
@@ -89,6 +182,8 @@ class AuditLog(Base):
 
     user = relationship("User", back_populates="audit_logs")  # ✅ back_populates added
 
+    __table_args__ = (Index("ix_audit_logs_timestamp", "timestamp"),)
+
 class UserIntegration(Base):
     __tablename__ = "user_integrations"
     id = Column(Integer, primary_key=True, index=True)
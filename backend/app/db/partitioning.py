@@ -0,0 +1,159 @@
+"""
+Monthly range partitioning of the append-only tables on PostgreSQL.
+
+`chat_messages` and `audit_logs` can be converted (once, by an operator:
+``python -m app.db.migrations partition``) into tables partitioned by month
+on their `timestamp` column. Queries filtered by time then only touch the
+relevant months, and retention becomes dropping whole partitions.
+
+Partitions are created ahead of time by `maintain_partitions` at startup; a
+row whose month has no partition is rejected, so DB_PARTITION_MONTHS_AHEAD
+must cover the time between restarts.
+"""
+
+import logging
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("chat_messages", "audit_logs")
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table"
+    ), {"table": table}).first() is not None
+
+
+def list_partitions(conn: Connection, table: str) -> List[Tuple[str, date]]:
+    """(partition name, first day of its month), oldest first."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table"
+    ), {"table": table})
+    partitions = []
+    prefix = f"{table}_y"
+    for (name,) in rows:
+        if name.startswith(prefix):
+            year, month = name[len(prefix):].split("m")
+            partitions.append((name, date(int(year), int(month), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def ensure_partitions(conn: Connection, table: str, start: date, months_ahead: int):
+    """Create the monthly partitions from `start` until `months_ahead` months from now."""
+    month = month_start(start)
+    last = add_months(month_start(datetime.now(timezone.utc)), months_ahead)
+    while month <= last:
+        upper = add_months(month, 1)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+        ))
+        month = upper
+
+
+def drop_partitions_before(conn: Connection, table: str, cutoff: datetime, only_empty: bool = False) -> List[str]:
+    """Drop every partition whose whole month is older than `cutoff` (optionally only empty ones)."""
+    dropped = []
+    for name, month in list_partitions(conn, table):
+        if add_months(month, 1) <= cutoff.date():
+            if only_empty and conn.execute(text(f"SELECT 1 FROM {name} LIMIT 1")).first() is not None:
+                continue
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    if dropped:
+        logger.info(f"Dropped partitions of {table}: {', '.join(dropped)}")
+    return dropped
+
+
+def partition_table(conn: Connection, table_name: str):
+    """
+    Rewrite an existing table as a monthly partitioned one (PostgreSQL only).
+
+    The table is locked for the duration of the copy, so run it in a
+    maintenance window on large tables.
+    """
+    from app.db.base import Base
+    from app.db import models  # noqa: F401
+
+    if conn.dialect.name != "postgresql":
+        raise RuntimeError("Partitioning is only supported on PostgreSQL")
+    if is_partitioned(conn, table_name):
+        logger.info(f"{table_name} is already partitioned")
+        return
+
+    table = Base.metadata.tables[table_name]
+    legacy = f"{table_name}_legacy"
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table_name}).scalar()
+    # Secondary indexes (including ones added by migrations) are rebuilt on the new table
+    index_definitions = [row[0] for row in conn.execute(text(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = :table AND indexname <> :pkey"
+    ), {"table": table_name, "pkey": f"{table_name}_pkey"})]
+
+    conn.execute(text(f"LOCK TABLE {table_name} IN ACCESS EXCLUSIVE MODE"))
+    conn.execute(text(f"ALTER TABLE {table_name} RENAME TO {legacy}"))
+    conn.execute(text(f"ALTER INDEX IF EXISTS {table_name}_pkey RENAME TO {legacy}_pkey"))
+    if sequence:
+        # Keep the id sequence alive when the old table is dropped
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+    conn.execute(text(f'UPDATE {legacy} SET "timestamp" = now() WHERE "timestamp" IS NULL'))
+
+    # The partition key has to be part of the primary key
+    conn.execute(text(
+        f"CREATE TABLE {table_name} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED) "
+        f'PARTITION BY RANGE ("timestamp")'
+    ))
+    conn.execute(text(f'ALTER TABLE {table_name} ALTER COLUMN "timestamp" SET NOT NULL'))
+    conn.execute(text(f'ALTER TABLE {table_name} ADD PRIMARY KEY (id, "timestamp")'))
+    for fk in table.foreign_keys:
+        conn.execute(text(
+            f"ALTER TABLE {table_name} ADD FOREIGN KEY ({fk.parent.name}) "
+            f"REFERENCES {fk.column.table.name} ({fk.column.name})"
+        ))
+
+    oldest: Optional[datetime] = conn.execute(text(f'SELECT min("timestamp") FROM {legacy}')).scalar()
+    ensure_partitions(conn, table_name, oldest or datetime.now(timezone.utc), settings.DB_PARTITION_MONTHS_AHEAD)
+
+    # Generated columns (e.g. the search vector) are recomputed, not copied
+    columns = ", ".join(f'"{column.name}"' for column in table.columns)
+    conn.execute(text(f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {legacy}"))
+    conn.execute(text(f"DROP TABLE {legacy}"))
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table_name}.id"))
+    # Captured before the rename, so they already name the new table
+    for definition in index_definitions:
+        conn.execute(text(definition))
+    logger.info(f"Partitioned {table_name} by month")
+
+
+def maintain_partitions(engine: Engine):
+    """Create upcoming monthly partitions for every partitioned table."""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            if is_partitioned(conn, table):
+                ensure_partitions(conn, table, datetime.now(timezone.utc), settings.DB_PARTITION_MONTHS_AHEAD)
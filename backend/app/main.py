@@ -1,47 +1,124 @@
-import socketio # <-- ADD THIS LINE
+"""
+ASGI entry point.
+
+`create_app()` builds the FastAPI app wrapped by the Socket.IO servers.
+Importing this module stays cheap: heavy vendor SDKs (google.adk, stripe,
+twilio, tavily, sentry) load on first use, and startup work (settings
+validation, migrations, preflight) runs in the lifespan handler.
+
+    uvicorn --factory app.main:create_app
+    uvicorn app.main:app  # same app, built on first access
+"""
+
+from contextlib import asynccontextmanager
+
+import socketio
 from fastapi import FastAPI
+from prometheus_fastapi_instrumentator import Instrumentator
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.api.v1.api import api_router
+from app.api.middleware import IPRateLimitMiddleware, CompressionMiddleware
+from app.api.responses import ORJSONResponse
 from app.core.config import settings
-from app.db.base import Base, engine
-# Import the ADK-based Socket.IO server from your new adk_agent_service
-from app.services.adk_agent_service import adk_sio, health_check
-
-# Create the FastAPI app instance
-app = FastAPI(title=settings.PROJECT_NAME)
-
-# Add standard HTTP middleware
-app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include all your normal REST API routes
-app.include_router(api_router, prefix="/api/v1")
-
-@app.on_event("startup")
-def on_startup():
-    # This is a good practice to ensure tables are created
-    Base.metadata.create_all(bind=engine)
-
-@app.get("/")
-def read_root():
-    return {"message": "Welcome to the ADK AI Agent Platform API"}
-
-@app.get("/health/adk")
-async def adk_health():
-    """Health check for ADK agent service"""
-    return await health_check()
-
-# Create the final ASGI app by WRAPPING the FastAPI app with the ADK Socket.IO server.
-# This makes the socket.io server handle /socket.io/ requests and fallback to FastAPI for others
-socket_app = socketio.ASGIApp(adk_sio, other_asgi_app=app, socketio_path='/socket.io/')
-
-# Export socket_app as the main app for uvicorn
-app = socket_app
\ No newline at end of file
+from app.core.adk_config import adk_config
+from app.core.logging_config import setup_logging
+from app.db.base import engine
+from app.db.migrations import run_migrations
+from app.db.partitioning import maintain_partitions
+from app.services import encryption_service, jobs, preflight_service, stripe_inbox  # jobs registers the scheduled jobs
+from app.services.scheduler import Scheduler
+from app.services.alert_service import init_sentry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fail fast on missing settings or a malformed encryption key
+    settings.validate()
+    encryption_service.get_cipher()
+    init_sentry()
+    # Bring the schema up to date and create upcoming monthly partitions
+    run_migrations(engine)
+    maintain_partitions(engine)
+    # Validate credentials, model config and DB/tool reachability in the
+    # background (readiness stays "starting" until done), then keep it fresh
+    preflight_service.start_refresher(run_now=True)
+    # Apply stored Stripe webhook events in the background
+    if settings.STRIPE_INBOX_WORKER:
+        stripe_inbox.start_worker()
+    # Maintenance jobs; shared ones only when this process schedules them
+    scheduler = Scheduler(run_shared=settings.SCHEDULER_ENABLED)
+    scheduler.start()
+    yield
+    await scheduler.stop()
+    await stripe_inbox.stop_worker()
+    await preflight_service.stop_refresher()
+
+
+def create_app():
+    # Route all logging through the non-blocking JSON pipeline
+    setup_logging()
+
+    # Create the FastAPI app instance
+    app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
+
+    # Add standard HTTP middleware
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+    app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
+    app.add_middleware(IPRateLimitMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag"],
+    )
+
+    # Include all your normal REST API routes
+    app.include_router(api_router, prefix="/api/v1")
+
+    # Serve request metrics plus the custom metrics in app.core.metrics on /metrics
+    Instrumentator().instrument(app).expose(app)
+
+    # The Socket.IO handlers register on import; google.adk itself loads on first chat
+    from app.services.adk_agent_service import adk_sio, adk_binary_sio, health_check
+
+    @app.get("/")
+    def read_root():
+        return {"message": "Welcome to the ADK AI Agent Platform API"}
+
+    @app.get("/health/adk")
+    async def adk_health():
+        """Health check for ADK agent service"""
+        return await health_check()
+
+    @app.get("/health/ready")
+    def readiness():
+        """Readiness probe backed by the cached preflight state (details: /api/v1/admin/readiness)"""
+        state = preflight_service.get_public_readiness()
+        return ORJSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+    # Create the final ASGI app by WRAPPING the FastAPI app with the ADK Socket.IO server.
+    # This makes the socket.io server handle /socket.io/ requests and fallback to FastAPI for others.
+    # Lifespan events pass through to the FastAPI app.
+    socket_app = socketio.ASGIApp(adk_sio, other_asgi_app=app, socketio_path='/socket.io/')
+    # Optional MessagePack wire mode for /text, negotiated by connecting on its own path
+    if adk_binary_sio is not None:
+        socket_app = socketio.ASGIApp(adk_binary_sio, other_asgi_app=socket_app, socketio_path=adk_config.SOCKETIO_BINARY_PATH)
+    return socket_app
+
+
+_app = None
+
+
+def __getattr__(name):
+    # `app.main:app` keeps working for uvicorn/gunicorn, built on first access
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,32 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 
+from app.core.adk_config import adk_config
+
+class SubAgent(BaseModel):
+    """A specialist run in parallel with the others; the agent's own prompt merges their answers."""
+    # Becomes an ADK agent name, so it must be an identifier
+    name: str = Field(pattern=r"^[A-Za-z][A-Za-z0-9_]{0,47}$")
+    instructions: str
+    tools: Optional[List[str]] = []
+    timeout_seconds: Optional[float] = Field(None, gt=0, le=300)
+
+def _unique_sub_agent_names(sub_agents):
+    if sub_agents:
+        names = [sub_agent.name for sub_agent in sub_agents]
+        if len(set(names)) != len(names):
+            raise ValueError("sub-agent names must be unique")
+        if "user" in names:
+            raise ValueError("'user' is reserved and can't name a sub-agent")
+    return sub_agents
+
 class AgentBase(BaseModel):
     name: str
     system_prompt: str
     tools: Optional[List[str]] = []
+    sub_agents: Optional[List[SubAgent]] = Field(None, max_length=adk_config.MAX_SUB_AGENTS)
+
+    _check_sub_agents = field_validator("sub_agents")(_unique_sub_agent_names)
 
 class AgentCreate(AgentBase):
     pass
@@ -15,6 +37,9 @@ class AgentUpdate(BaseModel):
     name: Optional[str] = None
     system_prompt: Optional[str] = None
     tools: Optional[List[str]] = None
+    sub_agents: Optional[List[SubAgent]] = Field(None, max_length=adk_config.MAX_SUB_AGENTS)
+
+    _check_sub_agents = field_validator("sub_agents")(_unique_sub_agent_names)
 
 class Agent(AgentBase):
     id: int
@@ -12,16 +12,27 @@ class ChatMessageBase(BaseModel):
 class ChatMessageCreate(ChatMessageBase):
     response_time_seconds: Optional[float] = None
     tool_calls: Optional[List[Dict[str, Any]]] = None
-    # --- ADD THIS FIELD ---
-    token_usage: Optional[Dict[str, int]] = None
+    # {"total_tokens": n}, plus {"branches": {name: n}} for fan-out agents
+    token_usage: Optional[Dict[str, Any]] = None
+    status: Optional[str] = None
 
 class ChatMessage(ChatMessageBase):
     id: int
     timestamp: datetime
     response_time_seconds: Optional[float] = None
     tool_calls: Optional[List[Dict[str, Any]]] = None
-    # --- ADD THIS FIELD ---
-    token_usage: Optional[Dict[str, int]] = None
+    # {"total_tokens": n}, plus {"branches": {name: n}} for fan-out agents
+    token_usage: Optional[Dict[str, Any]] = None
+    status: Optional[str] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ChatSearchResult(BaseModel):
+    id: int
+    agent_id: int
+    role: str
+    timestamp: datetime
+    rank: float
+    # Matching fragment(s) with the hits wrapped in <mark>...</mark>
+    snippet: str
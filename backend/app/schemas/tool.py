@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class ToolBase(BaseModel):
     name: str
@@ -7,7 +8,8 @@ class ToolBase(BaseModel):
     function_name: str
 
 class ToolCreate(ToolBase):
-    pass # No changes needed here
+    entry_point: Optional[str] = None
+    credential_service: Optional[str] = None
 
 class Tool(ToolBase):
     id: int
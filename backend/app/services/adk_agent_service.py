@@ -9,145 +9,235 @@ import socketio
 from sqlalchemy.orm import Session
 import time
 import logging
-import os
-import json
-from typing import Dict, Any, AsyncGenerator, Optional
-
-# ADK imports - using the Runner approach with proper async iteration
-from google.adk.agents import Agent
-from google.adk.runners import Runner
-from google.adk.sessions.in_memory_session_service import InMemorySessionService
-from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
-from google.genai import types as genai_types
-from google.adk.tools import FunctionTool
+import secrets
+from typing import TYPE_CHECKING, Dict, Any, AsyncGenerator, Optional
+
+# google.adk takes seconds to import, so it is loaded on first use (the
+# startup preflight warms it) instead of when this module is imported
+if TYPE_CHECKING:
+    from google.adk.agents import BaseAgent
 
 # Your existing imports
-from app.tools.google_tool import tavily_search, send_sms
 from app.core.config import settings
 from app.core.adk_config import adk_config
+from app.core.logging_config import bind_session
+from app.core.metrics import TURN_CANCEL_LATENCY
 from app.db.base import SessionLocal
 from app.crud import crud_agent, crud_chat, crud_user
 from app.schemas.chat import ChatMessageCreate
 from app.services.audit_service import log_activity
-import sentry_sdk
+from app.services import preflight_service, tool_registry
+from app.services.chat_mailbox import SessionMailbox, POLICIES
+from app.services.stream_buffer import TurnStreamBuffer
+from app.services.rate_limiter import rate_limiter, plan_limit, IP_LIMIT
+from app.services.llm_governor import LLMCapacityTimeout, capacity_notifier
+from app.services import context_cache, tool_events, voice_service
+from app.services.alert_service import capture_exception
 
 # Initialize logging
 logger = logging.getLogger(__name__)
 
-# Check and log Google ADK credentials
-gcp_credentials_path = os.environ.get('GOOGLE_APPLICATION_CREDENTIALS')
-if os.path.exists(gcp_credentials_path):
-    logger.info(f"Google ADK credentials found at {gcp_credentials_path}")
-else:
-    logger.error(f"Google ADK credentials NOT FOUND at {gcp_credentials_path}")
+# Credentials are validated by the startup preflight (see preflight_service)
+# rather than at import time or on every turn.
+
+# ADK Services, created on first use
+_session_service = None
+_artifact_service = None
+
 
-# ADK Services
-session_service = InMemorySessionService()
-artifact_service = InMemoryArtifactService()
+def get_session_service():
+    global _session_service
+    if _session_service is None:
+        from google.adk.sessions.in_memory_session_service import InMemorySessionService
+        _session_service = InMemorySessionService()
+    return _session_service
+
+
+def get_artifact_service():
+    global _artifact_service
+    if _artifact_service is None:
+        if settings.ARTIFACT_BACKEND == "disk":
+            from app.services.artifact_store import DiskArtifactService
+            _artifact_service = DiskArtifactService(
+                settings.ARTIFACT_DIR, settings.ARTIFACT_MAX_BYTES, settings.ARTIFACT_USER_QUOTA_BYTES
+            )
+        else:
+            from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
+            _artifact_service = InMemoryArtifactService()
+    return _artifact_service
 
-# Socket.IO setup with debug logging
+# Socket.IO setup - packet-level logging is opt-in because it is very verbose
 sio = socketio.AsyncServer(
     async_mode='asgi', 
     cors_allowed_origins=["http://localhost:3000", "*"],
-    logger=True,
-    engineio_logger=True
+    logger=adk_config.SOCKETIO_LOGGING,
+    engineio_logger=adk_config.SOCKETIO_LOGGING,
+    **adk_config.get_socketio_transport_config()
 )
 
+# Opt-in binary wire mode: the same /text handlers served by a second server
+# that encodes every packet with MessagePack. Clients negotiate it by
+# connecting on SOCKETIO_BINARY_PATH with socket.io-msgpack-parser.
+binary_sio = socketio.AsyncServer(
+    async_mode='asgi',
+    cors_allowed_origins=["http://localhost:3000", "*"],
+    serializer='msgpack',
+    logger=adk_config.SOCKETIO_LOGGING,
+    engineio_logger=adk_config.SOCKETIO_LOGGING,
+    **adk_config.get_socketio_transport_config()
+) if adk_config.SOCKETIO_BINARY_ENABLED else None
+binary_sids = set()  # sockets connected through binary_sio
+
 # Session management
+# Per-chat state is keyed by the sid of the socket that started the chat (the
+# chat id). A reconnecting client can `resume` the chat from a new socket, so
+# emits go through emit_to_chat(), which looks up the socket currently attached.
 chat_sessions = {}
 session_user_info = {}
 adk_runners = {}  # Store ADK runners for each session
 active_chat_tasks = {}  # Store chat processing tasks
+turn_cancel_reasons = {}  # Why the current turn of a session was cancelled
+session_mailboxes = {}  # Ordered per-session inbox of user messages
+chat_streams = {}  # chat id -> TurnStreamBuffer of the current/last turn
+chat_to_sid = {}  # chat id -> attached socket sid (None while disconnected)
+sid_to_chat = {}  # socket sid -> chat id
+teardown_timers = {}  # chat id -> pending grace-period teardown handle
+voice_streams = {}  # chat id -> VoiceStream of the /voice socket speaking its answers
+voice_sid_to_chat = {}  # /voice socket sid -> chat id
 
 def get_db_session():
     """Get database session - returns the session directly for context manager usage"""
     return SessionLocal()
 
-# Tool functions wrapped for ADK
-def tavily_search_tool(query: str) -> Dict[str, Any]:
-    """Search tool using Tavily for web search capabilities."""
-    try:
-        result = tavily_search(query)
-        return {
-            "status": "success",
-            "result": result
-        }
-    except Exception as e:
-        logger.error(f"Tavily search error: {e}")
-        return {
-            "status": "error", 
-            "error_message": str(e)
-        }
-
-def send_sms_tool(to_number: str, message: str) -> Dict[str, Any]:
-    """SMS tool using Twilio for sending text messages."""
-    try:
-        result = send_sms(to_number, message)
-        return {
-            "status": "success",
-            "result": result
-        }
-    except Exception as e:
-        logger.error(f"SMS send error: {e}")
-        return {
-            "status": "error",
-            "error_message": str(e)
-        }
-
-def create_adk_agent(agent_config, user_id: str, agent_id: str) -> Agent:
-    """Create an ADK Agent based on the agent configuration."""
-    
-    # Map tool names to actual functions
-    tool_function_map = {
-        "tavily_search": tavily_search_tool,
-        "send_sms": send_sms_tool
-    }
+def create_adk_agent(agent_config, user_id: str, agent_id: str, db: Optional[Session] = None) -> "BaseAgent":
+    """Create an ADK Agent based on the agent configuration (a fan-out tree if it has sub-agents)."""
+    from google.adk.agents import Agent
+    from google.adk.tools import FunctionTool
+    from app.tools.artifacts import read_artifact_tool
     
     # Handle both dictionary and object agent_config
     if isinstance(agent_config, dict):
         tools = agent_config.get('tools', [])
         system_prompt = agent_config.get('instructions', '')
+        sub_agents = agent_config.get('sub_agents') or []
     else:
         tools = agent_config.tools if hasattr(agent_config, 'tools') and agent_config.tools else []
         system_prompt = agent_config.system_prompt if hasattr(agent_config, 'system_prompt') else ''
+        sub_agents = getattr(agent_config, 'sub_agents', None) or []
     
-    # Create ADK FunctionTools from available tools
-    adk_tools = []
-    if tools:
-        for tool_name in tools:
-            if tool_name in tool_function_map:
-                adk_tools.append(FunctionTool(func=tool_function_map[tool_name]))
+    # Resolve tool names through the tool registry (tools table + entry points)
+    db_session = db or get_db_session()
+    try:
+        def resolve(names):
+            functions = tool_registry.resolve_tools(db_session, names, user_id)
+            if functions:
+                # Tools may hand back large outputs as artifacts; this reads them
+                functions.append(read_artifact_tool)
+            return [FunctionTool(func=function) for function in functions]
+        
+        adk_tools = resolve(tools)
+        if sub_agents:
+            from app.services.agent_composition import build_composite_agent
+            return build_composite_agent(
+                agent_id, user_id, system_prompt, adk_tools, sub_agents,
+                model=preflight_service.get_shared_llm(), resolve_tools=resolve,
+            )
+    finally:
+        if db is None:
+            db_session.close()
     
-    # Create the ADK Agent using the standard approach
-    model_config = adk_config.get_model_config()
+    # Create the ADK Agent using the shared model client warmed by the preflight
     agent = Agent(
         name=f"agent_{agent_id}",
-        model=model_config["model"],
+        model=preflight_service.get_shared_llm(),
         description=f"AI Agent for user {user_id}",
         instruction=system_prompt,
         tools=adk_tools,
+        **tool_events.agent_callbacks(),
     )
     
     return agent
 
+async def emit_to_socket(sid, event: str, payload: Optional[Dict[str, Any]] = None):
+    """Emit a /text event through whichever server (JSON or msgpack) owns the socket."""
+    server = binary_sio if sid in binary_sids else sio
+    await server.emit(event, payload, to=sid, namespace='/text')
+
 @sio.on('connect', namespace='/text')
 async def connect_text(sid, environ):
-    logger.info(f"Text Chat Client connected: {sid}")
-    logger.info(f"Connect environ: {environ.get('REMOTE_ADDR')} - {environ.get('HTTP_USER_AGENT', 'Unknown')}")
+    bind_session(sid)
+    if settings.RATE_LIMIT_ENABLED:
+        result = await rate_limiter.acheck(f"ip:{environ.get('REMOTE_ADDR', 'unknown')}", IP_LIMIT)
+        if not result.allowed:
+            raise socketio.exceptions.ConnectionRefusedError({'message': 'Too many connections', 'retry_after': result.retry_after_header})
+    if binary_sio is not None and environ.get('PATH_INFO', '').startswith(adk_config.SOCKETIO_BINARY_PATH):
+        binary_sids.add(sid)
+    logger.info(f"Text Chat Client connected: {sid} ({'msgpack' if sid in binary_sids else 'json'})")
+    logger.debug(f"Connect environ: {environ.get('REMOTE_ADDR')} - {environ.get('HTTP_USER_AGENT', 'Unknown')}")
 
 @sio.on('disconnect', namespace='/text')
 def disconnect_text(sid):
-    # Clean up sessions and cancel any active tasks
-    if sid in active_chat_tasks:
-        task = active_chat_tasks[sid]
+    bind_session(sid)
+    binary_sids.discard(sid)
+    chat_id = sid_to_chat.pop(sid, sid)
+    if chat_to_sid.get(chat_id) != sid:
+        # No chat was started, or a newer socket has already resumed it
+        return
+    chat_to_sid[chat_id] = None
+
+    # Keep the chat (and any running turn) alive for a while so the client can resume it
+    grace = adk_config.RESUME_GRACE_PERIOD
+    if grace > 0 and chat_id in adk_runners:
+        teardown_timers[chat_id] = asyncio.get_running_loop().call_later(grace, teardown_chat, chat_id)
+        logger.info(f"Text Chat Client disconnected: {sid} - chat kept for {grace}s for resume")
+    else:
+        teardown_chat(chat_id)
+
+def teardown_chat(chat_id):
+    """Cancel any running turn and drop all state of a chat."""
+    timer = teardown_timers.pop(chat_id, None)
+    if timer:
+        timer.cancel()
+    
+    # The task persists its partial response with the user info it captured
+    if chat_id in active_chat_tasks:
+        task = active_chat_tasks[chat_id]
         if not task.done():
+            turn_cancel_reasons[chat_id] = 'disconnect'
             task.cancel()
-        active_chat_tasks.pop(sid, None)
+        active_chat_tasks.pop(chat_id, None)
     
-    chat_sessions.pop(sid, None)
-    session_user_info.pop(sid, None)
-    adk_runners.pop(sid, None)
-    logger.info(f"Text Chat Client disconnected: {sid} - cleaned up session data")
+    mailbox = session_mailboxes.pop(chat_id, None)
+    if mailbox:
+        mailbox.close()
+    
+    chat_sessions.pop(chat_id, None)
+    session_user_info.pop(chat_id, None)
+    adk_runners.pop(chat_id, None)
+    chat_streams.pop(chat_id, None)
+    chat_to_sid.pop(chat_id, None)
+    voice = voice_streams.pop(chat_id, None)
+    if voice:
+        voice.close()
+    logger.info(f"Chat {chat_id} closed - cleaned up session data")
+
+async def emit_to_chat(chat_id, event: str, payload: Optional[Dict[str, Any]] = None):
+    """
+    Emit a turn event to whichever socket is attached to the chat.
+    
+    Events are also recorded (with a sequence number) in the turn's stream
+    buffer; while no socket is attached they are only buffered.
+    """
+    stream = chat_streams.get(chat_id)
+    if stream is not None:
+        payload = stream.append(event, payload)
+    voice = voice_streams.get(chat_id)
+    if voice is not None and event in ('token', 'stream_end'):
+        voice.on_chat_event(event, payload)
+    sid = chat_to_sid.get(chat_id)
+    if sid is None:
+        return
+    await emit_to_socket(sid, event, payload)
 
 # Add generic connection handlers to debug namespace routing
 @sio.on('connect')
@@ -158,139 +248,27 @@ async def connect_generic(sid, environ):
 def disconnect_generic(sid):
     logger.info(f"GENERIC disconnection from {sid}")
 
-# Add generic start_chat handler to redirect to correct namespace
-@sio.on('start_chat')
-async def start_chat_generic(sid, data):
-    logger.info(f"Received start_chat on DEFAULT namespace from {sid}, processing directly")
-    # Process the start_chat logic directly here for the default namespace
-    agent_id = data.get('agent_id')
-    user_id = data.get('user_id')
-    
-    logger.info(f"Processing start_chat for agent_id={agent_id}, user_id={user_id}")
-    
-    # Validate required data
-    if not agent_id or not user_id:
-        logger.error(f"Missing agent_id or user_id in start_chat data: {data}")
-        await sio.emit('error', {'message': 'Missing agent_id or user_id'}, to=sid)
-        return
-    
-    try:
-        # Get database session
-        db = get_db_session()
-        
-        # Get the agent configuration from database
-        db_agent = crud_agent.get_agent_by_id(db=db, agent_id=agent_id)
-        
-        logger.info(f"DEBUG: db_agent type: {type(db_agent)}")
-        logger.info(f"DEBUG: db_agent value: {db_agent}")
-        
-        if not db_agent:
-            await sio.emit('error', {'message': 'Agent not found.'}, to=sid)
-            db.close()
-            return
-        
-        # Store session info
-        session_user_info[sid] = {
-            'user_id': user_id,
-            'agent_id': agent_id,
-            'db': db
-        }
-        
-        # Setup the ADK session
-        session_id = f"session_{sid}_{int(time.time())}"
-        
-        # Use the agent object directly
-        agent_config = db_agent
-        
-        # Initialize ADK runner
-        runner, session = await setup_adk_session(agent_config, str(user_id), str(agent_id))
-        
-        # Store the runner for this session
-        adk_runners[sid] = {
-            'runner': runner,
-            'session': session,
-            'agent_config': agent_config,
-            'user_id': user_id,
-            'agent_id': agent_id
-        }
-        
-        logger.info(f"Chat session started for {sid} with agent {agent_id}")
-        await sio.emit('chat_started', to=sid)
-        
-        db.close()
-        
-    except Exception as e:
-        logger.error(f"Failed to start chat: {e}")
-        await sio.emit('error', {'message': f"Failed to start chat: {e}"}, to=sid)
-
-# Add generic chat_message handler to redirect to correct namespace
-@sio.on('chat_message')
-async def chat_message_generic(sid, data):
-    logger.info(f"Received chat_message on DEFAULT namespace from {sid}, processing directly")
-    
-    if sid not in adk_runners:
-        logger.error(f"No active chat session for {sid}")
-        await sio.emit('error', {'message': 'No active chat session'}, to=sid)
-        return
-    
-    session_info = adk_runners[sid]
-    user_id = session_info['user_id']
-    agent_id = session_info['agent_id']
-    user_message = data.get('message', '')
-    
-    if not user_message.strip():
-        logger.warning(f"Empty message from {sid}")
-        await sio.emit('error', {'message': 'Message cannot be empty'}, to=sid)
-        return
-    
-    logger.info(f"Processing chat_message: '{user_message}' from user {user_id} to agent {agent_id}")
-    
-    try:
-        # Store the message in database
-        db_session_info = session_user_info.get(sid)
-        if db_session_info:
-            db = db_session_info['db']
-            
-            # Save user message
-            user_msg = ChatMessageCreate(
-                message=user_message,
-                role="user",
-                agent_id=agent_id,
-                user_id=user_id
-            )
-            crud_chat.create_chat_message(db=db, chat_message=user_msg)
-            
-        await sio.emit('status', {'status': 'Message received, processing...'}, to=sid)
-        
-        # Process the message with ADK runner
-        runner = session_info['runner']
-        session = session_info['session']
-        
-        # Start the task to process the message
-        task = asyncio.create_task(process_agent_response(sid, user_message))
-        active_chat_tasks[sid] = task
-        
-    except Exception as e:
-        logger.error(f"Error in chat_message handler: {e}")
-        await sio.emit('error', {'message': f"Error processing message: {e}"}, to=sid)
-
 # Add test event handler
 @sio.on('test_event', namespace='/text')
 async def test_event(sid, data):
+    bind_session(sid)
     logger.info(f"Test event received from {sid}: {data}")
-    await sio.emit('test_response', {'message': 'Hello from server!'}, to=sid, namespace='/text')
+    await emit_to_socket(sid, 'test_response', {'message': 'Hello from server!'})
 
-async def setup_adk_session(agent_config, user_id: str, agent_id: str):
+async def setup_adk_session(agent_config, user_id: str, agent_id: str, db: Optional[Session] = None):
     """Initialize an ADK session using the standard Runner approach"""
+    from google.adk.runners import Runner
+    session_service = get_session_service()
     
     # Create ADK Agent
-    adk_agent = create_adk_agent(agent_config, user_id, agent_id)
+    adk_agent = create_adk_agent(agent_config, user_id, agent_id, db=db)
     
     # Create Runner using the simple approach
     app_name = f"adk_platform_agent_{agent_id}"
     runner = Runner(
         agent=adk_agent,
         session_service=session_service,
+        artifact_service=get_artifact_service(),
         app_name=app_name,
     )
     
@@ -307,38 +285,41 @@ async def setup_adk_session(agent_config, user_id: str, agent_id: str):
 
 @sio.on('start_chat', namespace='/text')
 async def start_chat(sid, data):
-    logger.info(f"Received start_chat event from {sid} with data: {data}")
+    bind_session(sid)
+    logger.debug(f"Received start_chat event from {sid} with data: {data}")
     agent_id = data.get('agent_id')
     user_id = data.get('user_id')
     
     logger.info(f"Starting chat for agent_id={agent_id}, user_id={user_id}")
     
+    if not preflight_service.is_ready():
+        logger.warning(f"Rejecting start_chat from {sid}: AI service is not ready")
+        await emit_to_socket(sid, 'error', {'message': 'The AI service is not ready. Please try again shortly.'})
+        return
+    
+    # A socket drives one chat at a time: close the one it started or resumed
+    # before, or it would keep running with nothing attached
+    previous = sid_to_chat.pop(sid, None)
+    if previous is not None and previous != sid and chat_to_sid.get(previous) == sid:
+        teardown_chat(previous)
+    if sid in session_user_info or sid in adk_runners:
+        teardown_chat(sid)
+    
     db = get_db_session()
     try:
         # Get agent configuration from database
         agent_config = crud_agent.get_agent_by_id(db, agent_id=agent_id)
         if not agent_config:
             logger.error(f"Agent {agent_id} not found in database")
-            await sio.emit('error', {'message': 'Agent not found.'}, to=sid, namespace='/text')
+            await emit_to_socket(sid, 'error', {'message': 'Agent not found.'})
             return
 
-        logger.info(f"Found agent: {agent_config.name}")
-        
-        # Store user info for this session
-        session_user_info[sid] = {'user_id': user_id, 'agent_id': agent_id}
+        logger.debug(f"Found agent: {agent_config.name}")
         
         # Setup ADK session
-        logger.info(f"Setting up ADK session for {sid}")
-        runner, session = await setup_adk_session(agent_config, user_id, agent_id)
-        
-        # Store session data
-        adk_runners[sid] = {
-            'runner': runner,
-            'session': session,
-            'agent_config': agent_config,
-        }
-        
-        logger.info(f"ADK session setup complete for {sid}")
+        logger.debug(f"Setting up ADK session for {sid}")
+        runner, session = await setup_adk_session(agent_config, user_id, agent_id, db=db)
+        logger.debug(f"ADK session setup complete for {sid}")
         
         # Load and set chat history in session state
         history_from_db = crud_chat.get_chat_history_for_agent(db, agent_id=agent_id, owner_id=user_id)
@@ -351,35 +332,109 @@ async def start_chat(sid, data):
             })
         session.state.update({"conversation_history": conversation_history})
         
-        await sio.emit('chat_started', to=sid, namespace='/text')
+        # The resume token lets a reconnecting socket prove it owns this chat,
+        # the plan sizes its rate limit
+        user = crud_user.get_user_by_id(db, user_id=user_id)
+        resume_token = secrets.token_urlsafe(24)
+        
+        # Clients may pick their own mailbox policy; otherwise use the configured default
+        policy = data.get('mailbox_policy') if data.get('mailbox_policy') in POLICIES else adk_config.MAILBOX_POLICY
+        mailbox = SessionMailbox(
+            sid,
+            run_turn=run_mailbox_turn,
+            notify=send_status,
+            cancel_current=cancel_turn_and_notify,
+            policy=policy,
+            max_depth=adk_config.MAILBOX_MAX_DEPTH,
+            coalesce_window=adk_config.MAILBOX_COALESCE_WINDOW,
+        )
+        
+        # Register the chat only once it is fully set up
+        session_user_info[sid] = {
+            'user_id': user_id,
+            'agent_id': agent_id,
+            'plan': user.plan if user else 'free',
+            'resume_token': resume_token,
+        }
+        adk_runners[sid] = {
+            'runner': runner,
+            'session': session,
+            'agent_config': agent_config,
+        }
+        session_mailboxes[sid] = mailbox
+        sid_to_chat[sid] = sid
+        chat_to_sid[sid] = sid
+        
+        await emit_to_socket(sid, 'chat_started', {'chat_id': sid, 'resume_token': resume_token})
         logger.info(f"ADK chat session started for user {user_id}, agent {agent_id}")
 
     except Exception as e:
         logger.error(f"Failed to start chat: {e}")
-        sentry_sdk.capture_exception(e)
-        await sio.emit('error', {'message': f"Failed to start chat: {e}"}, to=sid, namespace='/text')
+        capture_exception(e)
+        if sid in session_user_info:
+            teardown_chat(sid)
+        sid_to_chat.pop(sid, None)
+        await emit_to_socket(sid, 'error', {'message': f"Failed to start chat: {e}"})
     finally:
         db.close()
 
+async def process_branch_event(sid, branch, event, branches, tool_calls, started):
+    """Account a fan-out branch's event and report its progress; branch text is not streamed as tokens."""
+    info = branches.setdefault(branch, {'tokens': 0, 'status': 'running'})
+    usage = event.usage_metadata
+    if usage is not None and usage.total_token_count:
+        info['tokens'] += usage.total_token_count
+    
+    status = (event.custom_metadata or {}).get('branch_status')
+    if status:
+        info['status'] = status
+        await emit_to_chat(sid, 'branch_progress', {
+            'branch': branch, 'status': status, 'tokens': info['tokens'], 'elapsed': round(time.time() - started, 3),
+        })
+        return
+    
+    for func_call in event.get_function_calls():
+        tool_calls.append({"name": func_call.name, "args": dict(func_call.args or {}), "branch": branch})
+        await emit_to_chat(sid, 'branch_progress', {'branch': branch, 'status': 'tool', 'tool': func_call.name})
+    
+    parts = event.content.parts if event.content and event.content.parts else []
+    text = "".join(part.text for part in parts if part.text)
+    if text and event.is_final_response():
+        if usage is None or not usage.total_token_count:
+            info['tokens'] += len(text.split())  # same estimate as save_agent_response
+        info['status'] = 'completed'
+        await emit_to_chat(sid, 'branch_progress', {
+            'branch': branch, 'status': 'completed', 'tokens': info['tokens'], 'chars': len(text),
+            'elapsed': round(time.time() - started, 3),
+        })
+
 async def process_runner_events(runner_events, sid, full_response_container, tool_calls):
     """Helper function to process ADK runner events with proper async iteration"""
+    from app.services.agent_composition import branch_of
+    branches = full_response_container.setdefault('branches', {})
+    started = time.time()
     async for event in runner_events:
         try:
-            # Log each event type for debugging
-            logger.info(f"ADK Event received for {sid}: {type(event).__name__}")
+            # Per-event debug logs are sampled to keep them off the hot path
+            logger.debug(f"ADK Event received for {sid}: {type(event).__name__}", extra={"sample": "event"})
+            
+            # Events of parallel sub-agents only report progress; the synthesizer streams the answer
+            branch = branch_of(event)
+            if branch is not None:
+                await process_branch_event(sid, branch, event, branches, tool_calls, started)
+                continue
             
             # Check if this event has content to process
             if event.content and event.content.parts:
-                logger.info(f"Processing event with content for {sid}")
-                
+
                 for part in event.content.parts:
                     # Process text parts
                     if hasattr(part, 'text') and part.text:
                         text_chunk = part.text
                         full_response_container['response'] += text_chunk
                         # Stream the text token to client
-                        await sio.emit('token', {'token': text_chunk}, to=sid, namespace='/text')
-                        logger.debug(f"Sent text token: {text_chunk[:50]}...")
+                        await emit_to_chat(sid, 'token', {'token': text_chunk})
+                        logger.debug(f"Sent text token ({len(text_chunk)} chars)", extra={"sample": "token"})
                         
                     # Handle function calls if present
                     elif hasattr(part, 'function_call') and part.function_call:
@@ -389,97 +444,89 @@ async def process_runner_events(runner_events, sid, full_response_container, too
                             "args": dict(func_call.args) if hasattr(func_call, 'args') else {}
                         }
                         tool_calls.append(tool_call_data)
-                        await sio.emit('tool_start', {"name": func_call.name}, to=sid, namespace='/text')
+                        # tool_end (with the same id) is sent by the tool callbacks
+                        await emit_to_chat(sid, 'tool_start', {"name": func_call.name, "id": func_call.id})
                         logger.info(f"Tool call: {func_call.name}")
                         
                     # Handle function responses
                     elif hasattr(part, 'function_response') and part.function_response:
                         func_response = part.function_response
-                        logger.info(f"Function response received: {func_response.name}")
+                        logger.debug(f"Function response received: {func_response.name}")
             
             # Check if this is the end of the response
             elif not event.content:
-                logger.info(f"Event without content received for {sid} - may indicate completion")
+                logger.debug(f"Event without content received for {sid} - may indicate completion", extra={"sample": "event"})
                 
         except Exception as event_error:
             logger.error(f"Error processing event: {event_error}")
-            await sio.emit('error', {'message': f"Error processing response event: {str(event_error)}"}, to=sid, namespace='/text')
+            await emit_to_chat(sid, 'error', {'message': f"Error processing response event: {str(event_error)}"})
     
     # Signal end of response after processing all events
-    await sio.emit('stream_end', {'turn_complete': True}, to=sid, namespace='/text')
+    await emit_to_chat(sid, 'stream_end', {'turn_complete': True})
     logger.info(f"Response complete for {sid}, total length: {len(full_response_container['response'])}")
 
 async def process_agent_response(sid, user_input):
     """Process agent response using the standard ADK Runner.run approach"""
     if sid not in adk_runners:
-        await sio.emit('error', {'message': 'No active session'}, to=sid, namespace='/text')
+        await emit_to_chat(sid, 'error', {'message': 'No active session'})
         return
 
     runner_data = adk_runners[sid]
     runner = runner_data['runner']
     session = runner_data['session']
     user_info = session_user_info[sid]
-    agent_config = runner_data['agent_config']
 
     start_time = time.time()
     full_response = ""
+    full_response_container = {'response': '', 'branches': {}}
     tool_calls = []
     response_timeout = 60  # Seconds to wait before sending fallback response
 
     try:
+        from google.genai import types as genai_types
+        from app.services.agent_composition import branch_names, branch_timeout
+
+        # Fan-out agents get their branches' time on top of the synthesis
+        response_timeout += branch_timeout(runner.agent)
+
         # Create the user message content
         user_message = genai_types.Content(
             role="user",
             parts=[genai_types.Part.from_text(text=user_input)]
         )
 
-        logger.info(f"Processing message for session {sid}: {user_input}")
-        
-        # Log detailed environment and configuration information
-        creds_path = os.environ.get('GOOGLE_APPLICATION_CREDENTIALS')
-        creds_exists = os.path.exists(creds_path) if creds_path else False
-        logger.info(f"Google ADK credentials path: {creds_path}")
-        logger.info(f"Credentials file exists: {creds_exists}")
-        
-        if creds_exists:
-            logger.info(f"Credentials file size: {os.path.getsize(creds_path)} bytes")
-            with open(creds_path, 'r') as f:
-                creds_content = f.read()
-                logger.debug(f"First 20 chars of credentials file: {creds_content[:20]}...")
-                logger.info(f"Credentials file contains valid JSON: {bool(json.loads(creds_content))}")
-        else:
-            logger.error(f"Credentials file not found at {creds_path}")
-            # Send a fallback response if credentials are missing
+        # Readiness is cached by the preflight, so this does no filesystem I/O
+        if not preflight_service.is_ready():
+            logger.error(f"AI service not ready, sending fallback for {sid}")
             await send_fallback_response(sid, user_input, "I'm sorry, but the AI service is not properly configured. Please contact support.")
             return
-            
-        # Log session information
-        logger.info(f"Session ID: {session.id}")
-        logger.info(f"User ID: {user_info['user_id']}")
-        logger.info(f"Agent ID: {user_info['agent_id']}")
         
-        # Log agent configuration
-        logger.info(f"Agent name: {agent_config.name}")
-        logger.info(f"Agent system prompt length: {len(agent_config.system_prompt)}")
-        logger.info(f"Agent tools: {agent_config.tools}")
+        logger.debug(f"Processing message for session {sid} (agent {user_info['agent_id']}, session {session.id})")
         
-        # Log model configuration
-        model_config = adk_config.get_model_config()
-        logger.info(f"Using model: {model_config['model']}")
+        # Model calls of this turn report quota queueing/retries to this chat
+        capacity_notifier.set(lambda payload: send_status(sid, payload))
+        # ...and attribute context cache hits to this agent
+        context_cache.current_agent.set(str(user_info['agent_id']))
+        # ...and report tool progress/completion to this chat
+        tool_events.tool_notifier.set(lambda event, payload: emit_to_chat(sid, event, payload))
         
         # Use the standard runner.run approach but with timeout handling
-        logger.info(f"Starting ADK Runner.run for session {sid}")
+        logger.debug(f"Starting ADK Runner.run for session {sid}")
         
         # Send initial status to client
-        await sio.emit('status', {'status': 'Generating response...'}, to=sid, namespace='/text')
+        await emit_to_chat(sid, 'status', {'status': 'Generating response...'})
+        branches = branch_names(runner.agent)
+        if branches:
+            await emit_to_chat(sid, 'branches_started', {'branches': branches})
         
         try:
             # Create a timeout for the entire ADK operation
             response_received = False
             
             # Execute the runner with an explicit timeout using asyncio.wait_for
-            logger.info(f"Creating runner for user_id={user_info['user_id']}, session_id={session.id}")
+            logger.debug(f"Creating runner for user_id={user_info['user_id']}, session_id={session.id}")
             
+            runner_events = None
             try:
                 # Use runner.run_async() method which is the correct async approach
                 runner_events = runner.run_async(
@@ -489,13 +536,12 @@ async def process_agent_response(sid, user_input):
                 )
                 
                 # Send status update to client
-                await sio.emit('status', {'status': 'Processing response...'}, to=sid, namespace='/text')
+                await emit_to_chat(sid, 'status', {'status': 'Processing response...'})
                 
                 # Process events from the runner with timeout
                 start_process_time = time.time()
                 
                 # Apply timeout to the entire async iteration using asyncio.wait_for
-                full_response_container = {'response': ''}
                 await asyncio.wait_for(
                     process_runner_events(runner_events, sid, full_response_container, tool_calls), 
                     timeout=response_timeout
@@ -503,6 +549,21 @@ async def process_agent_response(sid, user_input):
                 full_response = full_response_container['response']
                 response_received = True
             
+            except asyncio.CancelledError:
+                # Stop the upstream generation first, then keep what was streamed so far
+                await close_runner_stream(runner_events)
+                await save_agent_response(
+                    sid, full_response_container['response'], tool_calls, start_time,
+                    status='cancelled', user_info=user_info, branches=full_response_container['branches']
+                )
+                reason = turn_cancel_reasons.pop(sid, 'disconnect')
+                await emit_to_chat(sid, 'stream_end', {'turn_complete': False, 'cancelled': True, 'reason': reason})
+                raise
+            
+            except LLMCapacityTimeout as capacity_error:
+                logger.warning(f"No model capacity for {sid}: {capacity_error}")
+                await send_fallback_response(sid, user_input, "I'm sorry, the AI service is very busy right now. Please try again in a minute.")
+            
             except asyncio.TimeoutError:
                 logger.warning(f"ADK runner timed out for {sid} after {response_timeout} seconds")
                 await send_fallback_response(sid, user_input, "I'm sorry, but I'm taking too long to respond. Let me try a simpler answer: How can I help you today?")
@@ -511,6 +572,9 @@ async def process_agent_response(sid, user_input):
                 logger.error(f"ADK runner error for {sid}: {runner_error}")
                 await send_fallback_response(sid, user_input, f"I'm sorry, but I'm having trouble responding right now. Please try again later. (Error: {str(runner_error)[:100]})")
             
+            finally:
+                await close_runner_stream(runner_events)
+            
             # Check if we got a response
             if not response_received:
                 logger.warning(f"No response received from ADK for {sid}")
@@ -528,27 +592,75 @@ async def process_agent_response(sid, user_input):
             full_response = "Error: No response generated"
 
         # Save the complete response to database
-        await save_agent_response(sid, full_response, tool_calls, start_time)
+        await save_agent_response(sid, full_response, tool_calls, start_time, branches=full_response_container['branches'])
         
         logger.info(f"Successfully processed message for session {sid}")
 
     except Exception as e:
         logger.error(f"Error processing agent response for {sid}: {e}")
-        sentry_sdk.capture_exception(e)
-        await sio.emit('error', {'message': f"Agent processing error: {e}"}, to=sid, namespace='/text')
+        capture_exception(e)
+        await emit_to_chat(sid, 'error', {'message': f"Agent processing error: {e}"})
 
-async def save_agent_response(sid, full_response, tool_calls, start_time):
-    """Save the complete agent response to database"""
-    if sid not in session_user_info:
+async def close_runner_stream(runner_events):
+    """
+    Close the ADK event stream so the in-flight model request is aborted.
+    
+    Closing the async generator unwinds the runner's frames, which closes the
+    underlying streaming HTTP response instead of leaving it to the GC.
+    """
+    if runner_events is None:
+        return
+    try:
+        await runner_events.aclose()
+    except (RuntimeError, StopAsyncIteration):
+        pass
+    except Exception as e:
+        logger.warning(f"Error closing ADK runner stream: {e}")
+
+async def cancel_active_turn(sid, reason: str) -> Optional[float]:
+    """
+    Cancel the in-flight turn for a session and wait for it to wind down.
+    
+    Returns the cancellation latency in seconds, or None if nothing was running.
+    """
+    task = active_chat_tasks.get(sid)
+    if task is None or task.done():
+        return None
+
+    turn_cancel_reasons[sid] = reason
+    requested_at = time.perf_counter()
+    task.cancel()
+    done, _ = await asyncio.wait({task}, timeout=adk_config.TURN_CANCEL_TIMEOUT)
+    latency = time.perf_counter() - requested_at
+
+    if not done:
+        logger.warning(f"Turn for {sid} did not finish within {adk_config.TURN_CANCEL_TIMEOUT}s of cancellation")
+    TURN_CANCEL_LATENCY.labels(reason=reason).observe(latency)
+    logger.info(f"Cancelled turn for {sid} ({reason}) in {latency * 1000:.1f}ms")
+    return latency
+
+async def save_agent_response(
+    sid, full_response, tool_calls, start_time, status: Optional[str] = None,
+    user_info: Optional[Dict[str, Any]] = None, branches: Optional[Dict[str, Dict[str, Any]]] = None,
+):
+    """
+    Save the agent response to database (status='cancelled' for partial answers).
+    
+    Tokens of fan-out branches are recorded per branch and count towards the total.
+    """
+    user_info = user_info or session_user_info.get(sid)
+    if not user_info:
         return
-        
-    user_info = session_user_info[sid]
     
     db = get_db_session()
     try:
         end_time = time.time()
         response_time = end_time - start_time
         token_count = len(full_response.split()) if full_response else 0
+        token_usage = {"total_tokens": token_count}
+        if branches:
+            token_usage["branches"] = {name: info['tokens'] for name, info in branches.items()}
+            token_usage["total_tokens"] += sum(token_usage["branches"].values())
         
         # Save AI response to database
         crud_chat.create_chat_message(db, ChatMessageCreate(
@@ -558,7 +670,8 @@ async def save_agent_response(sid, full_response, tool_calls, start_time):
             content=full_response, 
             response_time_seconds=response_time,
             tool_calls=tool_calls, 
-            token_usage={"total_tokens": token_count}
+            token_usage=token_usage,
+            status=status
         ))
         db.commit()
         
@@ -566,31 +679,33 @@ async def save_agent_response(sid, full_response, tool_calls, start_time):
         
     except Exception as e:
         logger.error(f"Error saving agent response for {sid}: {e}")
-        sentry_sdk.capture_exception(e)
+        capture_exception(e)
     finally:
         db.close()
 
-@sio.on('chat_message', namespace='/text')
-async def handle_chat_message(sid, data):
-    logger.info(f"Received chat_message event from {sid} with data: {data}")
-    
-    if sid not in adk_runners:
-        logger.error(f"No active chat session for {sid}")
-        await sio.emit('error', {'message': 'No active chat session'}, to=sid, namespace='/text')
-        return
+async def send_status(sid, payload: Dict[str, Any]):
+    await emit_to_chat(sid, 'status', payload)
+
+async def cancel_turn_and_notify(sid, reason: str) -> Optional[float]:
+    """Cancel the running turn and tell the client how long it took."""
+    latency = await cancel_active_turn(sid, reason)
+    if latency is not None:
+        await emit_to_chat(sid, 'turn_cancelled', {'reason': reason, 'latency_ms': round(latency * 1000, 1)})
+    return latency
+
+async def run_mailbox_turn(sid, user_input: str, message_count: int = 1):
+    """
+    Run one agent turn for the mailbox.
     
-    user_input = data.get('message')
-    if not user_input:
-        logger.warning(f"Empty message received from {sid}")
+    The user row is written when the turn starts (with coalesced messages
+    merged), so the transcript always alternates in the order answered.
+    """
+    user_info = session_user_info.get(sid)
+    if not user_info:
         return
 
-    user_info = session_user_info[sid]
-    logger.info(f"Processing message from user {user_info['user_id']} for agent {user_info['agent_id']}: '{user_input}'")
-
     db = get_db_session()
     try:
-        # Save user message to database
-        logger.debug(f"Saving message to database for agent_id={user_info['agent_id']}, user_id={user_info['user_id']}")
         crud_chat.create_chat_message(db, ChatMessageCreate(
             agent_id=user_info['agent_id'], 
             user_id=user_info['user_id'], 
@@ -598,40 +713,221 @@ async def handle_chat_message(sid, data):
             content=user_input
         ))
         db.commit()
-        
-        logger.info(f"Saved user message for session {sid}: {user_input}")
-        await sio.emit('status', {'status': 'Message received, processing...'}, to=sid, namespace='/text')
-        
-        # Cancel any existing chat processing task
-        if sid in active_chat_tasks:
-            task = active_chat_tasks[sid]
-            if not task.done():
-                logger.info(f"Cancelling previous task for {sid}")
-                task.cancel()
-        
-        # Start processing the agent response
-        logger.info(f"Starting agent response processing for {sid}")
-        task = asyncio.create_task(process_agent_response(sid, user_input))
-        active_chat_tasks[sid] = task
-        logger.debug(f"Task created for {sid}: {task}")
-        
-        # Send confirmation to client that processing has started
-        await sio.emit('status', {'status': 'Agent is thinking...'}, to=sid, namespace='/text')
-        
+        logger.debug(f"Saved user message for session {sid}")
     except Exception as e:
         logger.error(f"Chat message handling error for {sid}: {e}")
-        sentry_sdk.capture_exception(e)
-        await sio.emit('error', {'message': f"Message processing error: {e}"}, to=sid, namespace='/text')
+        capture_exception(e)
+        await emit_to_chat(sid, 'error', {'message': f"Message processing error: {e}"})
+        return
     finally:
         db.close()
 
+    # Everything emitted from here on is buffered so the turn can be resumed
+    stream = TurnStreamBuffer(maxlen=adk_config.STREAM_BUFFER_SIZE)
+    chat_streams[sid] = stream
+    if sid in voice_streams:
+        voice_streams[sid].begin_turn()
+    await send_status(sid, {'status': 'Agent is thinking...', 'messages': message_count})
+    
+    task = asyncio.create_task(process_agent_response(sid, user_input))
+    active_chat_tasks[sid] = task
+    # asyncio.wait doesn't raise if the turn itself gets cancelled
+    try:
+        await asyncio.wait({task})
+    finally:
+        stream.complete = True
+
+@sio.on('chat_message', namespace='/text')
+async def handle_chat_message(sid, data):
+    bind_session(sid)
+    logger.debug(f"Received chat_message event from {sid}")
+    socket_sid, sid = sid, sid_to_chat.get(sid, sid)
+    
+    if sid not in adk_runners or sid not in session_mailboxes:
+        logger.error(f"No active chat session for {sid}")
+        await emit_to_socket(socket_sid, 'error', {'message': 'No active chat session'})
+        return
+    
+    user_input = data.get('message')
+    if not user_input:
+        logger.warning(f"Empty message received from {sid}")
+        return
+
+    user_info = session_user_info[sid]
+    logger.info(f"Processing message ({len(user_input)} chars) from user {user_info['user_id']} for agent {user_info['agent_id']}")
+
+    if settings.RATE_LIMIT_ENABLED:
+        result = await rate_limiter.acheck(f"user:{user_info['user_id']}:chat", plan_limit(user_info['plan'], 'chat'))
+        if not result.allowed:
+            logger.warning(f"Rate limited chat_message from user {user_info['user_id']}")
+            await send_status(sid, {
+                'status': 'You are sending messages too quickly. Please wait a moment.',
+                'code': 'rate_limited',
+                'accepted': False,
+                'retry_after': int(result.retry_after_header),
+            })
+            return
+
+    try:
+        # The mailbox reports queueing/backpressure to the client via status events
+        await session_mailboxes[sid].submit(user_input)
+    except Exception as e:
+        logger.error(f"Chat message handling error for {sid}: {e}")
+        capture_exception(e)
+        await emit_to_socket(socket_sid, 'error', {'message': f"Message processing error: {e}"})
+
+@sio.on('cancel_turn', namespace='/text')
+async def handle_cancel_turn(sid, data=None):
+    bind_session(sid)
+    chat_id = sid_to_chat.get(sid, sid)
+    latency = await cancel_turn_and_notify(chat_id, 'client')
+    if latency is None:
+        await send_status(chat_id, {'status': 'Nothing to cancel'})
+
+def _authorized_chat(data) -> Optional[str]:
+    """The chat id of `data` if its resume token matches, else None."""
+    chat_id = data.get('chat_id')
+    token = data.get('resume_token')
+    user_info = session_user_info.get(chat_id)
+    if not user_info or not token or not secrets.compare_digest(user_info['resume_token'], str(token)):
+        return None
+    return chat_id
+
+@sio.on('resume', namespace='/text')
+async def handle_resume(sid, data):
+    """
+    Re-attach a reconnecting socket to a chat and replay what it missed.
+    
+    Expects `chat_id` and `resume_token` from `chat_started`, plus the
+    `turn_id` and `last_seq` of the last event the client received.
+    """
+    bind_session(sid)
+    data = data if isinstance(data, dict) else {}
+    chat_id = _authorized_chat(data)
+    if chat_id is None:
+        logger.warning(f"Rejected resume from {sid} for chat {data.get('chat_id')}")
+        await emit_to_socket(sid, 'error', {'message': 'Cannot resume this conversation.'})
+        return
+    # Checked before anything is changed, so a bad value can't leave the chat half attached
+    last_seq = data.get('last_seq')
+    if isinstance(last_seq, bool) or not isinstance(last_seq, int):
+        last_seq = -1
+
+    timer = teardown_timers.pop(chat_id, None)
+    if timer:
+        timer.cancel()
+    previous_sid = chat_to_sid.get(chat_id)
+    if previous_sid and previous_sid != sid:
+        sid_to_chat.pop(previous_sid, None)
+    sid_to_chat[sid] = chat_id
+
+    stream = chat_streams.get(chat_id)
+    resumed = {'chat_id': chat_id}
+    sent_seq = -1
+    replayed = 0
+    if stream is not None:
+        # A client that missed the start of this turn gets all of it
+        sent_seq = max(-1, last_seq) if data.get('turn_id') == stream.turn_id else -1
+        missed, gap = stream.since(sent_seq)
+        resumed.update({'turn_id': stream.turn_id, 'turn_complete': stream.complete, 'gap': gap})
+        if gap:
+            # Part of the turn was evicted from the ring; resync from the full text
+            resumed['partial_response'] = stream.text
+            sent_seq = stream.last_seq
+    await emit_to_socket(sid, 'resumed', resumed)
+
+    # Replay until caught up, then attach; there is no await between the last
+    # check and the attach, so no live event can slip in between
+    while stream is not None:
+        missed, _ = stream.since(sent_seq)
+        if not missed:
+            break
+        for seq, event, payload in missed:
+            await emit_to_socket(sid, event, payload)
+            sent_seq = seq
+            replayed += 1
+    chat_to_sid[chat_id] = sid
+    logger.info(f"Socket {sid} resumed chat {chat_id}, replayed {replayed} events")
+
+@sio.on('connect', namespace='/voice')
+async def connect_voice(sid, environ):
+    bind_session(sid)
+    if settings.RATE_LIMIT_ENABLED:
+        result = await rate_limiter.acheck(f"ip:{environ.get('REMOTE_ADDR', 'unknown')}", IP_LIMIT)
+        if not result.allowed:
+            raise socketio.exceptions.ConnectionRefusedError({'message': 'Too many connections', 'retry_after': result.retry_after_header})
+    logger.info(f"Voice Client connected: {sid}")
+
+@sio.on('start_voice', namespace='/voice')
+async def start_voice(sid, data):
+    """
+    Speak the answers of a /text chat on this socket.
+    
+    Expects `chat_id` and `resume_token` from the chat's `chat_started`.
+    Each `response_audio` frame must be acknowledged on receipt, and
+    `pause_audio`/`resume_audio` hold audio back while the client's playback
+    queue is full; see voice_service.
+    """
+    bind_session(sid)
+    chat_id = _authorized_chat(data or {})
+    if chat_id is None:
+        logger.warning(f"Rejected start_voice from {sid}")
+        await sio.emit('error', {'message': 'Cannot attach voice to this conversation.'}, to=sid, namespace='/voice')
+        return
+    tts = voice_service.get_tts_backend()
+    if tts is None:
+        await sio.emit('error', {'message': 'Voice output is not configured.'}, to=sid, namespace='/voice')
+        return
+
+    async def emit(event, payload, callback=None):
+        await sio.emit(event, payload, to=sid, namespace='/voice', callback=callback)
+
+    # One voice per chat: a newer voice socket replaces the previous one
+    previous = voice_streams.pop(chat_id, None)
+    if previous:
+        previous.close()
+    voice_streams[chat_id] = voice_service.create_voice_stream(emit, tts)
+    voice_sid_to_chat[sid] = chat_id
+    await sio.emit('voice_started', {'chat_id': chat_id, 'mime_type': tts.mime_type}, to=sid, namespace='/voice')
+    logger.info(f"Voice socket {sid} attached to chat {chat_id} ({tts.name})")
+
+@sio.on('stop_audio', namespace='/voice')
+async def stop_audio(sid, data=None):
+    """Barge-in: stop speaking the current answer (the text turn goes on)."""
+    voice = voice_streams.get(voice_sid_to_chat.get(sid))
+    if voice:
+        voice.interrupt()
+
+@sio.on('pause_audio', namespace='/voice')
+async def pause_audio(sid, data=None):
+    """The client's playback queue is full: hold further audio until `resume_audio`."""
+    voice = voice_streams.get(voice_sid_to_chat.get(sid))
+    if voice:
+        voice.pause()
+
+@sio.on('resume_audio', namespace='/voice')
+async def resume_audio(sid, data=None):
+    voice = voice_streams.get(voice_sid_to_chat.get(sid))
+    if voice:
+        voice.resume()
+
+@sio.on('disconnect', namespace='/voice')
+def disconnect_voice(sid):
+    bind_session(sid)
+    chat_id = voice_sid_to_chat.pop(sid, None)
+    voice = voice_streams.get(chat_id)
+    # Only if this socket is still the chat's voice
+    if voice is not None and chat_id not in voice_sid_to_chat.values():
+        voice_streams.pop(chat_id).close()
+    logger.info(f"Voice Client disconnected: {sid}")
+
 async def send_fallback_response(sid, user_input, response_text):
     """Send a fallback response when the ADK service fails to respond"""
     logger.warning(f"Sending fallback response to {sid}: '{response_text}'")
     
     # Stream the response to the client
-    await sio.emit('token', {'token': response_text}, to=sid, namespace='/text')
-    await sio.emit('stream_end', {'turn_complete': True}, to=sid, namespace='/text')
+    await emit_to_chat(sid, 'token', {'token': response_text})
+    await emit_to_chat(sid, 'stream_end', {'turn_complete': True})
     
     # Save the fallback response to the database
     if sid in session_user_info:
@@ -655,15 +951,43 @@ async def send_fallback_response(sid, user_input, response_text):
         finally:
             db.close()
 
+async def cleanup_adk_sessions(idle_seconds: float = 600) -> int:
+    """
+    Delete in-memory ADK sessions no live chat uses. teardown_chat drops the
+    runner but not the session, so without this they accumulate.
+    """
+    if _session_service is None:
+        return 0
+    live = {
+        (data['session'].app_name, data['session'].user_id, data['session'].id)
+        for data in adk_runners.values()
+    }
+    cutoff = time.time() - idle_seconds
+    removed = 0
+    for app_name, users in list(_session_service.sessions.items()):
+        for user_id, sessions in list(users.items()):
+            for session_id, session in list(sessions.items()):
+                if (app_name, user_id, session_id) in live or session.last_update_time > cutoff:
+                    continue
+                await _session_service.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+                removed += 1
+    return removed
+
 # Health check endpoint for ADK service
 async def health_check():
     """Health check for ADK service."""
     return {
         "status": "healthy",
         "service": "adk_agent_service",
-        "session_service": "available" if session_service else "unavailable",
+        "session_service": "available" if _session_service else "not_loaded",
         "active_sessions": len(adk_runners)
     }
 
+# The binary server shares every /text handler with the JSON server
+if binary_sio is not None:
+    for event, handler in sio.handlers.get('/text', {}).items():
+        binary_sio.on(event, handler, namespace='/text')
+
 # Export the socket.IO app for use in main.py
 adk_sio = sio
+adk_binary_sio = binary_sio
@@ -0,0 +1,200 @@
+"""
+Composite agents: parallel sub-agent fan-out merged by a synthesizer.
+
+An agent whose config lists `sub_agents` is built as
+
+    SequentialAgent  agent_<id>
+      ParallelAgent  agent_<id>_branches
+        BranchGuard  <branch name>            (per-branch timeout)
+          Agent      <branch name>_specialist (its own prompt and tools)
+      Agent          agent_<id>_synthesizer   (the agent's own prompt and tools)
+
+The branches run concurrently, each in its own ADK branch so they don't
+see each other's events, and a turn takes as long as the slowest branch
+plus the synthesis rather than the sum. Each branch leaves its answer in
+session state under `branch_<name>`; they are handed to the synthesizer as
+a message after the user's, so its instruction stays the same every turn
+(and cacheable). A branch that runs past its timeout or fails is cut off and
+recorded as such, so one slow specialist can't hold up the answer.
+
+This module imports google.adk, so import it where the agents are built.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+
+from google.adk.agents import Agent, BaseAgent, InvocationContext, ParallelAgent, SequentialAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.events import Event, EventActions
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from app.core.adk_config import adk_config
+from app.services import tool_events
+
+logger = logging.getLogger(__name__)
+
+TIMED_OUT = "timed_out"
+FAILED = "failed"
+
+
+def state_key(branch_name: str) -> str:
+    return f"branch_{branch_name}"
+
+
+class BranchGuard(BaseAgent):
+    """Runs its single sub-agent with a deadline; a late or failing branch ends with a note instead."""
+
+    timeout_seconds: float
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        queue: asyncio.Queue = asyncio.Queue()
+        resume = asyncio.Event()
+
+        async def run_branch():
+            # The branch runs start to finish in this one task: its tracing
+            # spans are bound to the task that opened them
+            async for event in self.sub_agents[0].run_async(ctx):
+                resume.clear()
+                await queue.put(event)
+                # Like ParallelAgent, step on only after the runner took the event
+                await resume.wait()
+            await queue.put(None)
+
+        branch = asyncio.create_task(run_branch())
+        deadline = time.monotonic() + self.timeout_seconds
+        outcome = None
+        try:
+            while True:
+                get = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    {get, branch}, timeout=max(0.0, deadline - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if get not in done:
+                    get.cancel()
+                    if branch not in done:
+                        raise asyncio.TimeoutError
+                    branch.result()  # raises the branch's error
+                    break
+                event = get.result()
+                if event is None:
+                    break
+                yield event
+                resume.set()
+        except asyncio.TimeoutError:
+            outcome = TIMED_OUT
+            logger.warning(f"Branch {self.name} timed out after {self.timeout_seconds}s")
+        except Exception as e:
+            outcome = FAILED
+            logger.error(f"Branch {self.name} failed: {e}")
+        finally:
+            branch.cancel()
+            await asyncio.gather(branch, return_exceptions=True)
+
+        if outcome is not None:
+            note = "(no answer: timed out)" if outcome == TIMED_OUT else "(no answer: failed)"
+            # Overwrite the answer of an earlier turn so the synthesizer doesn't reuse it
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={state_key(self.name): note}),
+                custom_metadata={"branch_status": outcome},
+            )
+
+
+def _synthesizer_instruction(system_prompt: str) -> str:
+    # Static, so the prefix can be served from the context cache; the
+    # per-turn findings go into the request contents (see _add_findings)
+    return (
+        f"{system_prompt}\n\n"
+        "Specialist agents worked on the user's latest message in parallel. "
+        "Their findings follow that message; merge them into one answer."
+    )
+
+
+def _add_findings(branch_names: List[str]) -> Callable[[CallbackContext, LlmRequest], None]:
+    def before_model(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+        findings = "\n\n".join(
+            f"### {name}\n{callback_context.state.get(state_key(name), '(no answer)')}" for name in branch_names
+        )
+        content = types.Content(role="user", parts=[types.Part(text=f"Specialist findings:\n\n{findings}")])
+        # After the user's message (and the branch replies ADK passes on "for
+        # context"), before any of the synthesizer's own tool calls
+        contents = llm_request.contents
+        latest = max(
+            (i for i, c in enumerate(contents) if c.role == "user" and any(part.text for part in c.parts or [])),
+            default=len(contents) - 1,
+        )
+        contents.insert(latest + 1, content)
+        return None
+    return before_model
+
+
+def build_composite_agent(
+    agent_id: str,
+    user_id: str,
+    system_prompt: str,
+    tools: List[Any],
+    sub_agents: List[Dict[str, Any]],
+    model: Any,
+    resolve_tools: Callable[[List[str]], List[Any]],
+) -> SequentialAgent:
+    """
+    Build the fan-out tree for an agent config with `sub_agents`.
+
+    `tools` are the synthesizer's (already resolved) tools; `resolve_tools`
+    turns a branch's tool names into ADK tools.
+    """
+    branches = []
+    for spec in sub_agents[:adk_config.MAX_SUB_AGENTS]:
+        specialist = Agent(
+            name=f"{spec['name']}_specialist",
+            model=model,
+            description=f"Specialist '{spec['name']}' of agent {agent_id}",
+            instruction=spec.get("instructions", ""),
+            tools=resolve_tools(spec.get("tools") or []),
+            output_key=state_key(spec["name"]),
+            **tool_events.agent_callbacks(),
+        )
+        branches.append(BranchGuard(
+            name=spec["name"],
+            sub_agents=[specialist],
+            timeout_seconds=spec.get("timeout_seconds") or adk_config.BRANCH_TIMEOUT,
+        ))
+
+    synthesizer = Agent(
+        name=f"agent_{agent_id}_synthesizer",
+        model=model,
+        description=f"Synthesizer of agent {agent_id} for user {user_id}",
+        instruction=_synthesizer_instruction(system_prompt),
+        before_model_callback=_add_findings([branch.name for branch in branches]),
+        tools=tools,
+        **tool_events.agent_callbacks(),
+    )
+    return SequentialAgent(
+        name=f"agent_{agent_id}",
+        description=f"AI Agent for user {user_id}",
+        sub_agents=[ParallelAgent(name=f"agent_{agent_id}_branches", sub_agents=branches), synthesizer],
+    )
+
+
+def branch_names(agent: BaseAgent) -> List[str]:
+    """Names of the parallel branches of a composite agent (empty for plain agents)."""
+    return [guard.name for sub in agent.sub_agents if isinstance(sub, ParallelAgent) for guard in sub.sub_agents]
+
+
+def branch_timeout(agent: BaseAgent) -> float:
+    """Longest branch timeout of a composite agent, 0 for plain agents."""
+    return max(
+        (guard.timeout_seconds for sub in agent.sub_agents if isinstance(sub, ParallelAgent) for guard in sub.sub_agents),
+        default=0,
+    )
+
+
+def branch_of(event: Event) -> Optional[str]:
+    """Name of the parallel branch an event came from, None for the main agent."""
+    # ParallelAgent sets branch to "<parent branch>.<parallel agent>.<guard>"
+    return event.branch.rsplit(".", 1)[-1] if event.branch else None
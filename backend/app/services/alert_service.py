@@ -1,6 +1,25 @@
 import json
+import logging
 
-import sentry_sdk
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def init_sentry():
+    """Initialize Sentry when SENTRY_DSN is configured (called from app startup)."""
+    if not settings.SENTRY_DSN:
+        return
+    import sentry_sdk
+    sentry_sdk.init(dsn=settings.SENTRY_DSN)
+    logger.info("Sentry error reporting enabled")
+
+
+def capture_exception(error: BaseException):
+    """Report an exception to Sentry; a no-op until init_sentry() has run."""
+    if settings.SENTRY_DSN:
+        import sentry_sdk
+        sentry_sdk.capture_exception(error)
 
 
 def send_alert(level: str, message: str, details: dict = None):
@@ -16,6 +35,9 @@ def send_alert(level: str, message: str, details: dict = None):
     # The [ALERT] prefix makes it easy to find and filter in logs
     print(f"[ALERT] {json.dumps(alert_payload)}")
     # --- SEND TO SENTRY ---
+    if not settings.SENTRY_DSN:
+        return
+    import sentry_sdk
     with sentry_sdk.push_scope() as scope:
         scope.set_level(level)
         for key, value in (details or {}).items():
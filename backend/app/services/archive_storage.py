@@ -0,0 +1,72 @@
+"""
+Object-style storage for archived data.
+
+Objects are addressed by slash-separated keys. The local backend maps keys
+to files under ARCHIVE_DIR; the S3 backend (requires boto3) stores them in
+ARCHIVE_S3_BUCKET.
+"""
+
+import os
+import tempfile
+
+from app.core.config import settings
+
+
+class LocalArchiveStorage:
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid archive key: {key}")
+        return path
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial object
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3ArchiveStorage:
+    def __init__(self, bucket: str):
+        import boto3  # optional dependency, only needed for this backend
+
+        self.bucket = bucket
+        self._client = boto3.client("s3")
+
+    def put(self, key: str, data: bytes):
+        self._client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def get(self, key: str) -> bytes:
+        return self._client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def delete(self, key: str):
+        self._client.delete_object(Bucket=self.bucket, Key=key)
+
+
+_storage = None
+
+
+def get_archive_storage():
+    global _storage
+    if _storage is None:
+        if settings.ARCHIVE_BACKEND == "s3":
+            _storage = S3ArchiveStorage(settings.ARCHIVE_S3_BUCKET)
+        else:
+            _storage = LocalArchiveStorage(settings.ARCHIVE_DIR)
+    return _storage
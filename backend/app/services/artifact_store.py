@@ -0,0 +1,312 @@
+"""
+Disk-backed, content-addressed ADK artifact service.
+
+Blobs live under ARTIFACT_DIR/blobs/<aa>/<sha256>: the same bytes are
+written once however many artifacts, sessions or users save them. An
+SQLite index next to the blobs maps (app, user, session, filename, version)
+to a digest. Reads memory-map the blob, so `read_range` only touches the
+pages it returns.
+
+- Each user's artifacts are capped at ARTIFACT_USER_QUOTA_BYTES (logical
+  size, duplicates included). Saving past it drops that user's least
+  recently used artifacts; a single artifact above the quota is refused.
+- Blobs on disk are capped at ARTIFACT_MAX_BYTES. Past it the least recently
+  used blobs, and the artifact versions pointing at them, are evicted down
+  to 90% of the cap.
+- Filenames starting with "user:" are shared by all sessions of a user, as
+  in ADK's own artifact services.
+
+The index is local to the directory, so run one store per volume; processes
+sharing the volume share the store.
+"""
+
+import asyncio
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from google.adk.artifacts.base_artifact_service import BaseArtifactService
+from google.genai import types
+
+from app.core.metrics import ARTIFACT_EVICTIONS, ARTIFACT_SAVES
+
+USER_SCOPE = "user"
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    mime_type TEXT,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, scope, filename, version)
+);
+CREATE INDEX IF NOT EXISTS ix_artifacts_digest ON artifacts (digest);
+CREATE INDEX IF NOT EXISTS ix_artifacts_user_access ON artifacts (user_id, last_access);
+CREATE INDEX IF NOT EXISTS ix_blobs_access ON blobs (last_access);
+"""
+
+
+class ArtifactQuotaExceeded(ValueError):
+    """An artifact is larger than the per-user quota."""
+
+
+def _encode(artifact: types.Part) -> Tuple[str, Optional[str], bytes]:
+    if artifact.inline_data is not None:
+        return "inline", artifact.inline_data.mime_type, artifact.inline_data.data or b""
+    if artifact.text is not None:
+        return "text", "text/plain", artifact.text.encode("utf-8")
+    raise ValueError("Only inline data and text parts can be stored as artifacts")
+
+
+def _decode(kind: str, mime_type: Optional[str], data: bytes) -> types.Part:
+    if kind == "text":
+        return types.Part(text=data.decode("utf-8"))
+    return types.Part(inline_data=types.Blob(mime_type=mime_type, data=data))
+
+
+class DiskArtifactService(BaseArtifactService):
+    def __init__(self, root: str, max_bytes: int, user_quota_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.user_quota_bytes = user_quota_bytes
+        self._index_path = os.path.join(root, "index.sqlite3")
+        self._write_lock = threading.Lock()  # SQLite serializes processes, this the threads
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    # --- storage helpers (blocking; called in worker threads) ---
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self._index_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _write(self):
+        """A write transaction that holds the store's lock across processes."""
+        with self._write_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    @staticmethod
+    def _scope(session_id: str, filename: str) -> str:
+        return USER_SCOPE if filename.startswith("user:") else session_id
+
+    def _write_blob(self, digest: str, data: bytes) -> bool:
+        """Write the blob unless it exists; False if it was already stored."""
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return True
+
+    def _delete_orphans(self, conn) -> None:
+        orphans = [row[0] for row in conn.execute(
+            "SELECT digest FROM blobs WHERE digest NOT IN (SELECT digest FROM artifacts)"
+        )]
+        for digest in orphans:
+            conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            try:
+                os.unlink(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _enforce_user_quota(self, conn, user_id: str, keep: tuple) -> None:
+        used = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts WHERE user_id = ?", (user_id,)).fetchone()[0]
+        if used <= self.user_quota_bytes:
+            return
+        rows = conn.execute(
+            "SELECT app_name, scope, filename, version, size FROM artifacts WHERE user_id = ? ORDER BY last_access",
+            (user_id,),
+        ).fetchall()
+        for app_name, scope, filename, version, size in rows:
+            if used <= self.user_quota_bytes:
+                break
+            if (app_name, scope, filename, version) == keep:
+                continue
+            conn.execute(
+                "DELETE FROM artifacts WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ? AND version = ?",
+                (app_name, user_id, scope, filename, version),
+            )
+            used -= size
+            ARTIFACT_EVICTIONS.labels(reason="user_quota").inc()
+
+    def _enforce_capacity(self, conn, keep_digest: str) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for digest, size in conn.execute("SELECT digest, size FROM blobs ORDER BY last_access").fetchall():
+            if total <= target:
+                break
+            if digest == keep_digest:
+                continue
+            conn.execute("DELETE FROM artifacts WHERE digest = ?", (digest,))
+            total -= size
+            ARTIFACT_EVICTIONS.labels(reason="capacity").inc()
+
+    def _save(self, app_name: str, user_id: str, session_id: str, filename: str, artifact: types.Part) -> int:
+        kind, mime_type, data = _encode(artifact)
+        if len(data) > self.user_quota_bytes:
+            raise ArtifactQuotaExceeded(f"Artifact of {len(data)} bytes exceeds the per-user quota of {self.user_quota_bytes} bytes")
+        digest = hashlib.sha256(data).hexdigest()
+        scope = self._scope(session_id, filename)
+        now = time.time()
+        with self._write() as conn:
+            # Written under the lock so eviction can't remove the blob in between
+            created = self._write_blob(digest, data)
+            ARTIFACT_SAVES.labels(result="stored" if created else "deduplicated").inc()
+            conn.execute(
+                "INSERT INTO blobs (digest, size, last_access) VALUES (?, ?, ?) "
+                "ON CONFLICT (digest) DO UPDATE SET last_access = excluded.last_access",
+                (digest, len(data), now),
+            )
+            version = conn.execute(
+                "SELECT COALESCE(MAX(version) + 1, 0) FROM artifacts "
+                "WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ?",
+                (app_name, user_id, scope, filename),
+            ).fetchone()[0]
+            conn.execute(
+                "INSERT INTO artifacts (app_name, user_id, scope, filename, version, digest, kind, mime_type, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (app_name, user_id, scope, filename, version, digest, kind, mime_type, len(data), now),
+            )
+            self._enforce_user_quota(conn, user_id, keep=(app_name, scope, filename, version))
+            self._enforce_capacity(conn, keep_digest=digest)
+            self._delete_orphans(conn)
+        return version
+
+    def _locate(self, app_name: str, user_id: str, session_id: str, filename: str, version: Optional[int]):
+        """(digest, kind, mime_type, size, version) of an artifact version, marking it used."""
+        scope = self._scope(session_id, filename)
+        key = (app_name, user_id, scope, filename)
+        with self._connect() as conn:
+            if version is None:
+                row = conn.execute(
+                    "SELECT digest, kind, mime_type, size, version FROM artifacts "
+                    "WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ? ORDER BY version DESC LIMIT 1",
+                    key,
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT digest, kind, mime_type, size, version FROM artifacts "
+                    "WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ? AND version = ?",
+                    key + (version,),
+                ).fetchone()
+            if row is not None:
+                now = time.time()
+                conn.execute(
+                    "UPDATE artifacts SET last_access = ? WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ? AND version = ?",
+                    (now,) + key + (row[4],),
+                )
+                conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (now, row[0]))
+        return row
+
+    def _read(self, digest: str, offset: int = 0, length: Optional[int] = None) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(digest), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    end = len(mapped) if length is None else min(len(mapped), offset + length)
+                    return mapped[offset:end]
+        except FileNotFoundError:
+            return None  # evicted since it was located
+
+    def _load(self, app_name, user_id, session_id, filename, version) -> Optional[types.Part]:
+        row = self._locate(app_name, user_id, session_id, filename, version)
+        if row is None:
+            return None
+        digest, kind, mime_type, _, _ = row
+        data = self._read(digest)
+        return _decode(kind, mime_type, data) if data is not None else None
+
+    def _read_range(self, app_name, user_id, session_id, filename, version, offset, length):
+        row = self._locate(app_name, user_id, session_id, filename, version)
+        if row is None:
+            return None
+        digest, _, _, size, version = row
+        data = self._read(digest, offset, length)
+        return (data, size, version) if data is not None else None
+
+    def _keys(self, app_name: str, user_id: str, session_id: str) -> List[str]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT DISTINCT filename FROM artifacts WHERE app_name = ? AND user_id = ? AND scope IN (?, ?) ORDER BY filename",
+                (app_name, user_id, session_id, USER_SCOPE),
+            )]
+
+    def _versions(self, app_name, user_id, session_id, filename) -> List[int]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT version FROM artifacts WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ? ORDER BY version",
+                (app_name, user_id, self._scope(session_id, filename), filename),
+            )]
+
+    def _delete(self, app_name, user_id, session_id, filename) -> None:
+        with self._write() as conn:
+            conn.execute(
+                "DELETE FROM artifacts WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ?",
+                (app_name, user_id, self._scope(session_id, filename), filename),
+            )
+            self._delete_orphans(conn)
+
+    # --- BaseArtifactService ---
+
+    async def save_artifact(self, *, app_name: str, user_id: str, session_id: str, filename: str, artifact: types.Part) -> int:
+        return await asyncio.to_thread(self._save, app_name, user_id, session_id, filename, artifact)
+
+    async def load_artifact(
+        self, *, app_name: str, user_id: str, session_id: str, filename: str, version: Optional[int] = None
+    ) -> Optional[types.Part]:
+        return await asyncio.to_thread(self._load, app_name, user_id, session_id, filename, version)
+
+    async def list_artifact_keys(self, *, app_name: str, user_id: str, session_id: str) -> List[str]:
+        return await asyncio.to_thread(self._keys, app_name, user_id, session_id)
+
+    async def delete_artifact(self, *, app_name: str, user_id: str, session_id: str, filename: str) -> None:
+        await asyncio.to_thread(self._delete, app_name, user_id, session_id, filename)
+
+    async def list_versions(self, *, app_name: str, user_id: str, session_id: str, filename: str) -> List[int]:
+        return await asyncio.to_thread(self._versions, app_name, user_id, session_id, filename)
+
+    # --- extras ---
+
+    async def read_range(
+        self, *, app_name: str, user_id: str, session_id: str, filename: str,
+        offset: int, length: int, version: Optional[int] = None,
+    ) -> Optional[Tuple[bytes, int, int]]:
+        """(bytes, total size, version) of a slice of an artifact, without loading the rest."""
+        return await asyncio.to_thread(self._read_range, app_name, user_id, session_id, filename, version, offset, length)
@@ -0,0 +1,128 @@
+"""
+Per-session message mailbox for the chat socket.
+
+Messages from one socket session are delivered to the agent in order, one
+turn at a time. What happens to messages that arrive while a turn is running
+depends on the policy:
+
+- ``queue``:     each message becomes its own turn, in arrival order.
+- ``coalesce``:  everything that queued up while the agent was busy is merged
+                 into a single turn (one user row, one LLM call).
+- ``supersede``: the running turn is cancelled and only the newest message is
+                 answered (the old cancel-on-new-message behaviour).
+
+The mailbox is bounded; when it is full the message is rejected and the
+client is told via a ``status`` event so it can back off.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+POLICY_QUEUE = "queue"
+POLICY_COALESCE = "coalesce"
+POLICY_SUPERSEDE = "supersede"
+POLICIES = (POLICY_QUEUE, POLICY_COALESCE, POLICY_SUPERSEDE)
+
+# run_turn(sid, text, message_count) runs one complete agent turn
+TurnRunner = Callable[[str, str, int], Awaitable[None]]
+# notify(sid, payload) sends a status event to the client
+Notifier = Callable[[str, Dict[str, Any]], Awaitable[None]]
+# cancel_current(sid, reason) cancels the running turn, if any
+TurnCanceller = Callable[[str, str], Awaitable[Any]]
+
+
+class SessionMailbox:
+    """Ordered, bounded inbox for one chat session."""
+
+    def __init__(
+        self,
+        sid: str,
+        run_turn: TurnRunner,
+        notify: Notifier,
+        cancel_current: TurnCanceller,
+        policy: str = POLICY_COALESCE,
+        max_depth: int = 5,
+        coalesce_window: float = 0.0,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown mailbox policy: {policy}")
+        self.sid = sid
+        self.policy = policy
+        self.max_depth = max_depth
+        self.coalesce_window = coalesce_window
+        self._run_turn = run_turn
+        self._notify = notify
+        self._cancel_current = cancel_current
+        self._pending: Deque[str] = deque()
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    @property
+    def busy(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def submit(self, message: str) -> bool:
+        """Queue a message; returns False if it was rejected because the mailbox is full."""
+        if self.policy == POLICY_SUPERSEDE:
+            self._pending.clear()
+            self._pending.append(message)
+            if self.busy:
+                await self._cancel_current(self.sid, "superseded")
+        else:
+            if len(self._pending) >= self.max_depth:
+                logger.warning(f"Mailbox full for {self.sid} ({self.max_depth} pending), rejecting message")
+                await self._notify(self.sid, {
+                    "status": "Too many pending messages, please wait for the current answer.",
+                    "code": "mailbox_full",
+                    "accepted": False,
+                    "queue_depth": len(self._pending),
+                    "max_depth": self.max_depth,
+                })
+                return False
+            self._pending.append(message)
+            if self.busy:
+                await self._notify(self.sid, {
+                    "status": "Message queued",
+                    "code": "queued",
+                    "accepted": True,
+                    "queue_depth": len(self._pending),
+                    "max_depth": self.max_depth,
+                })
+
+        if not self.busy:
+            self._worker = asyncio.create_task(self._drain())
+        return True
+
+    def _next_turn(self):
+        if self.policy == POLICY_COALESCE:
+            messages = list(self._pending)
+            self._pending.clear()
+            return "\n\n".join(messages), len(messages)
+        return self._pending.popleft(), 1
+
+    async def _drain(self):
+        while self._pending:
+            if self.policy == POLICY_COALESCE and self.coalesce_window > 0:
+                # Give a burst a moment to finish before starting the turn
+                await asyncio.sleep(self.coalesce_window)
+            text, count = self._next_turn()
+            if count > 1:
+                logger.info(f"Coalesced {count} messages into one turn for {self.sid}")
+            try:
+                await self._run_turn(self.sid, text, count)
+            except Exception as e:
+                logger.error(f"Mailbox turn failed for {self.sid}: {e}")
+
+    def close(self):
+        """Drop pending messages and stop the worker (the running turn is cancelled separately)."""
+        self._pending.clear()
+        if self.busy:
+            self._worker.cancel()
+        self._worker = None
@@ -0,0 +1,264 @@
+"""
+Provider-side context caching of long prompt prefixes.
+
+Agents with long system prompts and tool schemas re-send the same prefix on
+every model call. When that prefix (system instruction + tool declarations)
+is estimated at CONTEXT_CACHE_MIN_TOKENS or more, `cached_generate` stores it
+once as provider cached content, keyed by a hash of (model, system
+instruction, tools), and sends later calls with a reference to it instead.
+
+- Entries are shared by every session of the process; workers find each
+  other's entries by display name before creating one.
+- An entry whose TTL ends within CONTEXT_CACHE_REFRESH_MARGIN is extended
+  before use; one that is gone is recreated.
+- If the model or prefix can't be cached, or the cache call fails, the
+  request goes out unchanged and the key is not retried for
+  CONTEXT_CACHE_FAILURE_COOLDOWN seconds.
+
+Hits and cached input tokens are counted in the adk_context_cache_* metrics and
+per agent in `agent_stats()` (the agent is set per turn via `current_agent`).
+The provider is pluggable: CONTEXT_CACHE_BACKEND=genai uses the model's
+google.genai client, "none" disables caching.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Callable, Dict, Optional, Protocol, Tuple
+
+from app.core.adk_config import adk_config
+from app.core.metrics import CONTEXT_CACHE_REQUESTS, CONTEXT_CACHE_TOKENS
+from app.services.llm_governor import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Set per chat turn so hits are attributed to the platform agent
+current_agent: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("context_cache_agent", default=None)
+
+
+@dataclass
+class CacheEntry:
+    name: str  # provider resource name, e.g. "cachedContents/abc123"
+    expires_at: float  # unix time
+
+
+class CacheProvider(Protocol):
+    async def find(self, model: str, key: str) -> Optional[CacheEntry]: ...
+    async def create(self, model: str, key: str, system_instruction: Any, tools: Any, tool_config: Any, ttl_seconds: int) -> CacheEntry: ...
+    async def refresh(self, name: str, ttl_seconds: int) -> CacheEntry: ...
+
+
+class GenaiCacheProvider:
+    """Cached contents of the Gemini API / Vertex AI through a google.genai client."""
+
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def _entry(cached) -> CacheEntry:
+        return CacheEntry(cached.name, cached.expire_time.timestamp())
+
+    async def find(self, model: str, key: str) -> Optional[CacheEntry]:
+        pager = await self.client.aio.caches.list()
+        async for cached in pager:
+            if cached.display_name == key and cached.model and cached.model.endswith(model) and cached.expire_time:
+                return self._entry(cached)
+        return None
+
+    async def create(self, model, key, system_instruction, tools, tool_config, ttl_seconds) -> CacheEntry:
+        from google.genai import types
+        cached = await self.client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                display_name=key,
+                system_instruction=system_instruction,
+                tools=tools,
+                tool_config=tool_config,
+                ttl=f"{ttl_seconds}s",
+            ),
+        )
+        return self._entry(cached)
+
+    async def refresh(self, name: str, ttl_seconds: int) -> CacheEntry:
+        from google.genai import types
+        cached = await self.client.aio.caches.update(name=name, config=types.UpdateCachedContentConfig(ttl=f"{ttl_seconds}s"))
+        return self._entry(cached)
+
+
+def _plain(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def cache_key(model: str, system_instruction: Any, tools: Any) -> str:
+    payload = json.dumps([model, _plain(system_instruction), _plain(tools)], sort_keys=True, default=str)
+    return "adk-" + hashlib.sha256(payload.encode()).hexdigest()[:40]
+
+
+def _prefix_tokens(system_instruction: Any, tools: Any) -> int:
+    text = system_instruction if isinstance(system_instruction, str) else json.dumps(_plain(system_instruction), default=str)
+    if tools:
+        text += json.dumps(_plain(tools), default=str)
+    return estimate_tokens(text)
+
+
+class ContextCache:
+    def __init__(self, provider: CacheProvider, ttl_seconds: int, refresh_margin: float, min_tokens: int, failure_cooldown: float):
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self.min_tokens = min_tokens
+        self.failure_cooldown = failure_cooldown
+        self._entries: Dict[str, CacheEntry] = {}
+        self._failed_until: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0, "cached_tokens": 0})
+
+    def _record(self, result: str, agent: Optional[str]):
+        CONTEXT_CACHE_REQUESTS.labels(result=result).inc()
+        if agent is not None:
+            self._stats[agent]["hits" if result == "hit" else "misses"] += 1
+
+    def record_usage(self, usage: Any, agent: Optional[str]):
+        cached = getattr(usage, "cached_content_token_count", None) if usage is not None else None
+        if cached:
+            CONTEXT_CACHE_TOKENS.inc(cached)
+            if agent is not None:
+                self._stats[agent]["cached_tokens"] += cached
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    async def resolve(self, model: str, config: Any) -> Optional[Tuple[str, CacheEntry]]:
+        """Key and entry caching this request's prefix, created or refreshed as needed; None to send as is."""
+        if config is None or not config.system_instruction or config.cached_content:
+            return None
+        if _prefix_tokens(config.system_instruction, config.tools) < self.min_tokens:
+            return None
+        key = cache_key(model, config.system_instruction, config.tools)
+        agent = current_agent.get()
+        if self._failed_until.get(key, 0) > time.time():
+            self._record("skipped", agent)
+            return None
+
+        async with self._locks[key]:  # one create/refresh per prefix at a time
+            entry = self._entries.get(key)
+            now = time.time()
+            try:
+                if entry is not None and entry.expires_at - now > self.refresh_margin:
+                    self._record("hit", agent)
+                    return key, entry
+                if entry is not None and entry.expires_at > now:
+                    entry = await self.provider.refresh(entry.name, self.ttl_seconds)
+                    self._entries[key] = entry
+                    self._record("hit", agent)
+                    return key, entry
+                entry = await self.provider.find(model, key)
+                if entry is not None and entry.expires_at - now > self.refresh_margin:
+                    self._entries[key] = entry
+                    self._record("hit", agent)
+                    return key, entry
+                entry = await self.provider.create(
+                    model, key, config.system_instruction, config.tools, config.tool_config, self.ttl_seconds
+                )
+                self._entries[key] = entry
+                self._record("created", agent)
+                return key, entry
+            except Exception as e:
+                # Unsupported model, prefix below the provider minimum, quota, ...
+                self._entries.pop(key, None)
+                self._failed_until[key] = now + self.failure_cooldown
+                self._record("error", agent)
+                logger.warning(f"Context cache unavailable for {model} ({key}), sending uncached: {e}")
+                return None
+
+    @staticmethod
+    def apply(llm_request: Any, entry: CacheEntry):
+        """Point the request at the cached prefix instead of sending it."""
+        llm_request.config = llm_request.config.model_copy(update={
+            "cached_content": entry.name,
+            "system_instruction": None,
+            "tools": None,
+            "tool_config": None,
+        })
+
+    def agent_stats(self) -> Dict[str, Dict[str, int]]:
+        return {agent: dict(stats) for agent, stats in self._stats.items()}
+
+
+def _is_missing_cache_error(error: BaseException) -> bool:
+    # google.genai's ClientError for a request referencing cached content that
+    # was deleted or expired (404) or can no longer be read (403)
+    return getattr(error, "code", None) in (403, 404)
+
+
+async def cached_generate(cache: Optional[ContextCache], model: str, generate: Callable, llm_request, stream: bool) -> AsyncGenerator:
+    """Run `generate` with the request's prefix served from the context cache when possible."""
+    resolved = await cache.resolve(model, llm_request.config) if cache is not None else None
+    if resolved is None:
+        async for response in generate(llm_request, stream):
+            yield response
+        return
+
+    key, entry = resolved
+    original_config = llm_request.config
+    cache.apply(llm_request, entry)
+    agent = current_agent.get()
+    yielded = False
+    try:
+        async for response in generate(llm_request, stream):
+            cache.record_usage(getattr(response, "usage_metadata", None), agent)
+            yielded = True
+            yield response
+    except Exception as e:
+        # Deleted or expired behind our back: forget it and send this call uncached
+        if yielded or not _is_missing_cache_error(e):
+            raise
+        logger.warning(f"Cached content {key} is gone, sending uncached: {e}")
+        cache.invalidate(key)
+    else:
+        return
+    finally:
+        # The governor retries throttled calls with this same request; it must
+        # go out whole again, not with a reference that may be gone by then
+        llm_request.config = original_config
+    async for response in generate(llm_request, stream):
+        yield response
+
+
+_cache: Optional[ContextCache] = None
+_configured = False
+
+
+def configure(provider: Optional[CacheProvider]) -> Optional[ContextCache]:
+    """Install the process-wide cache backed by `provider` (None disables caching)."""
+    global _cache, _configured
+    _cache = ContextCache(
+        provider,
+        ttl_seconds=adk_config.CONTEXT_CACHE_TTL,
+        refresh_margin=adk_config.CONTEXT_CACHE_REFRESH_MARGIN,
+        min_tokens=adk_config.CONTEXT_CACHE_MIN_TOKENS,
+        failure_cooldown=adk_config.CONTEXT_CACHE_FAILURE_COOLDOWN,
+    ) if provider is not None else None
+    _configured = True
+    return _cache
+
+
+def get_context_cache(model: Any) -> Optional[ContextCache]:
+    """The process-wide cache, set up from CONTEXT_CACHE_BACKEND with the model's client on first use."""
+    if not _configured:
+        configure(GenaiCacheProvider(model.api_client) if adk_config.CONTEXT_CACHE_BACKEND == "genai" else None)
+    return _cache
+
+
+def agent_stats() -> Dict[str, Dict[str, int]]:
+    """Hits, misses and cached input tokens per agent since the process started."""
+    return _cache.agent_stats() if _cache is not None else {}
@@ -0,0 +1,137 @@
+"""
+Read-through cache for near-static entities (users by email, agents by id,
+the public tool list).
+
+Entries are column snapshots (plain dicts), never ORM instances, so they can
+be shared across sessions and stored in Redis. `attach` turns a snapshot back
+into a persistent instance of the caller's session without a SELECT, so the
+result can still be modified and committed as usual.
+
+The first tier is a per-process LRU; with ENTITY_CACHE_BACKEND=redis a
+shared Redis tier sits behind it. Writers call `invalidate` after committing.
+Other workers' first tier is only bounded by ENTITY_CACHE_LOCAL_TTL, so keep
+it short when running several workers.
+"""
+
+import copy
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+import redis
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.core.metrics import ENTITY_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def _copy_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    # JSON columns hold dicts and lists: copied, so that changing a loaded
+    # instance can't change the cached snapshot (or the other way round)
+    return {key: copy.deepcopy(value) if isinstance(value, (dict, list)) else value for key, value in values.items()}
+
+
+def snapshot(instance) -> Dict[str, Any]:
+    """Column values of an ORM instance."""
+    return _copy_values({attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs})
+
+
+def attach(db: Session, model, values: Dict[str, Any]):
+    """Rebuild an instance from a snapshot and add it to `db` as if it had been loaded."""
+    instance = model(**_copy_values(values))
+    make_transient_to_detached(instance)
+    return db.merge(instance, load=False)
+
+
+class EntityCache:
+    def __init__(self, name: str, max_entries: int, local_ttl: float, ttl: float, redis_client=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self._redis = redis_client
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _redis_key(self, key: Hashable) -> str:
+        return f"entity:{self.name}:{key}"
+
+    def get(self, key: Hashable) -> Any:
+        """Cached value, or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    ENTITY_CACHE_REQUESTS.labels(cache=self.name, result="hit_local").inc()
+                    return value
+                del self._entries[key]
+
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(self._redis_key(key))
+            except redis.RedisError as e:
+                logger.warning(f"Entity cache {self.name}: Redis unavailable ({e})")
+                raw = None
+            if raw is not None:
+                value = pickle.loads(raw)
+                self._set_local(key, value)
+                ENTITY_CACHE_REQUESTS.labels(cache=self.name, result="hit_redis").inc()
+                return value
+
+        ENTITY_CACHE_REQUESTS.labels(cache=self.name, result="miss").inc()
+        return None
+
+    def _set_local(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.local_ttl)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set(self, key: Hashable, value: Any):
+        self._set_local(key, value)
+        if self._redis is not None:
+            try:
+                self._redis.set(self._redis_key(key), pickle.dumps(value), ex=int(self.ttl))
+            except redis.RedisError as e:
+                logger.warning(f"Entity cache {self.name}: Redis unavailable ({e})")
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self._redis is not None:
+            try:
+                self._redis.delete(self._redis_key(key))
+            except redis.RedisError as e:
+                logger.warning(f"Entity cache {self.name}: Redis unavailable ({e})")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _create_cache(name: str) -> EntityCache:
+    client = redis.Redis.from_url(settings.REDIS_URL) if settings.ENTITY_CACHE_BACKEND == "redis" else None
+    return EntityCache(
+        name,
+        max_entries=settings.ENTITY_CACHE_MAX_ENTRIES,
+        local_ttl=settings.ENTITY_CACHE_LOCAL_TTL,
+        ttl=settings.ENTITY_CACHE_TTL,
+        redis_client=client,
+    )
+
+
+user_cache = _create_cache("user")  # keyed by email
+agent_cache = _create_cache("agent")  # keyed by id
+tool_cache = _create_cache("tool")  # "public" -> list of snapshots
@@ -0,0 +1,66 @@
+"""
+Scheduled maintenance jobs, run by app.services.scheduler (see there for
+how leases, concurrency and run history work). Schedules are UTC cron.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_stats
+from app.db.base import engine
+from app.db.models import JobRun, StripeEvent, User
+from app.db.partitioning import maintain_partitions
+from app.services import retention_service
+from app.services.entity_cache import user_cache
+from app.services.scheduler import job
+
+
+@job("monthly_token_reset", "0 0 1 * *")
+def monthly_token_reset(db: Session):
+    """Reset monthly token usage of users without a Stripe subscription (renewals reset the others)."""
+    emails = [email for (email,) in db.query(User.email).filter(
+        User.stripe_subscription_id.is_(None), User.token_usage_this_month != 0
+    )]
+    db.query(User).filter(
+        User.stripe_subscription_id.is_(None), User.token_usage_this_month != 0
+    ).update({User.token_usage_this_month: 0}, synchronize_session=False)
+    db.commit()
+    for email in emails:
+        user_cache.invalidate(email)
+    return {"users": len(emails)}
+
+
+@job("analytics_rollup", "*/10 * * * *", run_on_start=True)
+def analytics_rollup(db: Session):
+    return crud_stats.rollup_daily_analytics(db)
+
+
+@job("archive_expired_messages", "30 3 * * *", lease_seconds=6 * 3600)
+def archive_expired_messages(db: Session):
+    return retention_service.archive_expired_messages(db)
+
+
+@job("maintain_partitions", "0 4 * * *")
+def partitions(db: Session):
+    maintain_partitions(engine)
+
+
+@job("prune_history", "0 5 * * *")
+def prune_history(db: Session):
+    """Drop old job runs and applied webhook events."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.SCHEDULER_HISTORY_DAYS)
+    runs = db.query(JobRun).filter(JobRun.started_at < cutoff).delete(synchronize_session=False)
+    events = db.query(StripeEvent).filter(
+        StripeEvent.status == "processed", StripeEvent.processed_at < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return {"job_runs": runs, "stripe_events": events}
+
+
+@job("adk_session_cleanup", "*/5 * * * *", local=True)
+async def adk_session_cleanup():
+    # ADK sessions live in this process's memory, so every API process runs this
+    from app.services.adk_agent_service import cleanup_adk_sessions
+    return {"sessions": await cleanup_adk_sessions()}
@@ -0,0 +1,388 @@
+"""
+Process-wide governor for upstream LLM quota.
+
+Every model call is admitted only while the model's requests-per-minute and
+tokens-per-minute budgets (ADKConfig.MODEL_QUOTAS) have room and fewer than
+the current concurrency limit are in flight; everything else waits in line
+instead of being fired into a 429. The concurrency limit adapts with AIMD:
+it grows by 1/limit per successful call and halves when the provider
+throttles us. A throttled call is retried with full-jitter exponential
+backoff as long as nothing has been streamed from it yet.
+
+The shared model returned by `governed_model` routes every
+generate_content call (including the follow-up calls of a tool loop)
+through the governor, so the ADK session history is never replayed.
+
+With LLM_GOVERNOR_BACKEND=redis the per-minute budgets are also reserved in
+Redis so that all workers share one quota.
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Optional
+
+import redis
+
+from app.core.adk_config import adk_config
+from app.core.config import settings
+from app.core.metrics import (
+    LLM_CONCURRENCY_LIMIT, LLM_INFLIGHT, LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT, LLM_THROTTLES,
+)
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 60.0
+
+# Set per chat turn so queueing/retries can be reported to the client
+capacity_notifier: contextvars.ContextVar[Optional[Callable[[Dict[str, Any]], Awaitable[None]]]] = \
+    contextvars.ContextVar("llm_capacity_notifier", default=None)
+
+
+class LLMCapacityTimeout(Exception):
+    """Raised when a turn waited longer than allowed for model capacity."""
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """True for provider throttling (HTTP 429 / RESOURCE_EXHAUSTED)."""
+    # google.genai's APIError carries the HTTP code and the RPC status
+    if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+        return True
+    return getattr(error, "status", None) == "RESOURCE_EXHAUSTED" or "RESOURCE_EXHAUSTED" in str(error)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+    ceiling = min(adk_config.LLM_BACKOFF_MAX, adk_config.LLM_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) used for admission."""
+    return len(text) // 4 + 1
+
+
+def estimate_request_tokens(llm_request) -> int:
+    """Input text of an ADK LlmRequest plus its output budget."""
+    text = ""
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            text += part.text or ""
+    config = llm_request.config
+    if config is not None and isinstance(config.system_instruction, str):
+        text += config.system_instruction
+    max_output = (config.max_output_tokens if config is not None else None) or adk_config.MAX_TOKENS_PER_REQUEST
+    return estimate_tokens(text) + max_output
+
+
+class _SlidingWindow:
+    """Requests and tokens admitted during the last WINDOW_SECONDS."""
+
+    def __init__(self):
+        self._entries = deque()  # [timestamp, requests, tokens]
+        self.requests = 0
+        self.tokens = 0
+
+    def prune(self, now: float):
+        while self._entries and now - self._entries[0][0] >= WINDOW_SECONDS:
+            _, requests, tokens = self._entries.popleft()
+            self.requests -= requests
+            self.tokens -= tokens
+
+    def add(self, now: float, requests: int, tokens: int) -> list:
+        entry = [now, requests, tokens]
+        self._entries.append(entry)
+        self.requests += requests
+        self.tokens += tokens
+        return entry
+
+    def adjust(self, entry: list, requests: int, tokens: int):
+        """Correct an admitted entry once the real usage is known (if it is still in the window)."""
+        if self._entries and entry[0] >= self._entries[0][0]:
+            entry[1] += requests
+            entry[2] += tokens
+            self.requests += requests
+            self.tokens += tokens
+
+    def wait_time(self, now: float) -> float:
+        if not self._entries:
+            return 0.0
+        return max(0.0, WINDOW_SECONDS - (now - self._entries[0][0]))
+
+
+# Reserve requests/tokens in the current minute if both budgets have room
+_RESERVE_LUA = """
+local requests = tonumber(redis.call('GET', KEYS[1]) or '0')
+local tokens = tonumber(redis.call('GET', KEYS[2]) or '0')
+if requests + tonumber(ARGV[3]) > tonumber(ARGV[1]) then return 0 end
+if tokens > 0 and tokens + tonumber(ARGV[4]) > tonumber(ARGV[2]) then return 0 end
+redis.call('INCRBY', KEYS[1], ARGV[3])
+redis.call('INCRBY', KEYS[2], ARGV[4])
+redis.call('EXPIRE', KEYS[1], 120)
+redis.call('EXPIRE', KEYS[2], 120)
+return 1
+"""
+
+
+class RedisQuotaCoordinator:
+    """Fixed per-minute RPM/TPM counters shared by every worker."""
+
+    def __init__(self, url: str, model: str):
+        self.model = model
+        self._client = redis.Redis.from_url(url)
+        self._reserve = self._client.register_script(_RESERVE_LUA)
+
+    def _keys(self, minute: int):
+        return [f"llmquota:{self.model}:{minute}:rpm", f"llmquota:{self.model}:{minute}:tpm"]
+
+    def try_reserve(self, rpm: int, tpm: int, requests: int, tokens: int) -> float:
+        """Reserve budget; returns 0 on success or the seconds until the next window."""
+        now = time.time()
+        if self._reserve(keys=self._keys(int(now // 60)), args=[rpm, tpm, requests, tokens]):
+            return 0.0
+        return 60 - now % 60
+
+    def adjust(self, requests: int, tokens: int):
+        minute = int(time.time() // 60)
+        rpm_key, tpm_key = self._keys(minute)
+        pipe = self._client.pipeline()
+        if requests:
+            pipe.incrby(rpm_key, requests)
+        if tokens:
+            pipe.incrby(tpm_key, tokens)
+        pipe.execute()
+
+
+class Lease:
+    def __init__(self, entry: list, estimated_tokens: int):
+        self.entry = entry
+        self.estimated_tokens = estimated_tokens
+
+
+class LLMGovernor:
+    def __init__(self, model: str, rpm: int, tpm: int, max_concurrency: int,
+                 min_concurrency: int = 1, coordinator: Optional[RedisQuotaCoordinator] = None):
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.inflight = 0
+        self.waiting = 0
+        self._window = _SlidingWindow()
+        self._coordinator = coordinator
+        self._cond = asyncio.Condition()
+        self._last_decrease = 0.0
+        LLM_CONCURRENCY_LIMIT.labels(model=model).set(self.limit)
+
+    def _local_wait(self, now: float, tokens: int) -> Optional[float]:
+        """None if the turn can be admitted locally, otherwise how long to wait (0 = until a release)."""
+        if self.inflight >= max(self.min_concurrency, int(self.limit)):
+            return 0.0
+        self._window.prune(now)
+        if self._window.requests + 1 > self.rpm:
+            return self._window.wait_time(now)
+        # A single oversized turn is still admitted into an empty window
+        if self._window.tokens and self._window.tokens + tokens > self.tpm:
+            return self._window.wait_time(now)
+        return None
+
+    def _hold(self, tokens: int) -> list:
+        self.inflight += 1
+        return self._window.add(time.monotonic(), 1, tokens)
+
+    async def _give_back(self, entry: list, tokens: int):
+        async with self._cond:
+            self.inflight -= 1
+            self._window.adjust(entry, -1, -tokens)
+            self._cond.notify_all()
+
+    def _time_left(self, deadline: float, timeout: float) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMCapacityTimeout(f"No capacity for {self.model} within {timeout}s")
+        return remaining
+
+    async def acquire(self, estimated_tokens: int, timeout: float,
+                      on_wait: Optional[Callable[[], Awaitable[None]]] = None) -> Lease:
+        """Wait (in line) until the turn fits the quota and concurrency limit."""
+        started = time.monotonic()
+        deadline = started + timeout
+        notified = False
+        self.waiting += 1
+        LLM_QUEUE_DEPTH.labels(model=self.model).set(self.waiting)
+        try:
+            while True:
+                # Only the local admission runs under the lock; Redis and the
+                # client notification are awaited with it released
+                async with self._cond:
+                    wait = self._local_wait(time.monotonic(), estimated_tokens)
+                    if wait is None:
+                        entry = self._hold(estimated_tokens)
+                    elif notified or on_wait is None:
+                        remaining = self._time_left(deadline, timeout)
+                        try:
+                            # Woken by a release, or when the window frees up
+                            await asyncio.wait_for(self._cond.wait(), timeout=min(remaining, wait or remaining, 1.0))
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+                if wait is not None:
+                    notified = True
+                    await on_wait()
+                    continue
+                if self._coordinator is None:
+                    break
+
+                try:
+                    remote_wait = await asyncio.to_thread(
+                        self._coordinator.try_reserve, self.rpm, self.tpm, 1, estimated_tokens
+                    )
+                except BaseException:
+                    # Cancelled turn or Redis error: the held slot must not leak
+                    await self._give_back(entry, estimated_tokens)
+                    raise
+                if not remote_wait:
+                    break
+                # The shared quota is spent: give the slot back until the next minute
+                await self._give_back(entry, estimated_tokens)
+                remaining = self._time_left(deadline, timeout)
+                if on_wait is not None and not notified:
+                    notified = True
+                    await on_wait()
+                await asyncio.sleep(min(remaining, remote_wait, 1.0))
+        finally:
+            self.waiting -= 1
+            LLM_QUEUE_DEPTH.labels(model=self.model).set(self.waiting)
+
+        LLM_INFLIGHT.labels(model=self.model).set(self.inflight)
+        LLM_QUEUE_WAIT.labels(model=self.model).observe(time.monotonic() - started)
+        return Lease(entry, estimated_tokens)
+
+    async def release(self, lease: Lease, tokens_used: Optional[int] = None,
+                      llm_calls: int = 1, throttled: bool = False):
+        """Return a slot, reconcile the estimate with real usage and adapt the limit."""
+        extra_requests = max(0, llm_calls - 1)
+        token_delta = (tokens_used - lease.estimated_tokens) if tokens_used is not None else 0
+        async with self._cond:
+            self.inflight -= 1
+            self._window.adjust(lease.entry, extra_requests, token_delta)
+            if throttled:
+                self._decrease()
+            else:
+                self._increase()
+            self._cond.notify_all()
+        LLM_INFLIGHT.labels(model=self.model).set(self.inflight)
+        if self._coordinator is not None and (extra_requests or token_delta > 0):
+            await asyncio.to_thread(self._coordinator.adjust, extra_requests, max(0, token_delta))
+
+    def _increase(self):
+        self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+        LLM_CONCURRENCY_LIMIT.labels(model=self.model).set(self.limit)
+
+    def _decrease(self):
+        LLM_THROTTLES.labels(model=self.model).inc()
+        now = time.monotonic()
+        # Concurrent turns tend to be throttled together; count that as one signal
+        if now - self._last_decrease < adk_config.LLM_DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_concurrency), self.limit / 2)
+        LLM_CONCURRENCY_LIMIT.labels(model=self.model).set(self.limit)
+        logger.warning(f"Upstream throttling for {self.model}, concurrency limit now {self.limit:.1f}")
+
+
+_governors: Dict[str, LLMGovernor] = {}
+
+
+def get_governor(model: str) -> LLMGovernor:
+    """Return the shared governor for a model, creating it from ADKConfig on first use."""
+    governor = _governors.get(model)
+    if governor is None:
+        quota = adk_config.get_model_quota(model)
+        coordinator = None
+        if settings.LLM_GOVERNOR_BACKEND == "redis":
+            coordinator = RedisQuotaCoordinator(settings.REDIS_URL, model)
+        governor = LLMGovernor(
+            model,
+            rpm=quota["rpm"],
+            tpm=quota["tpm"],
+            max_concurrency=adk_config.LLM_MAX_CONCURRENCY,
+            coordinator=coordinator,
+        )
+        _governors[model] = governor
+    return governor
+
+
+async def _notify(payload: Dict[str, Any]):
+    notifier = capacity_notifier.get()
+    if notifier is not None:
+        try:
+            await notifier(payload)
+        except Exception as e:
+            logger.debug(f"Capacity notification failed: {e}")
+
+
+async def governed_generate(governor: LLMGovernor, generate, llm_request, stream: bool) -> AsyncGenerator:
+    """Run one model call under the governor, retrying throttled calls that produced no output."""
+    estimated = estimate_request_tokens(llm_request)
+    attempt = 0
+    while True:
+        lease = await governor.acquire(
+            estimated,
+            adk_config.LLM_QUEUE_TIMEOUT,
+            on_wait=lambda: _notify({"status": "Waiting for model capacity...", "code": "llm_queued"}),
+        )
+        yielded = False
+        tokens_used = None
+        throttled = False
+        try:
+            async for response in generate(llm_request, stream):
+                usage = getattr(response, "usage_metadata", None)
+                if usage is not None and usage.total_token_count:
+                    tokens_used = usage.total_token_count
+                yielded = True
+                yield response
+            return
+        except Exception as e:
+            throttled = is_quota_error(e)
+            if not throttled or yielded or attempt >= adk_config.LLM_MAX_RETRIES:
+                raise
+        finally:
+            await governor.release(lease, tokens_used=tokens_used, throttled=throttled)
+
+        delay = backoff_delay(attempt)
+        attempt += 1
+        logger.warning(f"{governor.model} throttled, retry {attempt}/{adk_config.LLM_MAX_RETRIES} in {delay:.1f}s")
+        await _notify({"status": "Model is busy, retrying...", "code": "llm_retry", "retry_in": round(delay, 1)})
+        await asyncio.sleep(delay)
+
+
+_governed_model_class = None
+
+
+def governed_model(model: str):
+    """Build an ADK Gemini model whose calls go through the model's governor and context cache."""
+    global _governed_model_class
+    if _governed_model_class is None:
+        from google.adk.models import Gemini
+
+        from app.services.context_cache import cached_generate, get_context_cache
+
+        class GovernedGemini(Gemini):
+            async def generate_content_async(self, llm_request, stream: bool = False):
+                parent = super().generate_content_async
+
+                # Admitted calls send long prompt prefixes through the context cache
+                def generate(request, stream):
+                    return cached_generate(get_context_cache(self), self.model, parent, request, stream)
+
+                async for response in governed_generate(get_governor(self.model), generate, llm_request, stream):
+                    yield response
+
+        _governed_model_class = GovernedGemini
+    return _governed_model_class(model=model)
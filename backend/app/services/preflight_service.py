@@ -0,0 +1,243 @@
+"""
+Startup preflight and cached readiness state.
+
+Credentials, model configuration and database/tool reachability are checked
+once at startup and then refreshed in the background (on a timer, or as soon
+as the credentials file changes). The chat hot path only reads the cached
+result through `is_ready()` and never touches the filesystem.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.adk_config import adk_config
+from app.core.config import settings
+from app.db.base import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Checks that must pass before the service accepts chat traffic.
+# Tool and model-client problems only mark the service as degraded.
+REQUIRED_CHECKS = ("credentials", "model_config", "database")
+
+# Settings each tool needs before it can be used
+TOOL_REQUIREMENTS = {
+    "tavily_search": ["TAVILY_API_KEY"],
+    "send_sms": ["TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_PHONE_NUMBER"],
+}
+
+_readiness: Dict[str, Any] = {
+    "ready": False,
+    "status": "starting",
+    "checked_at": None,
+    "checks": {},
+}
+_credentials_mtime: Optional[float] = None
+_refresh_task: Optional[asyncio.Task] = None
+_shared_llm = None
+
+
+def _credentials_path() -> Optional[str]:
+    return os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+
+
+def _stat_credentials() -> Optional[float]:
+    """Return the mtime of the credentials file, or None if it is missing."""
+    path = _credentials_path()
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def check_credentials() -> Dict[str, Any]:
+    """Validate the Google credentials file (or API key fallback)."""
+    path = _credentials_path()
+    if not path:
+        if settings.GOOGLE_API_KEY:
+            return {"ok": True, "source": "api_key"}
+        return {"ok": False, "error": "GOOGLE_APPLICATION_CREDENTIALS is not set"}
+
+    if not os.path.exists(path):
+        return {"ok": False, "path": path, "error": "Credentials file not found"}
+
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        return {"ok": False, "path": path, "error": f"Credentials file is not valid JSON: {e}"}
+
+    if not isinstance(data, dict) or "type" not in data:
+        return {"ok": False, "path": path, "error": "Credentials file is missing the 'type' field"}
+
+    return {
+        "ok": True,
+        "source": data["type"],
+        "path": path,
+        "project_id": data.get("project_id"),
+    }
+
+
+def check_model_config() -> Dict[str, Any]:
+    """Make sure the configured model settings are usable."""
+    model_config = adk_config.get_model_config()
+    if not model_config.get("model"):
+        return {"ok": False, "error": "DEFAULT_MODEL is not configured"}
+    if model_config.get("max_tokens", 0) <= 0:
+        return {"ok": False, "error": "MAX_TOKENS_PER_REQUEST must be positive"}
+    return {"ok": True, "model": model_config["model"]}
+
+
+def check_database() -> Dict[str, Any]:
+    """Run a trivial query to make sure the database is reachable."""
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        db.execute(text("SELECT 1"))
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    finally:
+        db.close()
+
+
+def check_tools() -> Dict[str, Any]:
+    """Report which tools have the settings they need."""
+    tools = {}
+    for tool_name in adk_config.AVAILABLE_TOOLS:
+        missing = [name for name in TOOL_REQUIREMENTS.get(tool_name, []) if not getattr(settings, name, None)]
+        tools[tool_name] = {"ok": not missing, "missing": missing}
+    return {"ok": all(tool["ok"] for tool in tools.values()), "tools": tools}
+
+
+def get_shared_llm():
+    """
+    Return the process-wide ADK model wrapper.
+
+    Sharing one instance means every agent reuses the same genai client and
+    its connection pool instead of building a new one per session. Its calls
+    are admitted by the upstream quota governor.
+    """
+    global _shared_llm
+    if _shared_llm is None:
+        from app.services.llm_governor import governed_model
+        _shared_llm = governed_model(adk_config.get_model_config()["model"])
+    return _shared_llm
+
+
+async def warm_model_client() -> Dict[str, Any]:
+    """Build the shared model client and open a connection to the model API."""
+    try:
+        # The first call imports google.adk, which takes seconds; keep it off the event loop
+        llm = await asyncio.to_thread(get_shared_llm)
+        started = time.perf_counter()
+        await llm.api_client.aio.models.get(model=llm.model)
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+
+async def run_preflight() -> Dict[str, Any]:
+    """Run every check and replace the cached readiness state."""
+    global _credentials_mtime
+
+    checks = {
+        "credentials": await asyncio.to_thread(check_credentials),
+        "model_config": check_model_config(),
+        "database": await asyncio.to_thread(check_database),
+        "tools": check_tools(),
+    }
+    if checks["credentials"]["ok"]:
+        checks["model_client"] = await warm_model_client()
+
+    ready = all(checks[name]["ok"] for name in REQUIRED_CHECKS)
+    degraded = ready and not all(check["ok"] for check in checks.values())
+
+    _credentials_mtime = await asyncio.to_thread(_stat_credentials)
+    _readiness.update({
+        "ready": ready,
+        "status": "degraded" if degraded else ("ready" if ready else "not_ready"),
+        "checked_at": time.time(),
+        "checks": checks,
+    })
+
+    # The details are only served to admins, so they go to the log too
+    failed = {name: check for name, check in checks.items() if not check["ok"]}
+    if not ready:
+        logger.error(f"Preflight failed checks: {failed}")
+    elif degraded:
+        logger.warning(f"Preflight complete: degraded, failed checks: {failed}")
+    else:
+        logger.info(f"Preflight complete: {_readiness['status']}")
+    return _readiness
+
+
+def is_ready() -> bool:
+    """Cached readiness flag for the hot path - no I/O."""
+    return _readiness["ready"]
+
+
+def get_readiness() -> Dict[str, Any]:
+    """Return the cached readiness state, including per-check details."""
+    return _readiness
+
+
+def get_public_readiness() -> Dict[str, Any]:
+    """Readiness without the check details (paths, project ids, error messages) for unauthenticated probes."""
+    return {
+        "ready": _readiness["ready"],
+        "status": _readiness["status"],
+        "checked_at": _readiness["checked_at"],
+        "checks": {name: {"ok": check["ok"]} for name, check in _readiness["checks"].items()},
+    }
+
+
+async def _refresh_loop(run_now: bool):
+    if run_now:
+        try:
+            await run_preflight()
+        except Exception as e:
+            logger.error(f"Preflight failed: {e}")
+    last_full_run = time.monotonic()
+    while True:
+        await asyncio.sleep(adk_config.PREFLIGHT_WATCH_INTERVAL)
+        try:
+            mtime = await asyncio.to_thread(_stat_credentials)
+            due = time.monotonic() - last_full_run >= adk_config.PREFLIGHT_REFRESH_INTERVAL
+            if due or mtime != _credentials_mtime:
+                if not due:
+                    logger.info("Credentials file changed, re-running preflight")
+                await run_preflight()
+                last_full_run = time.monotonic()
+        except Exception as e:
+            logger.error(f"Preflight refresh failed: {e}")
+
+
+def start_refresher(run_now: bool = False):
+    """
+    Start the background task that keeps the readiness state fresh.
+    With `run_now` the first preflight runs in it too, so startup doesn't wait
+    for it; /health/ready reports "starting" until it completes.
+    """
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh_loop(run_now))
+
+
+async def stop_refresher():
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
@@ -0,0 +1,146 @@
+"""
+Token-bucket rate limiting for REST requests and socket events.
+
+Each bucket holds up to `burst` tokens and refills at `per_minute / 60`
+tokens per second; a check takes one token or reports how long until one
+is available. Checks are O(1): one dict lookup in memory, or one Lua script
+round-trip on Redis (used when several workers must share the buckets).
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.plans import PLANS
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    per_minute: float
+    burst: int
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.per_minute / 60.0
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    remaining: int
+    retry_after: float  # seconds until the next token, 0 when allowed
+
+    @property
+    def retry_after_header(self) -> str:
+        """Value for the Retry-After header (whole seconds, at least 1)."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class InMemoryBackend:
+    """Per-process buckets, LRU-bounded so idle keys don't accumulate."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(limit.burst), now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+
+            tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.refill_per_second)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return RateLimitResult(True, int(bucket[0]), 0.0)
+            bucket[0] = tokens
+            return RateLimitResult(False, 0, (cost - tokens) / limit.refill_per_second)
+
+
+# Atomic refill-and-take; uses the Redis clock so all workers agree on time
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class RedisBackend:
+    """Buckets shared by all workers, stored as Redis hashes."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_TOKEN_BUCKET_LUA)
+
+    def take(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        allowed, tokens, retry_after = self._script(
+            keys=[self.prefix + key],
+            args=[limit.burst, limit.refill_per_second, cost],
+        )
+        return RateLimitResult(bool(int(allowed)), int(float(tokens)), float(retry_after))
+
+
+class RateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+        # Only the Redis backend does I/O, so only it is pushed off the event loop
+        self._blocking = not isinstance(backend, InMemoryBackend)
+
+    def check(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        return self.backend.take(key, limit, cost)
+
+    async def acheck(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        if self._blocking:
+            return await asyncio.to_thread(self.backend.take, key, limit, cost)
+        return self.backend.take(key, limit, cost)
+
+
+def plan_limit(plan: Optional[str], scope: str) -> RateLimit:
+    """Rate limit for a plan tier and scope ("api" or "chat") from app.core.plans."""
+    limits = PLANS.get(plan or "free", PLANS["free"])["rate_limits"]
+    return RateLimit(per_minute=limits[f"{scope}_per_minute"], burst=limits[f"{scope}_burst"])
+
+
+IP_LIMIT = RateLimit(per_minute=settings.RATE_LIMIT_IP_PER_MINUTE, burst=settings.RATE_LIMIT_IP_BURST)
+
+
+def _create_limiter() -> RateLimiter:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RateLimiter(RedisBackend(settings.REDIS_URL))
+    return RateLimiter(InMemoryBackend())
+
+
+rate_limiter = _create_limiter()
@@ -0,0 +1,209 @@
+"""
+Tiered retention for chat history.
+
+Messages older than their owner's plan horizon (PLANS[plan]["retention"])
+are written to zstd-compressed JSON-lines segments in the archive storage,
+recorded in the `chat_archive_segments` manifest and deleted from
+`chat_messages`. History pages that reach past the hot rows are filled from
+the archive (see `get_history_page`).
+
+Run it with ``python -m app.services.retention_service``.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+
+import zstandard
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.plans import PLANS
+from app.db import models
+from app.db.partitioning import drop_partitions_before, is_partitioned
+from app.services.archive_storage import get_archive_storage
+
+logger = logging.getLogger(__name__)
+
+Cursor = Tuple[datetime, int]  # (timestamp, id) of the oldest message already returned
+
+
+def as_utc(value: datetime) -> datetime:
+    """SQLite returns naive datetimes; treat them as UTC so they compare with aware ones."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+# SQLite keeps timestamps as text, with or without fractional seconds
+# (CURRENT_TIMESTAMP has none), and text comparison of the two forms is
+# wrong; both sides are normalized by strftime there
+_SQLITE_TIMESTAMP = "%Y-%m-%d %H:%M:%f"
+
+
+def _timestamp_column(db: Session, column):
+    return func.strftime(_SQLITE_TIMESTAMP, column) if db.get_bind().dialect.name == "sqlite" else column
+
+
+def _timestamp_value(db: Session, value: datetime):
+    if db.get_bind().dialect.name != "sqlite":
+        return value
+    # Stored values are naive UTC
+    naive = as_utc(value).astimezone(timezone.utc).replace(tzinfo=None)
+    return func.strftime(_SQLITE_TIMESTAMP, naive.isoformat(sep=" "))
+
+
+def _serialize(message: models.ChatMessage) -> Dict[str, Any]:
+    return {
+        "id": message.id,
+        "agent_id": message.agent_id,
+        "user_id": message.user_id,
+        "role": message.role,
+        "content": message.content,
+        "timestamp": as_utc(message.timestamp).isoformat(),
+        "response_time_seconds": float(message.response_time_seconds) if message.response_time_seconds is not None else None,
+        "tool_calls": message.tool_calls,
+        "token_usage": message.token_usage,
+        "status": message.status,
+    }
+
+
+def _encode_segment(records: List[Dict[str, Any]]) -> bytes:
+    lines = "\n".join(json.dumps(record, separators=(",", ":")) for record in records)
+    return zstandard.ZstdCompressor(level=10).compress(lines.encode("utf-8"))
+
+
+@lru_cache(maxsize=32)
+def _read_segment(key: str) -> Tuple[Dict[str, Any], ...]:
+    """Decoded segment records (segments are immutable, so they are cached by key)."""
+    data = zstandard.ZstdDecompressor().decompress(get_archive_storage().get(key))
+    records = []
+    for line in data.decode("utf-8").splitlines():
+        record = json.loads(line)
+        record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+        records.append(record)
+    return tuple(records)
+
+
+def _archive_batch(db: Session, storage, messages: List[models.ChatMessage]) -> int:
+    """Write one segment per agent, record it in the manifest and delete the rows."""
+    segments = 0
+    for agent_id, group in groupby(messages, key=lambda m: m.agent_id):
+        records = [_serialize(message) for message in group]
+        first, last = records[0], records[-1]
+        key = f"chat/{agent_id}/{first['timestamp'][:7]}/{first['id']}-{last['id']}.jsonl.zst"
+        data = _encode_segment(records)
+        # The file is written before the rows are removed; a crash in between leaves
+        # the rows in place and the same key is rewritten on the next run
+        storage.put(key, data)
+        db.add(models.ChatArchiveSegment(
+            agent_id=agent_id,
+            key=key,
+            first_timestamp=datetime.fromisoformat(first["timestamp"]),
+            last_timestamp=datetime.fromisoformat(last["timestamp"]),
+            first_message_id=first["id"],
+            last_message_id=last["id"],
+            message_count=len(records),
+            size_bytes=len(data),
+        ))
+        db.query(models.ChatMessage)\
+            .filter(models.ChatMessage.id.in_([record["id"] for record in records]))\
+            .delete(synchronize_session=False)
+        segments += 1
+    db.commit()
+    return segments
+
+
+def archive_expired_messages(db: Session, now: Optional[datetime] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Move every message past its plan's horizon to the archive."""
+    storage = get_archive_storage()
+    now = now or datetime.now(timezone.utc)
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    stats = {"messages": 0, "segments": 0}
+
+    for plan_name, plan in PLANS.items():
+        cutoff = now - timedelta(days=plan["retention"]["hot_history_days"])
+        plan_filter = models.User.plan == plan_name
+        if plan_name == "free":
+            plan_filter = or_(plan_filter, models.User.plan.is_(None))
+        plan_users = db.query(models.User.id).filter(plan_filter)
+
+        while True:
+            messages = db.query(models.ChatMessage)\
+                .filter(models.ChatMessage.user_id.in_(plan_users.scalar_subquery()))\
+                .filter(models.ChatMessage.timestamp < cutoff)\
+                .order_by(models.ChatMessage.agent_id, models.ChatMessage.timestamp, models.ChatMessage.id)\
+                .limit(batch_size)\
+                .all()
+            if not messages:
+                break
+            stats["segments"] += _archive_batch(db, storage, messages)
+            stats["messages"] += len(messages)
+
+    # Partitions past the longest horizon are now empty; dropping them returns the
+    # space at once instead of waiting for VACUUM
+    longest = max(plan["retention"]["hot_history_days"] for plan in PLANS.values())
+    connection = db.connection()
+    if is_partitioned(connection, "chat_messages"):
+        drop_partitions_before(connection, "chat_messages", now - timedelta(days=longest), only_empty=True)
+        db.commit()
+
+    logger.info(f"Archived {stats['messages']} chat messages in {stats['segments']} segments")
+    return stats
+
+
+def get_history_page(db: Session, agent_id: int, limit: int, before: Optional[Cursor] = None) -> List[Dict[str, Any]]:
+    """
+    The `limit` newest messages of an agent older than `before`, oldest first.
+
+    Hot rows are read first; if they run out, the page is completed from
+    archived segments, newest segment first.
+    """
+    timestamp = _timestamp_column(db, models.ChatMessage.timestamp)
+    query = db.query(models.ChatMessage).filter(models.ChatMessage.agent_id == agent_id)
+    if before is not None:
+        ts, message_id = _timestamp_value(db, before[0]), before[1]
+        query = query.filter(or_(
+            timestamp < ts,
+            (timestamp == ts) & (models.ChatMessage.id < message_id),
+        ))
+    rows = query.order_by(timestamp.desc(), models.ChatMessage.id.desc()).limit(limit).all()
+    page = [_serialize(row) for row in rows]
+    for record in page:
+        record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+
+    if len(page) < limit:
+        bound = (as_utc(page[-1]["timestamp"]), page[-1]["id"]) if page else before
+        page.extend(_archived_before(db, agent_id, limit - len(page), bound))
+
+    page.reverse()
+    return page
+
+
+def _archived_before(db: Session, agent_id: int, limit: int, before: Optional[Cursor]) -> List[Dict[str, Any]]:
+    segments = db.query(models.ChatArchiveSegment).filter(models.ChatArchiveSegment.agent_id == agent_id)
+    if before is not None:
+        segments = segments.filter(
+            _timestamp_column(db, models.ChatArchiveSegment.first_timestamp) <= _timestamp_value(db, before[0])
+        )
+    results: List[Dict[str, Any]] = []
+    for segment in segments.order_by(models.ChatArchiveSegment.last_timestamp.desc()):
+        for record in reversed(_read_segment(segment.key)):
+            if before is None or (record["timestamp"], record["id"]) < (as_utc(before[0]), before[1]):
+                results.append(dict(record))
+                if len(results) == limit:
+                    return results
+    return results
+
+
+if __name__ == "__main__":
+    from app.db.base import SessionLocal
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    session = SessionLocal()
+    try:
+        print(archive_expired_messages(session))
+    finally:
+        session.close()
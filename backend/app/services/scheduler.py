@@ -0,0 +1,339 @@
+"""
+Lightweight scheduler for periodic maintenance jobs.
+
+Jobs are registered in code with `@job(name, "cron expression")` (see
+app/services/jobs.py) and run by a `Scheduler` either inside the API
+process (lifespan) or in the separate worker (`python -m app.worker`).
+
+- Schedules are standard 5-field cron expressions, evaluated in UTC.
+- Shared jobs are claimed through a lease on their `scheduled_jobs` row
+  (a conditional UPDATE), so each run happens on exactly one worker no
+  matter how many schedulers are up; the lease is renewed while the job
+  runs.
+- Local jobs (`local=True`) manage per-process state and run in every
+  scheduler without a lease.
+- At most SCHEDULER_MAX_CONCURRENCY jobs run at once per scheduler.
+- Every run is recorded in `job_runs` and in the job_* metrics.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import JOB_DURATION, JOB_LAST_SUCCESS, JOB_RUNS
+from app.db.base import SessionLocal
+from app.db.models import JobRun, ScheduledJob
+from app.services.retention_service import as_utc
+
+logger = logging.getLogger(__name__)
+
+
+class CronSchedule:
+    """A 5-field cron expression (minute hour day-of-month month day-of-week)."""
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self._RANGES)
+        )
+        # Like cron: if both day fields are restricted, either may match
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+        self.weekdays = {day % 7 for day in self.weekdays}  # 7 is Sunday too
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        # Day-of-week also accepts 7 for Sunday
+        maximum = 7 if (low, high) == (0, 6) else high
+        values = set()
+        for part in field.split(","):
+            spec, _, step = part.partition("/")
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start, end = (int(v) for v in spec.split("-"))
+            else:
+                start = int(spec)
+                end = high if step else start  # "5/15" is 5, 20, 35, 50
+            if start < low or end > maximum or start > end:
+                raise ValueError(f"Cron field '{field}' is out of range {low}-{high}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        # datetime.weekday() is Monday=0; cron is Sunday=0
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after `moment` (UTC)."""
+        candidate = as_utc(moment).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+
+@dataclass
+class Job:
+    name: str
+    schedule: CronSchedule
+    func: Callable
+    local: bool = False
+    lease_seconds: int = 3600
+    run_on_start: bool = False  # first run right away instead of at the next match
+
+
+JOBS: Dict[str, Job] = {}
+
+
+def job(name: str, schedule: str, *, local: bool = False, lease_seconds: int = 3600, run_on_start: bool = False):
+    """
+    Register a job. Shared jobs are sync functions taking a DB session and
+    run in a worker thread; local jobs are coroutines without arguments.
+    """
+    def register(func):
+        JOBS[name] = Job(name, CronSchedule(schedule), func, local, lease_seconds, run_on_start)
+        return func
+    return register
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class Scheduler:
+    def __init__(self, run_shared: bool = True, max_concurrency: Optional[int] = None):
+        self.run_shared = run_shared
+        self.max_concurrency = max_concurrency or settings.SCHEDULER_MAX_CONCURRENCY
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._running: Dict[str, asyncio.Task] = {}
+        self._local_next: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    # --- job table ---
+
+    def sync_jobs(self, db: Session, now: datetime):
+        """Create rows for new jobs and reschedule jobs whose cron expression changed."""
+        rows = {row.name: row for row in db.query(ScheduledJob).all()}
+        for spec in JOBS.values():
+            if spec.local:
+                continue
+            row = rows.get(spec.name)
+            if row is None:
+                db.add(ScheduledJob(
+                    name=spec.name,
+                    schedule=spec.schedule.expression,
+                    next_run_at=now if spec.run_on_start else spec.schedule.next_after(now),
+                ))
+            elif row.schedule != spec.schedule.expression:
+                row.schedule = spec.schedule.expression
+                row.next_run_at = spec.schedule.next_after(now)
+        db.commit()
+
+    def _claim_due(self, limit: int) -> List[str]:
+        """Take leases on up to `limit` due shared jobs."""
+        if limit <= 0:
+            return []
+        now = _now()
+        db = SessionLocal()
+        try:
+            due = [
+                name for (name,) in db.query(ScheduledJob.name)
+                .filter(ScheduledJob.enabled == True, ScheduledJob.next_run_at <= now)
+                .order_by(ScheduledJob.next_run_at)
+                .all()
+                if name in JOBS and name not in self._running
+            ]
+            claimed = []
+            for name in due[:limit]:
+                result = db.execute(
+                    update(ScheduledJob)
+                    .where(
+                        ScheduledJob.name == name,
+                        ScheduledJob.next_run_at <= now,
+                        or_(ScheduledJob.lease_expires_at.is_(None), ScheduledJob.lease_expires_at < now),
+                    )
+                    .values(lease_owner=self.worker_id, lease_expires_at=now + timedelta(seconds=JOBS[name].lease_seconds))
+                )
+                db.commit()
+                if result.rowcount == 1:
+                    claimed.append(name)
+            return claimed
+        finally:
+            db.close()
+
+    def _renew_lease(self, name: str):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(ScheduledJob)
+                .where(ScheduledJob.name == name, ScheduledJob.lease_owner == self.worker_id)
+                .values(lease_expires_at=_now() + timedelta(seconds=JOBS[name].lease_seconds))
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _finish(self, name: str, started_at: datetime, duration: float, status: str, error: Optional[str]):
+        """Record the run and release the lease, scheduling the next run."""
+        finished_at = _now()
+        db = SessionLocal()
+        try:
+            db.add(JobRun(
+                job_name=name, worker=self.worker_id, started_at=started_at, finished_at=finished_at,
+                duration_seconds=duration, status=status, error=error,
+            ))
+            if not JOBS[name].local:
+                db.execute(
+                    update(ScheduledJob)
+                    .where(ScheduledJob.name == name, ScheduledJob.lease_owner == self.worker_id)
+                    .values(
+                        lease_owner=None, lease_expires_at=None,
+                        next_run_at=JOBS[name].schedule.next_after(finished_at),
+                        last_run_at=started_at, last_status=status, last_duration_seconds=duration,
+                    )
+                )
+            db.commit()
+        finally:
+            db.close()
+
+    # --- running ---
+
+    async def _call(self, spec: Job):
+        if spec.local:
+            return await spec.func()
+
+        def run():
+            db = SessionLocal()
+            try:
+                return spec.func(db)
+            finally:
+                db.close()
+        return await asyncio.to_thread(run)
+
+    async def run_job(self, name: str):
+        spec = JOBS[name]
+        started_at = _now()
+        started = time.perf_counter()
+        renew = None
+        if not spec.local:
+            renew = asyncio.create_task(self._renew_periodically(name, spec.lease_seconds / 3))
+        status, error = "succeeded", None
+        try:
+            result = await self._call(spec)
+            logger.info(f"Job {name} finished in {time.perf_counter() - started:.2f}s: {result}")
+        except Exception as e:
+            status, error = "failed", str(e)[:2000]
+            logger.error(f"Job {name} failed: {e}", exc_info=True)
+        finally:
+            if renew is not None:
+                renew.cancel()
+        duration = time.perf_counter() - started
+        JOB_RUNS.labels(job=name, status=status).inc()
+        JOB_DURATION.labels(job=name).observe(duration)
+        if status == "succeeded":
+            JOB_LAST_SUCCESS.labels(job=name).set(time.time())
+        await asyncio.to_thread(self._finish, name, started_at, duration, status, error)
+
+    async def _renew_periodically(self, name: str, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self._renew_lease, name)
+            except Exception as e:
+                logger.warning(f"Could not renew lease of job {name}: {e}")
+
+    def _start(self, name: str):
+        task = asyncio.create_task(self.run_job(name))
+        self._running[name] = task
+        task.add_done_callback(lambda _: self._running.pop(name, None))
+
+    async def tick(self):
+        """Start every due job that fits in the concurrency limit."""
+        now = _now()
+        for spec in JOBS.values():
+            if not spec.local or spec.name in self._running:
+                continue
+            next_run = self._local_next.setdefault(spec.name, now if spec.run_on_start else spec.schedule.next_after(now))
+            if next_run <= now and len(self._running) < self.max_concurrency:
+                self._local_next[spec.name] = spec.schedule.next_after(now)
+                self._start(spec.name)
+
+        if self.run_shared:
+            for name in await asyncio.to_thread(self._claim_due, self.max_concurrency - len(self._running)):
+                self._start(name)
+
+    def _sync(self):
+        db = SessionLocal()
+        try:
+            self.sync_jobs(db, _now())
+        finally:
+            db.close()
+
+    async def _loop(self):
+        synced = not self.run_shared
+        while True:
+            if not synced:
+                try:
+                    await asyncio.to_thread(self._sync)
+                    synced = True
+                except Exception as e:
+                    # e.g. another worker inserted the same job first; retried next tick
+                    logger.error(f"Scheduler job sync failed: {e}")
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Scheduler tick failed: {e}")
+            await asyncio.sleep(settings.SCHEDULER_TICK_SECONDS)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self, grace_seconds: float = 30):
+        """
+        Stop scheduling and give running jobs `grace_seconds` to finish.
+        Jobs still running are abandoned; their lease expires and another
+        worker picks them up.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._running:
+            _, pending = await asyncio.wait(list(self._running.values()), timeout=grace_seconds)
+            for task in pending:
+                task.cancel()
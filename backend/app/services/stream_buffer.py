@@ -0,0 +1,51 @@
+"""
+Per-turn ring buffer of streamed socket events.
+
+Every event emitted during a turn (tokens, tool events, status, stream_end)
+gets a sequence number and is kept in a bounded buffer, so a client that
+reconnects can ask for everything after the last sequence number it saw.
+"""
+
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+BufferedEvent = Tuple[int, str, Dict[str, Any]]
+
+
+class TurnStreamBuffer:
+    """Sequenced events of one turn; old events are evicted once `maxlen` is reached."""
+
+    def __init__(self, maxlen: int, turn_id: Optional[str] = None):
+        self.turn_id = turn_id or uuid.uuid4().hex[:16]
+        self.complete = False
+        # Full text streamed so far, so a client that fell behind the ring can resync
+        self.text = ""
+        self._events: Deque[BufferedEvent] = deque(maxlen=maxlen)
+        self._next_seq = 0
+
+    def append(self, event: str, payload: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Record an event and return its payload stamped with `seq` and `turn_id`."""
+        stamped = dict(payload or {}, seq=self._next_seq, turn_id=self.turn_id)
+        self._events.append((self._next_seq, event, stamped))
+        self._next_seq += 1
+        if event == "token":
+            self.text += stamped.get("token", "")
+        return stamped
+
+    def since(self, last_seq: int) -> Tuple[List[BufferedEvent], bool]:
+        """
+        Return events with a sequence number above `last_seq`.
+
+        The flag is True when some of those events were already evicted, in
+        which case the caller should resync from `text` instead.
+        """
+        if not self._events:
+            return [], False
+        oldest = self._events[0][0]
+        gap = last_seq + 1 < oldest
+        return [item for item in self._events if item[0] > last_seq], gap
+
+    @property
+    def last_seq(self) -> int:
+        return self._next_seq - 1
@@ -0,0 +1,247 @@
+"""
+Inbox for Stripe webhook events.
+
+The webhook endpoint only verifies the signature and stores the event
+(`record_event`); the unique Stripe event id turns redeliveries into no-ops.
+A background worker (`process_pending`) applies stored events to users:
+
+- in order per customer (Stripe's `created`, then arrival): an event waiting
+  for a retry holds back later events of the same customer,
+- each event in one transaction with its status update, so an event's
+  changes are committed exactly once,
+- failures are retried with exponential backoff and marked `failed` after
+  STRIPE_INBOX_MAX_ATTEMPTS, which unblocks the customer's later events.
+
+On PostgreSQL an advisory lock lets only one worker process a batch at a time.
+"""
+
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, exists, func, or_, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.core.metrics import STRIPE_EVENTS, STRIPE_INBOX_LAG, STRIPE_PROCESSING_DELAY
+from app.db.base import SessionLocal, engine
+from app.db.models import StripeEvent, User
+from app.services.entity_cache import user_cache
+from app.services.retention_service import as_utc
+
+logger = logging.getLogger(__name__)
+
+_LOCK_ID = 7_421_003  # pg advisory lock key for the inbox worker
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 3600
+
+
+def _customer_of(data_object: Dict[str, Any]) -> Optional[str]:
+    if data_object.get("object") == "customer":
+        return data_object.get("id")
+    customer = data_object.get("customer")
+    # Expanded objects carry the customer as a dict
+    return customer.get("id") if isinstance(customer, dict) else customer
+
+
+def record_event(db: Session, event: Dict[str, Any]) -> bool:
+    """Store a verified event; False if it was already received."""
+    data_object = event["data"]["object"]
+    db.add(StripeEvent(
+        event_id=event["id"],
+        type=event["type"],
+        customer_id=_customer_of(data_object),
+        created=event.get("created") or 0,
+        payload=event,
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        STRIPE_EVENTS.labels(type=event["type"], result="duplicate").inc()
+        return False
+    STRIPE_EVENTS.labels(type=event["type"], result="received").inc()
+    return True
+
+
+# --- Event handlers: apply one event, return the user they changed (if any) ---
+
+def _checkout_completed(db: Session, data_object: Dict[str, Any]) -> Optional[User]:
+    user = db.query(User).filter(User.id == data_object.get("client_reference_id")).first()
+    if user:
+        user.stripe_subscription_id = data_object.get("subscription")
+        user.stripe_customer_id = _customer_of(data_object)
+        user.plan = "pro"
+        # Also reset their token usage upon initial subscription
+        user.token_usage_this_month = 0
+        logger.info(f"User {user.id} successfully subscribed to Pro plan.")
+    return user
+
+
+def _subscription_deleted(db: Session, data_object: Dict[str, Any]) -> Optional[User]:
+    user = db.query(User).filter(User.stripe_subscription_id == data_object.get("id")).first()
+    if user:
+        user.plan = "free"
+        user.stripe_subscription_id = None
+        logger.info(f"User {user.id} subscription canceled, downgraded to Free plan.")
+    return user
+
+
+def _invoice_paid(db: Session, data_object: Dict[str, Any]) -> Optional[User]:
+    # Occurs for every successful recurring payment
+    subscription_id = data_object.get("subscription")
+    if not subscription_id:
+        return None
+    user = db.query(User).filter(User.stripe_subscription_id == subscription_id).first()
+    if user:
+        user.token_usage_this_month = 0
+        logger.info(f"User {user.id} subscription renewed. Token usage reset.")
+    return user
+
+
+HANDLERS: Dict[str, Callable[[Session, Dict[str, Any]], Optional[User]]] = {
+    "checkout.session.completed": _checkout_completed,
+    "customer.subscription.deleted": _subscription_deleted,
+    "invoice.payment_succeeded": _invoice_paid,
+}
+
+
+def _retry_delay(attempts: int) -> float:
+    return random.uniform(0.5, 1.0) * min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** attempts))
+
+
+def _apply(db: Session, event: StripeEvent, now: datetime) -> bool:
+    """Apply one event in its own transaction; False if it must be retried."""
+    handler = HANDLERS.get(event.type)
+    try:
+        user = handler(db, event.payload["data"]["object"]) if handler else None
+        event.status = "processed"
+        event.processed_at = now
+        event.last_error = None
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        event.attempts += 1
+        event.last_error = str(e)[:2000]
+        if event.attempts >= settings.STRIPE_INBOX_MAX_ATTEMPTS:
+            event.status = "failed"
+            logger.error(f"Stripe event {event.event_id} ({event.type}) failed permanently: {e}")
+            STRIPE_EVENTS.labels(type=event.type, result="failed").inc()
+        else:
+            event.next_attempt_at = now + timedelta(seconds=_retry_delay(event.attempts))
+            logger.warning(f"Stripe event {event.event_id} ({event.type}) failed, attempt {event.attempts}: {e}")
+            STRIPE_EVENTS.labels(type=event.type, result="retry").inc()
+        db.commit()
+        return event.status == "failed"
+
+    if user is not None:
+        user_cache.invalidate(user.email)
+    STRIPE_EVENTS.labels(type=event.type, result="processed" if handler else "ignored").inc()
+    if event.received_at is not None:
+        STRIPE_PROCESSING_DELAY.observe(max(0.0, (now - as_utc(event.received_at)).total_seconds()))
+    return True
+
+
+def _due_events(db: Session, now: datetime, limit: int) -> List[StripeEvent]:
+    """Due pending events whose customer has no earlier pending event."""
+    earlier = aliased(StripeEvent)
+    held_back = exists().where(
+        earlier.customer_id == StripeEvent.customer_id,
+        earlier.status == "pending",
+        or_(
+            earlier.created < StripeEvent.created,
+            and_(earlier.created == StripeEvent.created, earlier.id < StripeEvent.id),
+        ),
+    )
+    return (
+        db.query(StripeEvent)
+        .filter(
+            StripeEvent.status == "pending",
+            or_(StripeEvent.next_attempt_at.is_(None), StripeEvent.next_attempt_at <= now),
+            or_(StripeEvent.customer_id.is_(None), ~held_back),
+        )
+        .order_by(StripeEvent.created, StripeEvent.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def _process_batch(db: Session, now: datetime) -> int:
+    applied = 0
+    # Each round takes the oldest due event of every customer; applying one
+    # lets that customer's next event in on the following round
+    while applied < settings.STRIPE_INBOX_BATCH_SIZE:
+        events = _due_events(db, now, settings.STRIPE_INBOX_BATCH_SIZE - applied)
+        progress = sum(_apply(db, event, now) for event in events)
+        applied += progress
+        if not progress:
+            break
+
+    oldest = db.query(func.min(StripeEvent.received_at)).filter(StripeEvent.status == "pending").scalar()
+    STRIPE_INBOX_LAG.set(max(0.0, (now - as_utc(oldest)).total_seconds()) if oldest else 0)
+    return applied
+
+
+def process_pending(now: Optional[datetime] = None) -> int:
+    """Apply due events; returns how many were applied (or given up on)."""
+    now = now or datetime.now(timezone.utc)
+    is_postgres = engine.dialect.name == "postgresql"
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if is_postgres and not lock_conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": _LOCK_ID}).scalar():
+            return 0  # another worker has the batch
+        db = SessionLocal()
+        try:
+            return _process_batch(db, now)
+        finally:
+            db.close()
+            if is_postgres:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _LOCK_ID})
+
+
+# --- Background worker ---
+
+_worker_task: Optional[asyncio.Task] = None
+_wakeup: Optional[asyncio.Event] = None
+
+
+def notify():
+    """Wake the worker after an event was stored (no-op if it runs elsewhere)."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+async def _worker_loop():
+    while True:
+        try:
+            applied = await asyncio.to_thread(process_pending)
+        except Exception as e:
+            logger.error(f"Stripe inbox worker error: {e}")
+            applied = 0
+        if applied >= settings.STRIPE_INBOX_BATCH_SIZE:
+            continue  # likely more due right now
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.STRIPE_INBOX_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+
+def start_worker():
+    global _worker_task, _wakeup
+    if _worker_task is None or _worker_task.done():
+        _wakeup = asyncio.Event()
+        _worker_task = asyncio.create_task(_worker_loop())
+
+
+async def stop_worker():
+    global _worker_task
+    if _worker_task is not None:
+        _worker_task.cancel()
+        try:
+            await _worker_task
+        except asyncio.CancelledError:
+            pass
+        _worker_task = None
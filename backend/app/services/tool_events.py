@@ -0,0 +1,194 @@
+"""
+Tool call reporting and output budgets.
+
+`agent_callbacks()` gives every agent a before/after tool callback pair that
+- emits `tool_end` to the chat with the call's duration, the size of the
+  output that reached the model and whether it was cut down;
+- enforces a per-tool output budget (ADK_TOOL_OUTPUT_BUDGET tokens, per tool
+  via ADK_TOOL_OUTPUT_BUDGETS): an output over budget is extractively
+  compressed, keeping the sentences that best match the call's arguments,
+  so search-heavy turns don't send whole pages into the next model call.
+
+Long-running tools can report intermediate steps with `report_progress`,
+which emits `tool_progress`. Events go to the chat of the current turn
+through `tool_notifier`, set per turn like the capacity notifier.
+"""
+
+import contextvars
+import copy
+import json
+import logging
+import re
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.adk_config import adk_config
+from app.core.metrics import TOOL_DURATION, TOOL_OUTPUT_COMPRESSED
+from app.services.llm_governor import estimate_tokens
+
+if TYPE_CHECKING:
+    from google.adk.tools import BaseTool, ToolContext
+
+logger = logging.getLogger(__name__)
+
+# Set per chat turn: (event name, payload) -> emitted to the chat
+tool_notifier: contextvars.ContextVar[Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]]] = \
+    contextvars.ContextVar("tool_notifier", default=None)
+
+# (tool name, start time) per call; a tool that raises ends the turn without
+# an after-callback, so entries go away with their ToolContext
+_calls: "weakref.WeakKeyDictionary[ToolContext, tuple]" = weakref.WeakKeyDictionary()
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\w{3,}")
+_MARKER = "\n[... output compressed to fit the tool output budget]"
+
+
+def compress_text(text: str, max_tokens: int, query: str = "") -> str:
+    """
+    Cut `text` down to about `max_tokens`, keeping whole sentences.
+
+    The first sentence of every line is preferred (for search results, each
+    source's heading and lead), then sentences sharing words with `query`;
+    kept sentences stay in their original order.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max(0, max_tokens * 4 - len(_MARKER))
+    terms = {word.lower() for word in _WORD.findall(query)}
+
+    candidates = []  # (rank, line, index, sentence)
+    for line_number, line in enumerate(text.splitlines()):
+        for index, sentence in enumerate(s for s in _SENTENCE_END.split(line.strip()) if s):
+            hits = len(terms & {word.lower() for word in _WORD.findall(sentence)})
+            # Line leads (e.g. "Source: <url>") first, so query matches can't crowd them out
+            candidates.append(((index == 0, hits), line_number, index, sentence))
+
+    kept = []
+    used = 0
+    cut = False
+    for rank, line_number, index, sentence in sorted(candidates, key=lambda c: (-c[0][0], -c[0][1], c[1], c[2])):
+        room = budget - used - 1
+        if len(sentence) > room:
+            if cut or room < 20:
+                continue
+            # The best sentence that doesn't fit is kept cut at a word boundary
+            head = sentence[:room - 4]
+            sentence = (head[:head.rfind(" ")] if " " in head else head) + " ..."
+            cut = True
+        kept.append((rank, line_number, index, sentence))
+        used += len(sentence) + 1
+
+    lines: Dict[int, List[str]] = {}
+    for _, line_number, _, sentence in sorted(kept, key=lambda c: (c[1], c[2])):
+        lines.setdefault(line_number, []).append(sentence)
+    return "\n".join(" ".join(sentences) for sentences in lines.values()) + _MARKER
+
+
+def _size(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value, default=str, ensure_ascii=False)
+
+
+def _string_leaves(value: Any):
+    """(container, key) of every string inside nested dicts and lists."""
+    items = value.items() if isinstance(value, dict) else enumerate(value) if isinstance(value, list) else ()
+    for key, item in items:
+        if isinstance(item, str):
+            yield value, key
+        else:
+            yield from _string_leaves(item)
+
+
+def apply_budget(response: Any, max_tokens: int, query: str = "") -> Optional[Any]:
+    """`response` compressed to `max_tokens`, or None if it already fits (or there is no budget)."""
+    tokens = estimate_tokens(_size(response))
+    if max_tokens <= 0 or tokens <= max_tokens:
+        return None
+    if isinstance(response, str):
+        return compress_text(response, max_tokens, query)
+    if not isinstance(response, (dict, list)):
+        return None
+
+    response = copy.deepcopy(response)
+    limit = max_tokens - 12 if isinstance(response, dict) else max_tokens  # room for the flags added below
+    # Shrink the longest strings first until the whole response fits
+    for _ in range(8):
+        excess = estimate_tokens(_size(response)) - limit
+        leaves = sorted(_string_leaves(response), key=lambda leaf: len(leaf[0][leaf[1]]), reverse=True)
+        if excess <= 0 or not leaves:
+            break
+        container, key = leaves[0]
+        target = max(32, estimate_tokens(container[key]) - excess)
+        shrunk = compress_text(container[key], target, query)
+        if len(shrunk) >= len(container[key]):
+            break
+        container[key] = shrunk
+    if isinstance(response, dict):
+        response["truncated"] = True
+        response["original_tokens"] = tokens
+    return response
+
+
+async def _notify(event: str, payload: Dict[str, Any]):
+    notifier = tool_notifier.get()
+    if notifier is not None:
+        try:
+            await notifier(event, payload)
+        except Exception as e:
+            logger.debug(f"Tool event {event} could not be sent: {e}")
+
+
+def _call_info(tool_context: "ToolContext") -> Dict[str, Any]:
+    info = {"id": tool_context.function_call_id}
+    branch = tool_context._invocation_context.branch
+    if branch and "." in branch:  # inside a parallel branch of a composite agent
+        info["branch"] = branch.rsplit(".", 1)[-1]
+    return info
+
+
+async def report_progress(tool_context: Optional["ToolContext"], message: str, progress: Optional[float] = None):
+    """Tell the client what a long-running tool is doing; `progress` is 0..1 when known."""
+    if tool_context is None:
+        return
+    name, _ = _calls.get(tool_context, (None, None))
+    payload = {"name": name, "message": message, **_call_info(tool_context)}
+    if progress is not None:
+        payload["progress"] = round(max(0.0, min(1.0, progress)), 3)
+    await _notify("tool_progress", payload)
+
+
+def before_tool(tool: "BaseTool", args: Dict[str, Any], tool_context: "ToolContext") -> None:
+    _calls[tool_context] = (tool.name, time.monotonic())
+    return None
+
+
+async def after_tool(tool: "BaseTool", args: Dict[str, Any], tool_context: "ToolContext", tool_response: Any) -> Optional[Any]:
+    """Budget the output and report the finished call; returns the replacement output, if any."""
+    _, started = _calls.pop(tool_context, (None, None))
+    duration = time.monotonic() - started if started is not None else 0.0
+    TOOL_DURATION.labels(tool=tool.name).observe(duration)
+
+    query = " ".join(str(value) for value in args.values() if isinstance(value, str))
+    budgeted = apply_budget(tool_response, adk_config.get_tool_output_budget(tool.name), query)
+    if budgeted is not None:
+        TOOL_OUTPUT_COMPRESSED.labels(tool=tool.name).inc()
+    output = _size(budgeted if budgeted is not None else tool_response)
+
+    payload = {
+        "name": tool.name,
+        "duration": round(duration, 3),
+        "size_bytes": len(output.encode("utf-8")),
+        "tokens": estimate_tokens(output),
+        "truncated": budgeted is not None,
+        **_call_info(tool_context),
+    }
+    if isinstance(tool_response, dict) and tool_response.get("status") == "error":
+        payload["status"] = "error"
+    await _notify("tool_end", payload)
+    return budgeted
+
+
+def agent_callbacks() -> Dict[str, Callable]:
+    """Keyword arguments wiring the tool callbacks into an ADK Agent."""
+    return {"before_tool_callback": before_tool, "after_tool_callback": after_tool}
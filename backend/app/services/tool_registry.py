@@ -0,0 +1,164 @@
+"""
+Tool registry: resolves the tool names stored on an agent (`Agent.tools`,
+matching `Tool.function_name`) to callables for ADK.
+
+Each `tools` row names its implementation with an entry point reference
+("package.module:function"); tools shipped by installed packages can leave
+it empty and register under the `adk_platform.tools` entry-point group
+instead. Modules are imported the first time an agent uses the tool, so
+adding a tool is a row in the `tools` table (plus its module).
+
+Implementations with a `credentials` parameter receive the calling user's
+UserIntegration for the tool's `credential_service`, or None to fall back
+to the platform keys. Decrypted credentials are kept in a per-process cache
+for TOOL_CREDENTIALS_TTL seconds (never in Redis), so a tool call normally
+costs neither a query nor a Fernet decryption.
+"""
+
+import functools
+import inspect
+import json
+import logging
+from importlib.metadata import EntryPoint, entry_points
+from typing import Any, Callable, Dict, List, Optional
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.db.base import SessionLocal
+from app.services.encryption_service import decrypt_token
+from app.services.entity_cache import EntityCache, tool_cache
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "adk_platform.tools"
+CREDENTIALS_PARAM = "credentials"
+
+# entry point (or tool name) -> loaded implementation
+_implementations: Dict[str, Callable] = {}
+
+# (user id, service name) -> decrypted credentials, {} when the user has none
+credentials_cache = EntityCache(
+    "credentials",
+    max_entries=settings.ENTITY_CACHE_MAX_ENTRIES,
+    local_ttl=settings.TOOL_CREDENTIALS_TTL,
+    ttl=settings.TOOL_CREDENTIALS_TTL,
+)
+
+
+def get_tool_specs(db: Session) -> Dict[str, Dict[str, Optional[str]]]:
+    """function_name -> {"entry_point", "credential_service"} for every registered tool."""
+    specs = tool_cache.get("registry")
+    if specs is None:
+        rows = db.query(models.Tool.function_name, models.Tool.entry_point, models.Tool.credential_service).all()
+        specs = {
+            row.function_name: {"entry_point": row.entry_point, "credential_service": row.credential_service}
+            for row in rows
+        }
+        tool_cache.set("registry", specs)
+    return specs
+
+
+def load_implementation(name: str, entry_point: Optional[str]) -> Callable:
+    """Import a tool's implementation (once per process)."""
+    key = entry_point or name
+    implementation = _implementations.get(key)
+    if implementation is None:
+        if entry_point:
+            implementation = EntryPoint(name=name, value=entry_point, group=ENTRY_POINT_GROUP).load()
+        else:
+            matches = entry_points(group=ENTRY_POINT_GROUP, name=name)
+            if not matches:
+                raise LookupError(f"No implementation registered for tool '{name}'")
+            implementation = next(iter(matches)).load()
+        _implementations[key] = implementation
+    return implementation
+
+
+def _parse_credentials(token: str) -> Dict[str, Any]:
+    # Multi-field credentials (e.g. Twilio) are stored as a JSON object
+    try:
+        value = json.loads(token)
+    except ValueError:
+        value = None
+    return value if isinstance(value, dict) else {"token": token}
+
+
+def get_user_credentials(user_id: int, service: str, db: Optional[Session] = None) -> Optional[Dict[str, Any]]:
+    """The user's decrypted integration for `service`, or None."""
+    key = (int(user_id), service.upper())
+    credentials = credentials_cache.get(key)
+    if credentials is None:
+        session = db or SessionLocal()
+        try:
+            integration = (
+                session.query(models.UserIntegration)
+                .filter(models.UserIntegration.owner_id == key[0], models.UserIntegration.service_name == key[1])
+                .order_by(models.UserIntegration.id.desc())
+                .first()
+            )
+        finally:
+            if db is None:
+                session.close()
+        credentials = {}
+        if integration is not None:
+            try:
+                credentials = _parse_credentials(decrypt_token(integration.encrypted_token))
+            except InvalidToken:
+                logger.warning(f"Integration {integration.id} ({key[1]}) cannot be decrypted, using platform keys")
+        credentials_cache.set(key, credentials)
+    return credentials or None
+
+
+def invalidate_user_credentials(user_id: int, service: str):
+    credentials_cache.invalidate((int(user_id), service.upper()))
+
+
+def _with_credentials(implementation: Callable, user_id: int, service: str) -> Callable:
+    """
+    Wrap `implementation` so each call receives the user's credentials.
+    The wrapper's signature drops the credentials parameter, which keeps it
+    out of the function declaration ADK sends to the model.
+    """
+    signature = inspect.signature(implementation)
+
+    if inspect.iscoroutinefunction(implementation):
+        async def tool(*args, **kwargs):
+            credentials = get_user_credentials(user_id, service)
+            return await implementation(*args, **kwargs, **{CREDENTIALS_PARAM: credentials})
+    else:
+        def tool(*args, **kwargs):
+            credentials = get_user_credentials(user_id, service)
+            return implementation(*args, **kwargs, **{CREDENTIALS_PARAM: credentials})
+
+    functools.update_wrapper(tool, implementation)
+    tool.__signature__ = signature.replace(
+        parameters=[param for param in signature.parameters.values() if param.name != CREDENTIALS_PARAM]
+    )
+    return tool
+
+
+def resolve_tools(db: Session, tool_names: List[str], user_id: int) -> List[Callable]:
+    """
+    Callables for the given tool names, bound to `user_id`'s credentials.
+    Unknown or broken tools are logged and skipped so the agent still runs.
+    """
+    specs = get_tool_specs(db)
+    tools = []
+    for name in tool_names or []:
+        spec = specs.get(name)
+        if spec is None:
+            logger.warning(f"Tool '{name}' is not registered, skipping")
+            continue
+        try:
+            implementation = load_implementation(name, spec["entry_point"])
+        except Exception as e:
+            logger.error(f"Failed to load tool '{name}': {e}")
+            continue
+        service = spec["credential_service"]
+        if service and CREDENTIALS_PARAM in inspect.signature(implementation).parameters:
+            implementation = _with_credentials(implementation, user_id, service)
+        tools.append(implementation)
+    return tools
@@ -0,0 +1,366 @@
+"""
+Spoken answers for the /voice namespace.
+
+A /voice socket attaches to a /text chat and hears its answers as they are
+generated: the chat's token stream goes through a `SentenceChunker`, and each
+sentence is synthesized by a streaming TTS backend while the agent is still
+writing the next one. Audio leaves as binary `response_audio` frames, each
+sentence a complete audio file split over one or more frames:
+
+    {"turn": 3, "seq": 0, "sentence": 0, "text": "Hello there.", "mime_type": "audio/mpeg", "audio": b"..."}
+    {"turn": 3, "seq": 1, "sentence": 0, "audio": b"..."}
+    {"turn": 3, "seq": 2, "sentence": 0, "audio": b"", "last": true}
+
+- Synthesis overlaps with sending: up to VOICE_PREFETCH_SENTENCES sentences
+  are synthesized ahead of the one being sent.
+- Flow control: the client acknowledges each frame (Socket.IO ack) when it
+  arrives, and at most VOICE_MAX_INFLIGHT_FRAMES frames are unacknowledged;
+  a client that doesn't ack for VOICE_ACK_TIMEOUT is stalled and loses the
+  rest of the turn's audio rather than holding the text chat up.
+- Backpressure: a client with enough audio queued for playback sends
+  `pause_audio`, and `resume_audio` once it has played some of it. A paused
+  stream waits without a deadline, since playback can take any time.
+- Time to first audio (turn start to first frame) goes to the
+  adk_voice_time_to_first_audio_seconds metric and the turn's `voice_end`,
+  which also says whether the turn was completed, interrupted or stalled.
+
+Backends are pluggable (`TTSBackend`): ElevenLabs streaming, or `ToneTTS`,
+a local stand-in that renders a beep per word for development and tests.
+"""
+
+import asyncio
+import logging
+import math
+import re
+import struct
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Protocol
+
+from app.core.adk_config import adk_config
+from app.core.config import settings
+from app.core.metrics import VOICE_STALLS, VOICE_TIME_TO_FIRST_AUDIO
+
+logger = logging.getLogger(__name__)
+
+# A sentence ends at terminal punctuation (plus closing quotes/brackets) followed by whitespace, or at a line break
+_BOUNDARY = re.compile(r"[.!?…]+[\"')\]]*\s+|\n+")
+_CODE_BLOCK = re.compile(r"```.*?(```|$)", re.S)
+_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_URL = re.compile(r"https?://\S+")
+_MARKUP = re.compile(r"[*_#>`|~]+")
+
+
+def speakable(text: str) -> str:
+    """`text` without the markdown that shouldn't be read aloud."""
+    text = _CODE_BLOCK.sub(" ", text)
+    text = _LINK.sub(r"\1", text)
+    text = _URL.sub("", text)
+    return " ".join(_MARKUP.sub(" ", text).split())
+
+
+class SentenceChunker:
+    """Cuts a token stream into sentence-sized pieces of text to synthesize."""
+
+    def __init__(self, min_chars: int = 20, max_chars: int = 250):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def _boundary(self) -> Optional[int]:
+        match = _BOUNDARY.search(self._buffer, self.min_chars)
+        if match is not None and match.end() <= self.max_chars:
+            return match.end()
+        if len(self._buffer) <= self.max_chars:
+            return None
+        # No sentence end soon enough: split a long sentence at a pause
+        head = self._buffer[:self.max_chars]
+        for separator in (", ", "; ", ": ", " "):
+            cut = head.rfind(separator)
+            if cut >= self.min_chars:
+                return cut + len(separator)
+        return self.max_chars
+
+    def feed(self, text: str) -> List[str]:
+        """Add text; returns the chunks completed by it."""
+        self._buffer += text
+        chunks = []
+        while (cut := self._boundary()) is not None:
+            chunk, self._buffer = speakable(self._buffer[:cut]), self._buffer[cut:]
+            if chunk:
+                chunks.append(chunk)
+        return chunks
+
+    def flush(self) -> List[str]:
+        """The rest of the text, at the end of the answer."""
+        chunk, self._buffer = speakable(self._buffer), ""
+        return [chunk] if chunk else []
+
+
+class TTSBackend(Protocol):
+    name: str
+    mime_type: str
+
+    def synthesize(self, text: str, previous_text: str = "") -> AsyncIterator[bytes]:
+        """Audio of `text` as one complete file, streamed in chunks as it is produced."""
+        ...
+
+
+class ElevenLabsTTS:
+    """ElevenLabs streaming text-to-speech."""
+
+    name = "elevenlabs"
+
+    def __init__(self, api_key: str, voice_id: str, model_id: str, output_format: str):
+        self.api_key = api_key
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.output_format = output_format
+        self.mime_type = "audio/mpeg" if output_format.startswith("mp3") else "application/octet-stream"
+        self._client = None
+
+    async def synthesize(self, text: str, previous_text: str = "") -> AsyncIterator[bytes]:
+        if self._client is None:
+            from elevenlabs.client import AsyncElevenLabs
+            self._client = AsyncElevenLabs(api_key=self.api_key)
+        async for chunk in self._client.text_to_speech.stream(
+            self.voice_id,
+            text=text,
+            model_id=self.model_id,
+            output_format=self.output_format,
+            # Keeps intonation continuous across separately synthesized sentences
+            previous_text=previous_text or None,
+        ):
+            if chunk:
+                yield chunk
+
+
+class ToneTTS:
+    """Local stand-in: a WAV file with a short beep per word (silence if frequency is 0)."""
+
+    name = "tone"
+    mime_type = "audio/wav"
+
+    def __init__(self, frequency: float = 440.0, word_seconds: float = 0.18, gap_seconds: float = 0.06,
+                 sample_rate: int = 16000, chunk_seconds: float = 0.1, delay_seconds: float = 0.0):
+        self.sample_rate = sample_rate
+        self.chunk_bytes = int(sample_rate * chunk_seconds) * 2
+        self.delay_seconds = delay_seconds  # simulated time to first byte
+        samples = int(sample_rate * word_seconds)
+        self._word = b"".join(
+            struct.pack("<h", int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate))) for i in range(samples)
+        ) + bytes(int(sample_rate * gap_seconds) * 2)
+
+    def _header(self, data_bytes: int) -> bytes:
+        return struct.pack(
+            "<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data_bytes, b"WAVE", b"fmt ", 16, 1, 1,
+            self.sample_rate, self.sample_rate * 2, 2, 16, b"data", data_bytes,
+        )
+
+    async def synthesize(self, text: str, previous_text: str = "") -> AsyncIterator[bytes]:
+        if self.delay_seconds:
+            await asyncio.sleep(self.delay_seconds)
+        pcm = self._word * max(1, len(text.split()))
+        yield self._header(len(pcm))
+        for start in range(0, len(pcm), self.chunk_bytes):
+            await asyncio.sleep(0)
+            yield pcm[start:start + self.chunk_bytes]
+
+
+_backend: Optional[TTSBackend] = None
+
+
+def get_tts_backend() -> Optional[TTSBackend]:
+    """The configured backend, shared by all voice sockets; None if it isn't usable (e.g. no ElevenLabs key)."""
+    global _backend
+    if _backend is None:
+        if settings.VOICE_TTS_BACKEND == "tone":
+            _backend = ToneTTS()
+        elif settings.VOICE_TTS_BACKEND == "elevenlabs" and settings.ELEVENLABS_API_KEY:
+            _backend = ElevenLabsTTS(
+                settings.ELEVENLABS_API_KEY, settings.ELEVENLABS_VOICE_ID,
+                settings.ELEVENLABS_MODEL_ID, settings.ELEVENLABS_OUTPUT_FORMAT,
+            )
+    return _backend
+
+
+class VoiceStalled(Exception):
+    """The client stopped acknowledging audio frames."""
+
+
+# (event, payload, ack callback) -> sent to the voice socket
+Emitter = Callable[[str, Dict[str, Any], Optional[Callable]], Awaitable[None]]
+
+
+class _SpokenTurn:
+    def __init__(self, number: int, started: float, max_inflight: int):
+        self.number = number
+        self.started = started
+        self.sentences: asyncio.Queue = asyncio.Queue()
+        self.credits = asyncio.Semaphore(max_inflight)
+        self.task: Optional[asyncio.Task] = None
+        self.first_audio: Optional[float] = None
+        self.spoken = 0
+        self.frames = 0
+        self.audio_bytes = 0
+
+
+class VoiceStream:
+    """Speaks the turns of one chat to one /voice socket."""
+
+    def __init__(
+        self,
+        emit: Emitter,
+        tts: TTSBackend,
+        max_inflight: int = 8,
+        ack_timeout: float = 10.0,
+        prefetch: int = 2,
+        min_chars: int = 20,
+        max_chars: int = 250,
+    ):
+        self.tts = tts
+        self.max_inflight = max_inflight
+        self.ack_timeout = ack_timeout
+        self.prefetch = prefetch
+        self._emit = emit
+        self._min_chars = min_chars
+        self._max_chars = max_chars
+        self._chunker = SentenceChunker(min_chars, max_chars)
+        self._turn: Optional[_SpokenTurn] = None  # turn whose text is still coming in
+        self._speaking: Optional[_SpokenTurn] = None  # latest turn, possibly still being spoken
+        self._turns = 0
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+
+    def begin_turn(self):
+        """A turn started; time to first audio is measured from here."""
+        self.interrupt()
+        self._turns += 1
+        self._chunker = SentenceChunker(self._min_chars, self._max_chars)
+        turn = _SpokenTurn(self._turns, time.monotonic(), self.max_inflight)
+        turn.task = asyncio.create_task(self._speak(turn))
+        self._turn = self._speaking = turn
+
+    def feed(self, text: str):
+        """Text of the current answer as it streams in."""
+        if self._turn is None:
+            self.begin_turn()  # attached mid-turn, or a fallback answer after the turn ended
+        for sentence in self._chunker.feed(text):
+            self._turn.sentences.put_nowait(sentence)
+
+    def end_turn(self):
+        """The answer is complete; the rest is spoken and the turn ends with `voice_end`."""
+        if self._turn is None:
+            return
+        for sentence in self._chunker.flush():
+            self._turn.sentences.put_nowait(sentence)
+        self._turn.sentences.put_nowait(None)
+        self._turn = None
+
+    def interrupt(self):
+        """Stop speaking the current turn (cancelled turn, or the user talked over it)."""
+        # The answer's text usually ends long before its audio, so this is
+        # the turn being spoken, not just the one being written
+        turn, self._turn, self._speaking = self._speaking, None, None
+        if turn is not None and turn.task is not None:
+            turn.task.cancel()
+
+    def pause(self):
+        """The client has enough audio queued; hold further frames until `resume`."""
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def on_chat_event(self, event: str, payload: Optional[Dict[str, Any]]):
+        """Follow the chat's turn events: answer text is spoken, a cancelled turn goes quiet."""
+        if event == 'token':
+            self.feed(payload['token'])
+        elif event == 'stream_end':
+            if (payload or {}).get('cancelled'):
+                self.interrupt()
+            else:
+                self.end_turn()
+
+    def close(self):
+        self.interrupt()
+
+    async def _synthesize(self, sentence: str, previous: str, chunks: asyncio.Queue):
+        try:
+            async for chunk in self.tts.synthesize(sentence, previous):
+                chunks.put_nowait(chunk)
+        except Exception as e:
+            logger.warning(f"Speech synthesis ({self.tts.name}) failed for a sentence: {e}")
+        finally:
+            chunks.put_nowait(None)
+
+    async def _send(self, turn: _SpokenTurn, payload: Dict[str, Any]):
+        # Playing back queued audio isn't a stall: only the ack wait has a deadline
+        await self._resumed.wait()
+        try:
+            await asyncio.wait_for(turn.credits.acquire(), self.ack_timeout)
+        except asyncio.TimeoutError:
+            raise VoiceStalled from None
+        payload.update({"turn": turn.number, "seq": turn.frames})
+        turn.frames += 1
+        await self._emit('response_audio', payload, lambda *_: turn.credits.release())
+
+    async def _speak(self, turn: _SpokenTurn):
+        # Synthesis runs `prefetch` sentences ahead of the one being sent
+        pending: asyncio.Queue = asyncio.Queue(maxsize=max(1, self.prefetch))
+        jobs: List[asyncio.Task] = []
+
+        async def synthesize_ahead():
+            previous = ""
+            while (sentence := await turn.sentences.get()) is not None:
+                chunks: asyncio.Queue = asyncio.Queue()
+                await pending.put((sentence, chunks))
+                jobs.append(asyncio.create_task(self._synthesize(sentence, previous, chunks)))
+                previous = sentence
+            await pending.put(None)
+
+        producer = asyncio.create_task(synthesize_ahead())
+        outcome = "completed"
+        try:
+            while (job := await pending.get()) is not None:
+                sentence, chunks = job
+                header = {"sentence": turn.spoken, "text": sentence, "mime_type": self.tts.mime_type}
+                while (chunk := await chunks.get()) is not None:
+                    if turn.first_audio is None:
+                        turn.first_audio = time.monotonic() - turn.started
+                        VOICE_TIME_TO_FIRST_AUDIO.labels(backend=self.tts.name).observe(turn.first_audio)
+                    await self._send(turn, {**header, "audio": chunk})
+                    header = {"sentence": turn.spoken}
+                    turn.audio_bytes += len(chunk)
+                await self._send(turn, {"sentence": turn.spoken, "audio": b"", "last": True})
+                turn.spoken += 1
+        except VoiceStalled:
+            outcome = "stalled"
+            VOICE_STALLS.inc()
+            logger.warning(f"Voice client stopped acknowledging audio, dropping the rest of turn {turn.number}")
+        except asyncio.CancelledError:
+            # Interrupted: the client is told below so it can drop queued audio
+            outcome = "interrupted"
+        finally:
+            producer.cancel()
+            for job in jobs:
+                job.cancel()
+            await asyncio.gather(producer, *jobs, return_exceptions=True)
+            await self._emit('voice_end', {
+                "turn": turn.number,
+                "status": outcome,
+                "sentences": turn.spoken,
+                "audio_bytes": turn.audio_bytes,
+                "time_to_first_audio": round(turn.first_audio, 3) if turn.first_audio is not None else None,
+            }, None)
+
+
+def create_voice_stream(emit: Emitter, tts: TTSBackend) -> VoiceStream:
+    return VoiceStream(
+        emit,
+        tts,
+        max_inflight=adk_config.VOICE_MAX_INFLIGHT_FRAMES,
+        ack_timeout=adk_config.VOICE_ACK_TIMEOUT,
+        prefetch=adk_config.VOICE_PREFETCH_SENTENCES,
+        min_chars=adk_config.VOICE_CHUNK_MIN_CHARS,
+        max_chars=adk_config.VOICE_CHUNK_MAX_CHARS,
+    )
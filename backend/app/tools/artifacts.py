@@ -0,0 +1,91 @@
+"""
+Large tool outputs as artifacts.
+
+`offload_output` stores a tool result bigger than ARTIFACT_INLINE_LIMIT bytes
+as a session artifact and returns a compact handle with an extractive
+summary instead, which keeps it out of the session history and later prompts.
+`read_artifact_tool` lets the model page through a stored output; agents
+with tools get it automatically.
+"""
+
+import hashlib
+import json
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from app.core.adk_config import adk_config
+from app.core.config import settings
+from app.services.tool_events import compress_text
+
+if TYPE_CHECKING:
+    from google.adk.tools import ToolContext
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_TOKENS = 150
+READ_MAX_BYTES = 16_000
+
+
+async def offload_output(tool_context: Optional["ToolContext"], tool_name: str, output: Any, query: str = "") -> Any:
+    """Return `output` as is if small, else save it and return a handle plus a summary relevant to `query`."""
+    text = output if isinstance(output, str) else json.dumps(output, default=str, ensure_ascii=False)
+    data = text.encode("utf-8")
+    if tool_context is None or len(data) <= settings.ARTIFACT_INLINE_LIMIT:
+        return output
+
+    from google.genai import types
+    mime_type = "text/plain" if isinstance(output, str) else "application/json"
+    filename = f"{tool_name}-{hashlib.sha256(data).hexdigest()[:12]}"
+    try:
+        version = await tool_context.save_artifact(filename, types.Part.from_bytes(data=data, mime_type=mime_type))
+    except Exception as e:
+        # No artifact service, over quota, disk full: inline is still correct
+        logger.warning(f"Could not store {tool_name} output as an artifact, inlining it: {e}")
+        return output
+    return {
+        "artifact": filename,
+        "version": version,
+        "size_bytes": len(data),
+        "summary": compress_text(text, SUMMARY_TOKENS, query),
+        "note": "Full output stored as an artifact; call read_artifact with its name to read more.",
+    }
+
+
+async def read_artifact_tool(name: str, offset: int = 0, length: int = 4000, tool_context: Optional["ToolContext"] = None) -> Dict[str, Any]:
+    """Read part of a stored tool output: `length` bytes starting at byte `offset`."""
+    if tool_context is None:
+        return {"status": "error", "error_message": "Artifacts are not available here."}
+    # Pages stay within the tool's output budget so they are never compressed
+    # (which would break next_offset); ~3 bytes per token leaves room for escaping
+    budget = adk_config.get_tool_output_budget("read_artifact_tool")
+    length = max(1, min(length, READ_MAX_BYTES, budget * 3 if budget > 0 else READ_MAX_BYTES))
+    offset = max(0, offset)
+    # ToolContext exposes whole-artifact loads only; slices go to the service directly
+    invocation = tool_context._invocation_context
+    service = invocation.artifact_service
+    if service is None:
+        return {"status": "error", "error_message": "Artifacts are not available here."}
+
+    if hasattr(service, "read_range"):
+        found = await service.read_range(
+            app_name=invocation.app_name, user_id=invocation.user_id, session_id=invocation.session.id,
+            filename=name, offset=offset, length=length,
+        )
+        if found is None:
+            return {"status": "error", "error_message": f"No artifact named '{name}'."}
+        data, size, _ = found
+    else:
+        part = await tool_context.load_artifact(name)
+        if part is None or part.inline_data is None:
+            return {"status": "error", "error_message": f"No artifact named '{name}'."}
+        size = len(part.inline_data.data)
+        data = part.inline_data.data[offset:offset + length]
+
+    end = offset + len(data)
+    return {
+        "status": "success",
+        "content": data.decode("utf-8", errors="ignore"),  # a slice may split a character
+        "offset": offset,
+        "next_offset": end if end < size else None,
+        "size_bytes": size,
+    }
@@ -0,0 +1,68 @@
+"""
+Built-in tools, referenced from the `tools` table by entry point
+(e.g. "app.tools.builtin:tavily_search_tool").
+
+`credentials` is filled in by the tool registry with the calling user's
+integration for the tool's service, or None to use the platform keys. It is
+hidden from the model, as is ADK's `tool_context`.
+"""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from app.services.tool_events import report_progress
+from app.tools.artifacts import offload_output
+from app.tools.google_tool import tavily_search, send_sms
+
+if TYPE_CHECKING:
+    from google.adk.tools import ToolContext
+
+logger = logging.getLogger(__name__)
+
+
+async def tavily_search_tool(
+    query: str,
+    tool_context: Optional["ToolContext"] = None,
+    credentials: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Search tool using Tavily for web search capabilities."""
+    credentials = credentials or {}
+    try:
+        await report_progress(tool_context, "Searching the web", 0.0)
+        result = await asyncio.to_thread(tavily_search, query, api_key=credentials.get("api_key") or credentials.get("token"))
+        await report_progress(tool_context, f"Received {len(result)} characters of results", 0.8)
+        # Long results go to an artifact; the model gets a handle and a summary
+        return {
+            "status": "success",
+            "result": await offload_output(tool_context, "tavily_search", result, query)
+        }
+    except Exception as e:
+        logger.error(f"Tavily search error: {e}")
+        return {
+            "status": "error",
+            "error_message": str(e)
+        }
+
+
+def send_sms_tool(to_number: str, message: str, credentials: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """SMS tool using Twilio for sending text messages."""
+    credentials = credentials or {}
+    try:
+        result = send_sms(
+            to_number,
+            message,
+            account_sid=credentials.get("account_sid"),
+            auth_token=credentials.get("auth_token") or credentials.get("token"),
+            from_number=credentials.get("phone_number"),
+        )
+        return {
+            "status": "success",
+            "result": result
+        }
+    except Exception as e:
+        logger.error(f"SMS send error: {e}")
+        return {
+            "status": "error",
+            "error_message": str(e)
+        }
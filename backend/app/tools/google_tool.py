@@ -1,21 +1,31 @@
-from tavily import TavilyClient
-from twilio.rest import Client
+from typing import Optional
+
 from app.core.config import settings
 
-def tavily_search(query: str) -> str:
+# Vendor SDKs are imported on first call so they stay off the app's import path
+
+def tavily_search(query: str, api_key: Optional[str] = None) -> str:
     """Finds real-time information on the internet."""
     try:
-        tavily = TavilyClient(api_key=settings.TAVILY_API_KEY)
+        from tavily import TavilyClient
+        tavily = TavilyClient(api_key=api_key or settings.TAVILY_API_KEY)
         response = tavily.search(query=query, search_depth="basic")
         return "\n".join([f"Source: {obj['url']}\nContent: {obj['content']}" for obj in response['results'][:3]])
     except Exception as e:
         return f"Tavily search failed: {e}"
 
-def send_sms(to_number: str, body: str) -> str:
+def send_sms(
+    to_number: str,
+    body: str,
+    account_sid: Optional[str] = None,
+    auth_token: Optional[str] = None,
+    from_number: Optional[str] = None,
+) -> str:
     """Sends an SMS message to a specified phone number."""
     try:
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-        message = client.messages.create(body=body, from_=settings.TWILIO_PHONE_NUMBER, to=to_number)
+        from twilio.rest import Client
+        client = Client(account_sid or settings.TWILIO_ACCOUNT_SID, auth_token or settings.TWILIO_AUTH_TOKEN)
+        message = client.messages.create(body=body, from_=from_number or settings.TWILIO_PHONE_NUMBER, to=to_number)
         return f"SMS sent successfully. Message SID: {message.sid}"
     except Exception as e:
-        return f"Failed to send SMS. Error: {str(e)}"
\ No newline at end of file
+        return f"Failed to send SMS. Error: {str(e)}"
@@ -1,7 +1,6 @@
 from langchain.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
-from twilio.rest import Client
 from app.core.config import settings
 
 class SendSmsInput(BaseModel):
@@ -19,6 +18,7 @@ class TwilioSmsTool(BaseTool):
     def _run(self, to_number: str, body: str) -> str:
         """Use the tool."""
         try:
+            from twilio.rest import Client
             client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
             message = client.messages.create(
                 body=body,
@@ -0,0 +1,84 @@
+"""
+Background worker: runs the scheduled jobs and the Stripe webhook inbox
+outside the API processes.
+
+    python -m app.worker              # run until SIGINT/SIGTERM
+    python -m app.worker --job NAME   # run one job now and exit
+    python -m app.worker --list       # show the job table
+
+When it is deployed, set SCHEDULER_ENABLED=false and STRIPE_INBOX_WORKER=false
+on the API. Job leases make running both harmless, just redundant.
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.core.config import settings
+from app.core.logging_config import setup_logging
+from app.db.base import SessionLocal, engine
+from app.db.migrations import run_migrations
+from app.db.models import ScheduledJob
+from app.services import jobs, stripe_inbox  # noqa: F401 - registers the jobs
+from app.services.scheduler import JOBS, Scheduler
+
+logger = logging.getLogger(__name__)
+
+
+async def run_forever():
+    scheduler = Scheduler(run_shared=True)
+    scheduler.start()
+    stripe_inbox.start_worker()
+    logger.info(f"Worker {scheduler.worker_id} started with jobs: {', '.join(sorted(JOBS))}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    logger.info("Worker stopping, waiting for running jobs")
+    await stripe_inbox.stop_worker()
+    await scheduler.stop()
+
+
+def list_jobs():
+    db = SessionLocal()
+    try:
+        rows = {row.name: row for row in db.query(ScheduledJob).all()}
+    finally:
+        db.close()
+    for name, spec in sorted(JOBS.items()):
+        row = rows.get(name)
+        if spec.local:
+            print(f"{name:<26}{spec.schedule.expression:<16}(per process)")
+        elif row is None:
+            print(f"{name:<26}{spec.schedule.expression:<16}(not scheduled yet)")
+        else:
+            print(
+                f"{name:<26}{row.schedule:<16}next {row.next_run_at}  last {row.last_status or '-'}"
+                f" ({row.last_duration_seconds or 0:.1f}s)  lease {row.lease_owner or '-'}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--job", choices=sorted(JOBS), help="run one job now and exit")
+    parser.add_argument("--list", action="store_true", help="show the job table and exit")
+    args = parser.parse_args()
+
+    setup_logging()
+    settings.validate()
+    run_migrations(engine)
+
+    if args.list:
+        list_jobs()
+    elif args.job:
+        asyncio.run(Scheduler().run_job(args.job))
+    else:
+        asyncio.run(run_forever())
+
+
+if __name__ == "__main__":
+    main()
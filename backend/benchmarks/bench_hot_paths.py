@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the backend hot paths.
+
+Runs against a throwaway SQLite database filled by the fixtures below and
+fakes the Socket.IO server, so nothing touches the network:
+
+    agent_create          create_adk_agent with two registry tools
+    session_setup         setup_adk_session (agent + Runner + ADK session)
+    runner_events         process_runner_events over a synthetic 1k-token turn
+    chat_message_insert   crud_chat.create_chat_message, one commit per message
+    history_10k           get_chat_history_for_agent on an agent with 10k messages
+    history_100k          the same with 100k messages
+    platform_analytics    get_platform_analytics over 1M messages (rolled up)
+    current_user_cached   get_current_user with the user cache warm
+    current_user_cold     get_current_user with the user cache cleared per call
+
+Each benchmark reports min/median/p95 per call. With --update-baseline the
+medians are written to the baseline file (per machine: record it on the
+reference box and commit it); otherwise they are compared to it and the
+script exits 1 when a median is more than its threshold slower.
+
+Dataset sizes scale with --scale (e.g. 0.01 for a quick run); baselines
+are only compared at the scale they were recorded with.
+
+Usage: python benchmarks/bench_hot_paths.py [--only NAME ...] [--scale 1.0]
+           [--baseline PATH] [--update-baseline] [--threshold 0.25] [--json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines", "hot_paths.json")
+DEFAULT_THRESHOLD = 0.25
+
+# Settings are read at import time: point the app at a scratch database (and stores) first
+_db_dir = tempfile.mkdtemp(prefix="bench_hot_paths_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'bench.db')}")
+os.environ.setdefault("ARTIFACT_DIR", os.path.join(_db_dir, "artifacts"))
+os.environ.setdefault("ARCHIVE_DIR", os.path.join(_db_dir, "archive"))
+os.environ.setdefault("ENCRYPTION_KEY", "00" * 32)
+os.environ.setdefault("GOOGLE_CLIENT_ID", "bench")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "bench")
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from app.api import deps
+from app.core.adk_config import adk_config
+from app.core.security import create_access_token
+from app.crud import crud_chat, crud_stats
+from app.db import models
+from app.db.base import SessionLocal, engine
+from app.db.migrations import run_migrations
+from app.schemas.chat import ChatMessageCreate
+from app.services import adk_agent_service
+from app.services.entity_cache import user_cache
+from app.services.stream_buffer import TurnStreamBuffer
+
+WORDS = (
+    "The agent looked up the latest figures and found that the quarterly "
+    "revenue grew by twelve percent while operating costs stayed flat"
+).split()
+
+BENCHMARKS = {}
+
+
+def benchmark(name, rounds, warmup=3, threshold=DEFAULT_THRESHOLD):
+    """Register `setup(ds)`; it returns the callable (sync or async) to time."""
+    def register(func):
+        BENCHMARKS[name] = {"setup": func, "rounds": rounds, "warmup": warmup, "threshold": threshold}
+        return func
+    return register
+
+
+# --- Fixtures ---
+
+class Dataset:
+    """Users, agents and messages shared by the benchmarks, created once."""
+
+    def __init__(self, scale):
+        self.scale = scale
+        self.history_sizes = {"history_10k": max(1, int(10_000 * scale)), "history_100k": max(1, int(100_000 * scale))}
+        self.total_messages = max(sum(self.history_sizes.values()), int(1_000_000 * scale))
+        self.cleanup = []  # closers for sessions held open by benchmarks
+
+    def build(self):
+        run_migrations(engine)
+        db = SessionLocal()
+        try:
+            import seed
+            with contextlib.redirect_stdout(io.StringIO()):
+                seed.seed_initial_data(db)
+            self.user = models.User(email="bench@example.com", full_name="Bench", hashed_password="x")
+            db.add(self.user)
+            db.flush()
+            self.agents = {}
+            for name in ("insert", "history_10k", "history_100k", "bulk"):
+                agent = models.Agent(
+                    name=name, system_prompt="You are a helpful assistant.",
+                    tools=["tavily_search", "send_sms"], owner_id=self.user.id,
+                )
+                db.add(agent)
+                db.flush()
+                self.agents[name] = agent.id
+            db.commit()
+            self.user_id, self.email = self.user.id, self.user.email
+        finally:
+            db.close()
+
+        bulk = self.total_messages - sum(self.history_sizes.values())
+        for name, count in list(self.history_sizes.items()) + [("bulk", bulk)]:
+            self._insert_messages(self.agents[name], count)
+        # What the analytics_rollup job maintains in production
+        db = SessionLocal()
+        try:
+            crud_stats.rollup_daily_analytics(db)
+        finally:
+            db.close()
+
+    def _insert_messages(self, agent_id, count, chunk=20_000):
+        """Alternating user/ai messages spread over the last 90 days."""
+        now = datetime.now(timezone.utc)
+        table = models.ChatMessage.__table__
+        step = timedelta(days=90) / max(count, 1)
+        with engine.begin() as conn:
+            for offset in range(0, count, chunk):
+                rows = []
+                for i in range(offset, min(count, offset + chunk)):
+                    ai = i % 2 == 1
+                    rows.append({
+                        "agent_id": agent_id,
+                        "user_id": self.user_id,
+                        "role": "ai" if ai else "user",
+                        "content": " ".join(WORDS[(i + k) % len(WORDS)] for k in range(12)),
+                        "timestamp": now - timedelta(days=90) + step * i,
+                        "response_time_seconds": 1.5 if ai else None,
+                        "token_usage": {"total_tokens": 120} if ai else None,
+                    })
+                conn.execute(table.insert(), rows)
+
+
+def synthetic_runner_events(n_tokens):
+    """ADK events for one turn: a tool call, its response, then streamed text."""
+    from google.adk.events import Event
+    from google.genai import types
+
+    events = [
+        Event(author="agent", content=types.Content(role="model", parts=[
+            types.Part(function_call=types.FunctionCall(name="tavily_search", args={"query": "quarterly revenue"})),
+        ])),
+        Event(author="agent", content=types.Content(role="user", parts=[
+            types.Part(function_response=types.FunctionResponse(name="tavily_search", response={"result": "..."})),
+        ])),
+    ]
+    for i in range(n_tokens):
+        events.append(Event(author="agent", content=types.Content(role="model", parts=[
+            types.Part(text=WORDS[i % len(WORDS)] + " "),
+        ])))
+    events.append(Event(author="agent"))
+    return events
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _fake_emit(event, data=None, to=None, namespace=None):
+    return None
+
+
+# --- Benchmarks ---
+
+AGENT_CONFIG = {"instructions": "You are a helpful assistant.", "tools": ["tavily_search", "send_sms"]}
+
+
+@benchmark("agent_create", rounds=200)
+def bench_agent_create(ds):
+    db = SessionLocal()
+    ds.cleanup.append(db.close)
+    return lambda: adk_agent_service.create_adk_agent(AGENT_CONFIG, ds.user_id, "bench", db=db)
+
+
+@benchmark("session_setup", rounds=200)
+def bench_session_setup(ds):
+    db = SessionLocal()
+    ds.cleanup.append(db.close)
+    counter = iter(range(10 ** 9))
+
+    async def run():
+        # A fresh agent id per call: session ids are unique per agent and user
+        await adk_agent_service.setup_adk_session(AGENT_CONFIG, ds.user_id, f"bench{next(counter)}", db=db)
+    return run
+
+
+@benchmark("runner_events", rounds=50)
+def bench_runner_events(ds):
+    events = synthetic_runner_events(1000)
+    sid = "bench-sid"
+    adk_agent_service.sio.emit = _fake_emit
+    adk_agent_service.chat_to_sid[sid] = sid
+
+    async def run():
+        adk_agent_service.chat_streams[sid] = TurnStreamBuffer(maxlen=adk_config.STREAM_BUFFER_SIZE)
+        await adk_agent_service.process_runner_events(_aiter(events), sid, {"response": ""}, [])
+    return run
+
+
+@benchmark("chat_message_insert", rounds=500)
+def bench_chat_message_insert(ds):
+    db = SessionLocal()
+    ds.cleanup.append(db.close)
+    message = ChatMessageCreate(
+        agent_id=ds.agents["insert"], user_id=ds.user_id, role="ai", content=" ".join(WORDS),
+        response_time_seconds=1.5, token_usage={"total_tokens": 120},
+    )
+    return lambda: crud_chat.create_chat_message(db, message)
+
+
+def _history(name):
+    def setup(ds):
+        def run():
+            db = SessionLocal()
+            try:
+                return crud_chat.get_chat_history_for_agent(db, ds.agents[name], ds.user_id)
+            finally:
+                db.close()
+        return run
+    return setup
+
+
+benchmark("history_10k", rounds=20)(_history("history_10k"))
+benchmark("history_100k", rounds=5, warmup=1)(_history("history_100k"))
+
+
+@benchmark("platform_analytics", rounds=100)
+def bench_platform_analytics(ds):
+    def run():
+        db = SessionLocal()
+        try:
+            return crud_stats.get_platform_analytics(db)
+        finally:
+            db.close()
+    return run
+
+
+def _current_user(cold):
+    def setup(ds):
+        token = create_access_token({"sub": ds.email})
+
+        def run():
+            if cold:
+                user_cache.clear()
+            db = SessionLocal()
+            try:
+                return deps.get_current_user(token=token, db=db)
+            finally:
+                db.close()
+        return run
+    return setup
+
+
+benchmark("current_user_cached", rounds=2000, warmup=20)(_current_user(cold=False))
+benchmark("current_user_cold", rounds=2000, warmup=20)(_current_user(cold=True))
+
+
+# --- Runner ---
+
+def time_calls(func, rounds, warmup, loop):
+    is_async = asyncio.iscoroutinefunction(func)
+
+    def call():
+        return loop.run_until_complete(func()) if is_async else func()
+
+    for _ in range(warmup):
+        call()
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "rounds": rounds,
+        "min_ms": samples[0] * 1000,
+        "median_ms": statistics.median(samples) * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+    }
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, scale, default_threshold):
+    """Mark each result with its baseline; returns the names that regressed."""
+    if baseline is None or baseline.get("scale") != scale:
+        return []
+    regressed = []
+    for name, result in results.items():
+        recorded = baseline["benchmarks"].get(name)
+        if recorded is None:
+            continue
+        threshold = recorded.get("threshold", default_threshold)
+        result["baseline_ms"] = recorded["median_ms"]
+        result["change"] = result["median_ms"] / recorded["median_ms"] - 1
+        if result["change"] > threshold:
+            regressed.append(name)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for dataset sizes")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="write the medians as the new baseline")
+    parser.add_argument("--threshold", type=float, default=None, help="allowed slowdown for every benchmark (0.25 = 25%%)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    ds = Dataset(args.scale)
+    started = time.perf_counter()
+    ds.build()
+    if not args.json:
+        print(f"fixtures: {ds.total_messages} messages in {time.perf_counter() - started:.1f}s")
+
+    loop = asyncio.new_event_loop()
+    results = {}
+    try:
+        for name in args.only or BENCHMARKS:
+            spec = BENCHMARKS[name]
+            func = spec["setup"](ds)
+            results[name] = time_calls(func, spec["rounds"], spec["warmup"], loop)
+            results[name]["threshold"] = args.threshold if args.threshold is not None else spec["threshold"]
+            if not args.json:
+                r = results[name]
+                print(f"{name:22s} median {r['median_ms']:9.3f} ms   min {r['min_ms']:9.3f} ms   p95 {r['p95_ms']:9.3f} ms")
+    finally:
+        for close in ds.cleanup:
+            close()
+        loop.close()
+
+    if args.update_baseline:
+        baseline = load_baseline(args.baseline) or {"benchmarks": {}}
+        if baseline.get("scale") != args.scale:
+            baseline["benchmarks"] = {}  # medians at another scale aren't comparable
+        baseline.update(scale=args.scale, python=platform.python_version(), machine=platform.platform(),
+                        recorded_at=datetime.now(timezone.utc).isoformat(timespec="seconds"))
+        for name, r in results.items():
+            baseline["benchmarks"][name] = {"median_ms": r["median_ms"], "threshold": r["threshold"]}
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        regressed = []
+    else:
+        baseline = load_baseline(args.baseline)
+        # An explicit --threshold overrides the recorded ones
+        if baseline is not None and args.threshold is not None:
+            for recorded in baseline["benchmarks"].values():
+                recorded["threshold"] = args.threshold
+        regressed = compare(results, baseline, args.scale, DEFAULT_THRESHOLD)
+
+    if args.json:
+        print(json.dumps({"scale": args.scale, "benchmarks": results, "regressed": regressed}, indent=2))
+    else:
+        if args.update_baseline:
+            print(f"baseline written to {args.baseline}")
+        elif baseline is None:
+            print(f"no baseline at {args.baseline} (record one with --update-baseline)")
+        elif baseline.get("scale") != args.scale:
+            print(f"baseline was recorded at scale {baseline.get('scale')}, not compared")
+        else:
+            for name, r in results.items():
+                if "change" in r:
+                    flag = "  REGRESSION" if name in regressed else ""
+                    print(f"{name:22s} {r['change']:+7.1%} vs {r['baseline_ms']:.3f} ms{flag}")
+    if regressed:
+        print(f"regressed: {', '.join(regressed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the API process.
+
+Times, in fresh interpreters, `import app.main` and `create_app()` (what a
+uvicorn worker or `--reload` restart pays before serving), and lists the
+slowest modules from `python -X importtime`. Vendor SDKs that should stay
+off the import path (google.adk, stripe, sentry_sdk, ...) are reported if
+they were loaded.
+
+Usage: python benchmarks/bench_import_time.py [--rounds 5] [--top 15] [--budget-ms N] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Modules that must only load on first use
+LAZY_MODULES = ("google.adk", "google.genai", "stripe", "sentry_sdk", "twilio", "tavily", "langchain")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+app.main.create_app()
+built = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (built - imported) * 1000,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def probe_env():
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, PYTHONDONTWRITEBYTECODE="1")
+    # Placeholder settings so the import doesn't depend on a real .env
+    env.setdefault("DATABASE_URL", "sqlite://")
+    env.setdefault("ENCRYPTION_KEY", "00" * 32)
+    env.setdefault("GOOGLE_CLIENT_ID", "bench")
+    env.setdefault("GOOGLE_CLIENT_SECRET", "bench")
+    return env
+
+
+def run_probe(env):
+    out = subprocess.run([sys.executable, "-c", PROBE], env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_modules(env, top):
+    """Top-level-ish modules by cumulative import time (microseconds)."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package", nesting shown by indentation
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if len(name) - len(name.lstrip()) <= 5:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, help="exit non-zero if import + create_app exceeds this")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    env = probe_env()
+    runs = [run_probe(env) for _ in range(args.rounds)]
+    results = {
+        "import_ms": round(min(run["import_ms"] for run in runs), 1),
+        "create_app_ms": round(min(run["create_app_ms"] for run in runs), 1),
+        "lazy_modules_loaded": runs[0]["loaded"],
+        "slowest_modules_ms": {name: round(us / 1000, 1) for us, name in slowest_modules(env, args.top)},
+    }
+    total = results["import_ms"] + results["create_app_ms"]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"import app.main   {results['import_ms']:>8} ms")
+        print(f"create_app()      {results['create_app_ms']:>8} ms")
+        print(f"total             {round(total, 1):>8} ms  (best of {args.rounds})")
+        if results["lazy_modules_loaded"]:
+            print(f"loaded eagerly:   {', '.join(results['lazy_modules_loaded'])}")
+        print("\nslowest imports (cumulative):")
+        for name, ms in results["slowest_modules_ms"].items():
+            print(f"  {ms:>8} ms  {name}")
+
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"cold start {total:.0f} ms exceeds budget {args.budget_ms:.0f} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
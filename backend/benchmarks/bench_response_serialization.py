@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Serialization and compression benchmark for large REST responses.
+
+Serves a synthetic chat history (schemas.chat.ChatMessage, as returned by
+GET /agents/{id}/history) from a minimal FastAPI app through
+CompressionMiddleware, and times full requests for each serializer and
+Accept-Encoding:
+
+  jsonable   - jsonable_encoder + JSONResponse (json.dumps)
+  pydantic   - response_model with the default response class (Pydantic dump_json)
+  orjson     - plain dicts with ORJSONResponse
+
+Reports wall-clock milliseconds per request and bytes on the wire.
+
+Usage: python benchmarks/bench_response_serialization.py [--messages 10000] [--rounds 5] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.api.middleware import CompressionMiddleware, brotli
+from app.api.responses import ORJSONResponse
+from app.schemas.chat import ChatMessage
+
+TEXT = (
+    "The agent looked up the latest figures and found that the quarterly "
+    "revenue grew by twelve percent while operating costs stayed flat. "
+)
+
+
+def synthetic_history(n_messages):
+    start = datetime(2025, 1, 1)
+    messages = []
+    for i in range(n_messages):
+        is_agent = i % 2 == 1
+        messages.append({
+            "id": i + 1,
+            "agent_id": 1,
+            "user_id": 1,
+            "role": "agent" if is_agent else "user",
+            "content": TEXT * (4 if is_agent else 1),
+            "timestamp": start + timedelta(seconds=30 * i),
+            "response_time_seconds": 1.25 if is_agent else None,
+            "tool_calls": [{"name": "tavily_search", "args": {"query": "quarterly revenue"}}] if is_agent else None,
+            "token_usage": {"prompt_tokens": 812, "completion_tokens": 164, "total_tokens": 976} if is_agent else None,
+            "status": "complete" if is_agent else None,
+        })
+    return messages
+
+
+def build_app(messages):
+    models = [ChatMessage(**message) for message in messages]
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/jsonable")
+    def jsonable():
+        return JSONResponse(jsonable_encoder(models))
+
+    @app.get("/pydantic", response_model=List[ChatMessage])
+    def pydantic():
+        return models
+
+    @app.get("/orjson")
+    def orjson_dicts():
+        return ORJSONResponse(messages)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    client = TestClient(build_app(synthetic_history(args.messages)))
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    results = {}
+    for path in ("jsonable", "pydantic", "orjson"):
+        for encoding in encodings:
+            headers = {"Accept-Encoding": encoding}
+            timings = []
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                response = client.get(f"/{path}", headers=headers)
+                timings.append(time.perf_counter() - started)
+            results[f"{path}+{encoding}"] = {
+                "ms": round(min(timings) * 1000, 1),
+                # The client decodes the body, so the wire size comes from the header
+                "bytes": int(response.headers["content-length"]),
+            }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    baseline = results["jsonable+identity"]
+    print(f"{'mode':<20}{'ms/request':>12}{'vs before':>11}{'bytes':>12}{'vs before':>11}")
+    for label, result in results.items():
+        print(
+            f"{label:<20}{result['ms']:>12}{result['ms'] / baseline['ms']:>10.0%}"
+            f"{result['bytes']:>12}{result['bytes'] / baseline['bytes']:>10.0%}"
+        )
+    if brotli is None:
+        print("(brotli not installed, br skipped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Wire protocol benchmark for the /text chat socket.
+
+Encodes a synthetic stream of `token` events (plus the surrounding status,
+tool_start and stream_end events) the way python-socketio does for the JSON
+and MessagePack serializers, optionally followed by permessage-deflate
+(a single raw-deflate context with sync flushes, as negotiated by the
+WebSocket server). Reports bytes and CPU time per 1k tokens.
+
+Usage: python benchmarks/bench_wire_protocol.py [--tokens 1000] [--rounds 20] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from socketio import packet
+from socketio.msgpack_packet import MsgPackPacket
+
+WORDS = (
+    "The agent looked up the latest figures and found that the quarterly "
+    "revenue grew by twelve percent while operating costs stayed flat"
+).split()
+
+
+def synthetic_events(n_tokens):
+    """Events for one turn with `n_tokens` streamed tokens, as emit_to_chat sends them."""
+    turn_id = "5f0c2a9e7d1b4c38"
+    seq = 0
+
+    def stamped(payload):
+        nonlocal seq
+        payload = dict(payload, seq=seq, turn_id=turn_id)
+        seq += 1
+        return payload
+
+    yield "status", stamped({"status": "Agent is thinking...", "messages": 1})
+    yield "tool_start", stamped({"name": "tavily_search"})
+    for i in range(n_tokens):
+        yield "token", stamped({"token": WORDS[i % len(WORDS)] + " "})
+    yield "stream_end", stamped({"turn_complete": True})
+
+
+def encode_json(event, payload):
+    # "4" is the Engine.IO MESSAGE packet type prefixed to every text frame
+    return ("4" + packet.Packet(packet.EVENT, data=[event, payload], namespace="/text").encode()).encode()
+
+
+def encode_msgpack(event, payload):
+    # Binary Engine.IO frames carry the encoded packet without a type prefix
+    return MsgPackPacket(packet.EVENT, data=[event, payload], namespace="/text").encode()
+
+
+def run(encoder, events, deflate):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS) if deflate else None
+    total = 0
+    started = time.process_time()
+    for event, payload in events:
+        frame = encoder(event, payload)
+        if compressor is not None:
+            # permessage-deflate strips the trailing 00 00 ff ff of each sync flush
+            frame = compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)[:-4]
+        total += len(frame)
+    return total, time.process_time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    events = list(synthetic_events(args.tokens))
+    scale = 1000 / args.tokens
+    results = {}
+    for name, encoder in (("json", encode_json), ("msgpack", encode_msgpack)):
+        for deflate in (False, True):
+            label = f"{name}+deflate" if deflate else name
+            runs = [run(encoder, events, deflate) for _ in range(args.rounds)]
+            size = runs[0][0]
+            cpu = min(elapsed for _, elapsed in runs)
+            results[label] = {
+                "bytes_per_1k_tokens": round(size * scale),
+                "cpu_ms_per_1k_tokens": round(cpu * scale * 1000, 3),
+            }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    baseline = results["json"]["bytes_per_1k_tokens"]
+    print(f"{'mode':<18}{'bytes/1k tok':>14}{'vs json':>10}{'cpu ms/1k tok':>16}")
+    for label, result in results.items():
+        ratio = result["bytes_per_1k_tokens"] / baseline
+        print(f"{label:<18}{result['bytes_per_1k_tokens']:>14}{ratio:>9.0%}{result['cpu_ms_per_1k_tokens']:>16}")
+
+
+if __name__ == "__main__":
+    main()
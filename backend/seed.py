@@ -2,8 +2,9 @@ import time
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import OperationalError
 
-# Import the engine, session factory, and Base
-from app.db.base import engine, SessionLocal, Base
+# Import the engine, session factory and the migration runner
+from app.db.base import engine, SessionLocal
+from app.db.migrations import run_migrations
 
 # Import the model
 from app.db.models import Tool
@@ -26,6 +27,8 @@ def seed_initial_data(db: Session):
             name="Tavily Internet Search",
             description="A powerful search engine for finding real-time information.",
             function_name="tavily_search",
+            entry_point="app.tools.builtin:tavily_search_tool",
+            credential_service="TAVILY",
             is_public=True
         ))
         db.commit()
@@ -40,6 +43,8 @@ def seed_initial_data(db: Session):
             name="Send SMS (Twilio)",
             description="Allows the agent to send a text message.",
             function_name="send_sms",
+            entry_point="app.tools.builtin:send_sms_tool",
+            credential_service="TWILIO",
             is_public=True
         ))
         db.commit()
@@ -70,9 +75,9 @@ def main():
         print("Could not connect to the database after several retries. Aborting.")
         return
 
-    print("Creating database tables if they don't exist...")
-    Base.metadata.create_all(bind=engine)
-    print("Tables created (if not already present).")
+    print("Applying database migrations...")
+    applied = run_migrations(engine)
+    print(f"Migrations applied: {', '.join(applied) or 'none (schema up to date)'}")
 
     db_session = get_db()
     db = next(db_session)
@@ -0,0 +1,41 @@
+"""
+Shared test setup: settings are read at import time, so the app is pointed at
+a scratch SQLite database and archive directory before anything imports it.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_scratch = tempfile.mkdtemp(prefix="backend_tests_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_scratch, 'test.db')}")
+os.environ.setdefault("ARCHIVE_DIR", os.path.join(_scratch, "archive"))
+os.environ.setdefault("ARTIFACT_DIR", os.path.join(_scratch, "artifacts"))
+os.environ.setdefault("ENCRYPTION_KEY", "00" * 32)
+os.environ.setdefault("GOOGLE_CLIENT_ID", "test")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "test")
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from app.db.base import engine
+    from app.db.migrations import run_migrations
+    run_migrations(engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    from app.db.base import SessionLocal
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
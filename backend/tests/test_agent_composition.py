@@ -0,0 +1,54 @@
+import asyncio
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from app.services.agent_composition import build_composite_agent
+
+
+class RecordingLlm(BaseLlm):
+    """Answers every call with a fixed text naming the agent, recording the requests."""
+
+    requests: list = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.requests.append(llm_request)
+        agent = llm_request.config.labels.get("adk_agent_name", "") if llm_request.config.labels else ""
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=f"answer {len(self.requests)} {agent}")]))
+
+
+async def _run_turns(agent, messages):
+    sessions = InMemorySessionService()
+    session = await sessions.create_session(app_name="test", user_id="u")
+    runner = Runner(agent=agent, app_name="test", session_service=sessions)
+    for message in messages:
+        async for _ in runner.run_async(
+            user_id="u", session_id=session.id, new_message=types.Content(role="user", parts=[types.Part(text=message)])
+        ):
+            pass
+
+
+def test_synthesizer_instruction_is_static_and_findings_go_in_contents():
+    model = RecordingLlm(model="fake", requests=[])
+    agent = build_composite_agent(
+        "1", "u", "Be helpful.", [],
+        [{"name": "research", "instructions": "Research it."}, {"name": "critic", "instructions": "Criticize it."}],
+        model=model, resolve_tools=lambda names: [],
+    )
+    asyncio.run(_run_turns(agent, ["first question", "second question"]))
+
+    synthesis = [request for request in model.requests if "Specialist agents" in str(request.config.system_instruction)]
+    assert len(synthesis) == 2
+    # Same prefix every turn, so the context cache can serve it
+    assert synthesis[0].config.system_instruction == synthesis[1].config.system_instruction
+
+    contents = synthesis[1].contents
+    texts = [part.text for content in contents for part in content.parts or [] if part.text]
+    findings = [text for text in texts if text.startswith("Specialist findings")]
+    assert len(findings) == 1  # only this turn's, not persisted in the session
+    assert "### research" in findings[0] and "### critic" in findings[0]
+    assert texts.index(findings[0]) > texts.index("second question")
+    assert texts[-1] == findings[0]
@@ -0,0 +1,173 @@
+import asyncio
+import time
+
+import pytest
+from google.genai import errors, types
+
+from app.services.context_cache import CacheEntry, ContextCache, cached_generate
+
+MODEL = "gemini-2.0-flash"
+PROMPT = "You are a careful assistant. " * 100  # ~750 tokens
+
+
+class StubProvider:
+    """In-memory cached contents; `expires_in` sets the TTL the provider hands out."""
+
+    def __init__(self, expires_in=600.0):
+        self.expires_in = expires_in
+        self.stored = {}
+        self.calls = []
+        self.fail = False
+
+    def _entry(self, name):
+        return CacheEntry(name, time.time() + self.expires_in)
+
+    async def find(self, model, key):
+        self.calls.append("find")
+        return self.stored.get(key)
+
+    async def create(self, model, key, system_instruction, tools, tool_config, ttl_seconds):
+        self.calls.append("create")
+        if self.fail:
+            raise RuntimeError("model does not support caching")
+        entry = self.stored[key] = self._entry(f"cachedContents/{len(self.calls)}")
+        return entry
+
+    async def refresh(self, name, ttl_seconds):
+        self.calls.append("refresh")
+        return self._entry(name)
+
+
+def _cache(provider, **overrides):
+    options = {"ttl_seconds": 600, "refresh_margin": 60, "min_tokens": 500, "failure_cooldown": 300}
+    options.update(overrides)
+    return ContextCache(provider, **options)
+
+
+def _config(prompt=PROMPT):
+    return types.GenerateContentConfig(system_instruction=prompt)
+
+
+def _resolve(cache, config=None):
+    return asyncio.run(cache.resolve(MODEL, config or _config()))
+
+
+def test_created_on_first_use_then_hit():
+    provider = StubProvider()
+    cache = _cache(provider)
+    key, entry = _resolve(cache)
+    assert provider.calls == ["find", "create"]
+    assert _resolve(cache) == (key, entry)
+    assert provider.calls == ["find", "create"]
+
+
+def test_refreshed_inside_refresh_margin():
+    provider = StubProvider(expires_in=30)  # less than the 60s margin
+    cache = _cache(provider)
+    _resolve(cache)
+    provider.expires_in = 600
+    _, entry = _resolve(cache)
+    assert provider.calls == ["find", "create", "refresh"]
+    assert entry.expires_at > time.time() + 500
+
+
+def test_recreated_after_find_miss():
+    provider = StubProvider()
+    first = _cache(provider)
+    key, _ = _resolve(first)
+    # Another worker finds the entry instead of creating one
+    second = _cache(provider)
+    assert _resolve(second)[0] == key
+    assert provider.calls == ["find", "create", "find"]
+
+    # Expired and gone: the next worker recreates it
+    provider.stored.clear()
+    third = _cache(provider)
+    assert _resolve(third) is not None
+    assert provider.calls[-2:] == ["find", "create"]
+
+
+def test_failure_cooldown():
+    provider = StubProvider()
+    provider.fail = True
+    cache = _cache(provider)
+    assert _resolve(cache) is None
+    provider.fail = False
+    assert _resolve(cache) is None
+    assert provider.calls == ["find", "create"]  # not retried during the cooldown
+
+    key = next(iter(cache._failed_until))
+    cache._failed_until[key] = time.time() - 1
+    assert _resolve(cache) is not None
+
+
+def test_short_prefix_is_sent_as_is():
+    provider = StubProvider()
+    cache = _cache(provider)
+    assert _resolve(cache, _config("Be brief.")) is None
+    assert provider.calls == []
+
+
+class _Request:
+    def __init__(self, config):
+        self.config = config
+
+
+def _error(code, status, message):
+    return errors.ClientError(code, {"error": {"code": code, "status": status, "message": message}})
+
+
+def _gone():
+    return _error(404, "NOT_FOUND", "CachedContent not found (or permission denied)")
+
+
+def _generate(error=None, fail_after=0):
+    """A model call that raises `error` after `fail_after` responses once a request references cached content."""
+    sent = []
+
+    async def generate(llm_request, stream):
+        sent.append(llm_request.config)
+        if llm_request.config.cached_content:
+            for _ in range(fail_after):
+                yield "partial"
+            if error is not None:
+                raise error
+            return
+        yield "uncached"
+
+    return generate, sent
+
+
+def _collect(cache, generate, request=None):
+    async def run():
+        return [response async for response in cached_generate(cache, MODEL, generate, request or _Request(_config()), False)]
+    return asyncio.run(run())
+
+
+def test_cached_generate_falls_back_when_cached_content_is_gone():
+    cache = _cache(StubProvider())
+    generate, sent = _generate(_gone())
+    assert _collect(cache, generate) == ["uncached"]
+    assert sent[0].cached_content and not sent[0].system_instruction
+    assert sent[1].system_instruction == PROMPT and not sent[1].cached_content
+    assert cache._entries == {}  # forgotten, recreated on the next call
+
+
+def test_cached_generate_reraises_after_output_was_yielded():
+    cache = _cache(StubProvider())
+    generate, sent = _generate(_gone(), fail_after=1)
+    with pytest.raises(errors.ClientError):
+        _collect(cache, generate)
+    assert len(sent) == 1
+
+
+def test_other_errors_are_not_resent_and_leave_the_request_whole():
+    # Mentions the cached content, but it's throttling: the governor retries it
+    cache = _cache(StubProvider())
+    generate, sent = _generate(_error(429, "RESOURCE_EXHAUSTED", "Quota exceeded for cachedContent requests"))
+    request = _Request(_config())
+    with pytest.raises(errors.ClientError):
+        _collect(cache, generate, request)
+    assert len(sent) == 1
+    assert request.config.system_instruction == PROMPT and not request.config.cached_content
+    assert cache._entries != {}
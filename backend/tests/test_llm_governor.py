@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.llm_governor import LLMGovernor
+
+
+class BlockingCoordinator:
+    """Shared quota whose reservation blocks until released (or raises)."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def try_reserve(self, rpm, tpm, requests, tokens):
+        self.entered.set()
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return 0.0
+
+    def adjust(self, requests, tokens):
+        pass
+
+
+def _governor(coordinator):
+    return LLMGovernor("test-model", rpm=100, tpm=100_000, max_concurrency=2, coordinator=coordinator)
+
+
+def test_cancel_during_remote_reservation_returns_the_slot():
+    coordinator = BlockingCoordinator()
+    governor = _governor(coordinator)
+
+    async def run():
+        task = asyncio.create_task(governor.acquire(100, timeout=5))
+        await asyncio.to_thread(coordinator.entered.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        coordinator.release.set()
+
+    asyncio.run(run())
+    assert governor.inflight == 0
+    assert governor.waiting == 0
+    assert governor._window.requests == 0 and governor._window.tokens == 0
+
+
+def test_redis_error_during_remote_reservation_returns_the_slot():
+    coordinator = BlockingCoordinator(error=ConnectionError("redis down"))
+    coordinator.release.set()
+    governor = _governor(coordinator)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(governor.acquire(100, timeout=5))
+    assert governor.inflight == 0
+    assert governor._window.requests == 0
+
+
+def test_admitted_after_remote_reservation():
+    coordinator = BlockingCoordinator()
+    coordinator.release.set()
+    governor = _governor(coordinator)
+
+    async def run():
+        lease = await governor.acquire(100, timeout=5)
+        assert governor.inflight == 1
+        await governor.release(lease)
+
+    asyncio.run(run())
+    assert governor.inflight == 0
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+from app.db import models
+from app.services import retention_service
+
+
+def _agent_with_history(db, hot: int, archived: int):
+    user = models.User(email=f"history-{datetime.now().timestamp()}@example.com", hashed_password="x", plan="free")
+    db.add(user)
+    db.commit()
+    agent = models.Agent(name="history", owner_id=user.id, system_prompt="")
+    db.add(agent)
+    db.commit()
+
+    old = datetime.now(timezone.utc) - timedelta(days=400)
+    for i in range(archived):
+        db.add(models.ChatMessage(agent_id=agent.id, user_id=user.id, role="human", content=f"old {i}",
+                                  timestamp=old + timedelta(minutes=i)))
+    db.commit()
+    # Hot rows get the server default, so on SQLite they share one whole-second timestamp
+    for i in range(hot):
+        db.add(models.ChatMessage(agent_id=agent.id, user_id=user.id, role="human", content=f"new {i}"))
+    db.commit()
+    return agent
+
+
+def test_history_pages_walk_across_the_archive_boundary(db):
+    agent = _agent_with_history(db, hot=8, archived=12)
+    retention_service.archive_expired_messages(db)
+    assert db.query(models.ChatMessage).filter(models.ChatMessage.agent_id == agent.id).count() == 8
+
+    expected = [f"new {i}" for i in reversed(range(8))] + [f"old {i}" for i in reversed(range(12))]
+    seen, pages, cursor = [], 0, None
+    while True:
+        page = retention_service.get_history_page(db, agent.id, 6, cursor)
+        seen.extend(record["content"] for record in reversed(page))
+        pages += 1
+        if len(page) < 6:
+            break
+        # The endpoint's cursor round trip: ISO string and back
+        cursor = (datetime.fromisoformat(page[0]["timestamp"].isoformat()), page[0]["id"])
+        assert pages < 10, "pagination does not move forward"
+
+    assert seen == expected
+    assert pages == 4  # 6 hot, 2 hot + 4 archived, 6 archived, 2 archived
+
+
+def test_history_cursor_in_another_timezone(db):
+    agent = _agent_with_history(db, hot=0, archived=0)
+    base = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    for i in range(4):
+        db.add(models.ChatMessage(agent_id=agent.id, user_id=agent.owner_id, role="human", content=str(i),
+                                  timestamp=base + timedelta(minutes=i)))
+    db.commit()
+
+    # 13:02+01:00 is 12:02 UTC: only messages 0 and 1 are older
+    cursor = (datetime(2024, 1, 1, 13, 2, tzinfo=timezone(timedelta(hours=1))), 0)
+    page = retention_service.get_history_page(db, agent.id, 10, cursor)
+    assert [record["content"] for record in page] == ["0", "1"]
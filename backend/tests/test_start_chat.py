@@ -0,0 +1,94 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import adk_agent_service as service
+
+SID = "sid-1"
+
+
+@pytest.fixture
+def chat_env(monkeypatch):
+    emitted = []
+
+    async def emit(sid, event, payload=None):
+        emitted.append((sid, event, payload))
+
+    async def setup(agent_config, user_id, agent_id, db=None):
+        if agent_config.name == "broken":
+            raise RuntimeError("model unavailable")
+        return object(), SimpleNamespace(state={})
+
+    monkeypatch.setattr(service, "emit_to_socket", emit)
+    monkeypatch.setattr(service, "setup_adk_session", setup)
+    monkeypatch.setattr(service.preflight_service, "is_ready", lambda: True)
+    monkeypatch.setattr(service.crud_agent, "get_agent_by_id", lambda db, agent_id: SimpleNamespace(name=agent_id))
+    monkeypatch.setattr(service.crud_user, "get_user_by_id", lambda db, user_id: None)
+    monkeypatch.setattr(service.crud_chat, "get_chat_history_for_agent", lambda db, agent_id, owner_id: [])
+    yield emitted
+    service.teardown_chat(SID)
+    service.sid_to_chat.pop(SID, None)
+
+
+def _start(agent_id):
+    asyncio.run(service.start_chat(SID, {"agent_id": agent_id, "user_id": 1}))
+
+
+def _registered(chat_id):
+    tables = (service.session_user_info, service.adk_runners, service.session_mailboxes, service.chat_to_sid)
+    return [chat_id in table for table in tables]
+
+
+def test_failed_start_leaves_no_state(chat_env):
+    _start("broken")
+    assert _registered(SID) == [False] * 4
+    assert SID not in service.sid_to_chat
+    assert chat_env[-1][1] == "error"
+
+
+def test_failed_restart_drops_the_previous_chat(chat_env):
+    _start("good")
+    assert _registered(SID) == [True] * 4
+    _start("broken")
+    assert _registered(SID) == [False] * 4
+    assert SID not in service.sid_to_chat
+
+
+def test_restart_replaces_the_previous_chat(chat_env):
+    _start("good")
+    first_mailbox = service.session_mailboxes[SID]
+    first_token = service.session_user_info[SID]["resume_token"]
+    _start("good")
+    assert service.session_mailboxes[SID] is not first_mailbox
+    assert service.session_user_info[SID]["resume_token"] != first_token
+
+
+def test_start_detaches_a_resumed_chat(chat_env):
+    # The socket had resumed another chat; starting a new one closes that chat
+    service.session_user_info["other"] = {"resume_token": "t"}
+    service.adk_runners["other"] = {}
+    service.chat_to_sid["other"] = SID
+    service.sid_to_chat[SID] = "other"
+    _start("good")
+    assert _registered("other") == [False] * 4
+    assert service.sid_to_chat[SID] == SID
+
+
+def test_resume_with_bad_last_seq_replays_the_turn(chat_env):
+    from app.services.stream_buffer import TurnStreamBuffer
+
+    _start("good")
+    token = service.session_user_info[SID]["resume_token"]
+    stream = service.chat_streams[SID] = TurnStreamBuffer(maxlen=10)
+    stream.append("token", {"token": "Hi"})
+    service.chat_to_sid[SID] = None  # the first socket dropped
+
+    for last_seq in ("3", None, [1]):
+        asyncio.run(service.handle_resume("sid-2", {
+            "chat_id": SID, "resume_token": token, "turn_id": stream.turn_id, "last_seq": last_seq,
+        }))
+        assert service.chat_to_sid[SID] == "sid-2"
+        events = [event for sid, event, _ in chat_env if sid == "sid-2"]
+        assert events[-2:] == ["resumed", "token"]  # replayed from the start of the turn
+    service.sid_to_chat.pop("sid-2", None)
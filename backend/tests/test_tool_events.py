@@ -0,0 +1,37 @@
+from app.services.llm_governor import estimate_tokens
+from app.services.tool_events import apply_budget, compress_text
+
+
+def _tavily(sources=3):
+    # Same shape as the search tool's output: "Source: <url>\nContent: ..." per result
+    filler = "The company also discussed hiring plans and office locations in some detail. " * 6
+    return "\n".join(
+        f"Source: https://example.com/report-{i}\n"
+        f"Content: Report {i} covers the annual results. {filler}"
+        f"Revenue in quarter 7 grew by {10 + i} percent over the prior quarter. {filler}"
+        + "Analysts expect revenue in the next quarter to keep growing at a similar pace. " * 4
+        for i in range(sources)
+    )
+
+
+def test_compressed_search_results_keep_every_source():
+    text = _tavily()
+    compressed = compress_text(text, 200, query="revenue quarter 7")
+    assert estimate_tokens(compressed) <= 200
+    sources = [line for line in compressed.splitlines() if line.startswith("Source:")]
+    assert sources == [f"Source: https://example.com/report-{i}" for i in range(3)]
+    # The rest of the budget goes to the sentences matching the query
+    assert "Revenue in quarter 7 grew by 10 percent" in compressed
+
+
+def test_text_within_budget_is_unchanged():
+    assert compress_text("Short answer.", 100, query="answer") == "Short answer."
+
+
+def test_dict_response_is_budgeted_and_flagged():
+    response = {"status": "success", "result": _tavily()}
+    budgeted = apply_budget(response, 200, query="revenue quarter 7")
+    assert budgeted["truncated"] is True
+    assert budgeted["original_tokens"] > 200
+    assert budgeted["result"].count("Source:") == 3
+    assert response["result"] == _tavily()  # the tool's own value is left alone
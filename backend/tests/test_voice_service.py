@@ -0,0 +1,120 @@
+import asyncio
+
+from app.services.voice_service import SentenceChunker, ToneTTS, VoiceStream, speakable
+
+
+def test_chunker_cuts_at_sentence_ends():
+    chunker = SentenceChunker(min_chars=5, max_chars=250)
+    chunks = []
+    for token in ["Hello the", "re, how are you? I am", " fine. And", " you"]:
+        chunks += chunker.feed(token)
+    assert chunks == ["Hello there, how are you?", "I am fine."]
+    assert chunker.flush() == ["And you"]
+
+
+def test_chunker_merges_short_and_splits_long_sentences():
+    chunker = SentenceChunker(min_chars=10, max_chars=60)
+    assert chunker.feed("Yes. ") == []  # too short alone, merged with the next
+    long = "This sentence has no end for quite a while, so it is split at a comma and then more words follow"
+    chunks = chunker.feed("Sure thing. " + long + ". ")
+    assert chunks[0] == "Yes. Sure thing."
+    assert all(len(chunk) <= 60 for chunk in chunks)
+    assert chunks[1].endswith(",")
+
+
+def test_speakable_drops_markdown():
+    assert speakable("**Bold** see [docs](https://x.y) or https://a.b\n```code```") == "Bold see docs or"
+
+
+class Client:
+    """A /voice socket: records frames, acks them unless `acking` is off."""
+
+    def __init__(self, acking=True):
+        self.acking = acking
+        self.frames = []
+        self.ends = []
+
+    async def emit(self, event, payload, callback=None):
+        if event == "voice_end":
+            self.ends.append(payload)
+        else:
+            self.frames.append(payload)
+            if self.acking:
+                callback()
+
+
+def _speak(stream, text):
+    stream.begin_turn()
+    stream.feed(text)
+    stream.end_turn()
+
+
+async def _until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_turn_is_spoken_sentence_by_sentence():
+    client = Client()
+
+    async def run():
+        stream = VoiceStream(client.emit, ToneTTS(chunk_seconds=0.5), max_chars=60)
+        _speak(stream, "The first sentence is spoken first. And then the second one follows it.")
+        await _until(lambda: client.ends)
+
+    asyncio.run(run())
+    assert client.ends[0]["status"] == "completed" and client.ends[0]["sentences"] == 2
+    first = [frame for frame in client.frames if frame["sentence"] == 0]
+    assert first[0]["text"] == "The first sentence is spoken first." and first[0]["audio"].startswith(b"RIFF")
+    assert first[-1]["last"] is True
+    assert [frame["seq"] for frame in client.frames] == list(range(len(client.frames)))
+
+
+def test_paused_client_is_not_stalled():
+    # Paused for longer than the ack timeout: playback time is not a stall
+    client = Client()
+
+    async def run():
+        stream = VoiceStream(client.emit, ToneTTS(chunk_seconds=0.5), ack_timeout=0.1)
+        stream.pause()
+        _speak(stream, "One sentence that waits for the client to play its queue.")
+        await asyncio.sleep(0.3)
+        assert client.frames == [] and client.ends == []
+        stream.resume()
+        await _until(lambda: client.ends)
+
+    asyncio.run(run())
+    assert client.ends[0]["status"] == "completed"
+    assert client.frames[-1]["last"] is True
+
+
+def test_backpressure_limits_unacknowledged_frames():
+    client = Client(acking=False)
+
+    async def run():
+        stream = VoiceStream(client.emit, ToneTTS(chunk_seconds=0.05), max_inflight=3, ack_timeout=0.2)
+        _speak(stream, "Plenty of words in this sentence so that it takes many frames to send.")
+        await _until(lambda: client.ends)
+
+    asyncio.run(run())
+    # No acks: only max_inflight frames went out, then the turn was given up as stalled
+    assert len(client.frames) == 3
+    assert client.ends[0]["status"] == "stalled"
+
+
+def test_interrupt_ends_the_turn():
+    client = Client()
+
+    async def run():
+        stream = VoiceStream(client.emit, ToneTTS(delay_seconds=1.0))
+        # The answer text is complete, its audio isn't: stop_audio still silences it
+        _speak(stream, "This is never heard.")
+        await asyncio.sleep(0.05)
+        stream.interrupt()
+        await _until(lambda: client.ends)
+
+    asyncio.run(run())
+    assert client.frames == []
+    assert client.ends[0]["status"] == "interrupted"
@@ -7,11 +7,14 @@ import MicIcon from '@mui/icons-material/Mic';
 import MicOffIcon from '@mui/icons-material/MicOff';
 import SmartToyIcon from '@mui/icons-material/SmartToy';
 import ConstructionIcon from '@mui/icons-material/Construction';
+import VolumeUpIcon from '@mui/icons-material/VolumeUp';
+import VolumeOffIcon from '@mui/icons-material/VolumeOff';
 import SpeechRecognition, { useSpeechRecognition } from 'react-speech-recognition';
 import { api, useUserState } from '@/context/AuthContext';
 import DashboardLayout from '@/components/DashboardLayout';
 import ChatMessage from '@/components/ChatMessage';
 import ChatInput from '@/components/ChatInput'; // We'll use a dedicated input component
+import VoiceChat from '@/components/VoiceChat';
 
 export default function ChatPage() {
     const { agentId } = useParams();
@@ -26,6 +29,9 @@ export default function ChatPage() {
     const [isStreaming, setIsStreaming] = useState(false);
     const [isProcessing, setIsProcessing] = useState(false);
     const [toolStatus, setToolStatus] = useState(null); // e.g., "Using Tavily Search..."
+    const [branchStatus, setBranchStatus] = useState({}); // sub-agent name -> running/tool/completed/timed_out/failed
+    const [chatSession, setChatSession] = useState(null); // { chat_id, resume_token } from chat_started
+    const [speakAnswers, setSpeakAnswers] = useState(false);
 
     const messagesEndRef = useRef(null);
     const scrollToBottom = () => messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -68,6 +74,10 @@ export default function ChatPage() {
                 });
             });
 
+            newSocket.on('chat_started', ({ chat_id, resume_token }) => {
+                setChatSession({ chat_id, resume_token });
+            });
+
             // --- CORRECTED EVENT HANDLERS ---
             newSocket.on('token', ({ token }) => {
                 setIsProcessing(true); // We are now receiving a response
@@ -96,10 +106,29 @@ export default function ChatPage() {
                 setToolStatus(`Using tool: ${name.replace(/_/g, ' ')}...`);
             });
 
+            newSocket.on('tool_progress', ({ name, message, branch }) => {
+                if (!branch && name) setToolStatus(`${name.replace(/_/g, ' ')}: ${message}`);
+            });
+
+            newSocket.on('tool_end', ({ name, duration, truncated, branch }) => {
+                if (branch) return; // sub-agent tools are shown by branch_progress
+                setToolStatus(`Used ${name.replace(/_/g, ' ')} (${duration.toFixed(1)}s${truncated ? ', output trimmed' : ''})`);
+            });
+
+            // Fan-out agents: progress of the sub-agents running in parallel
+            newSocket.on('branches_started', ({ branches }) => {
+                setBranchStatus(Object.fromEntries(branches.map(name => [name, 'running'])));
+            });
+
+            newSocket.on('branch_progress', ({ branch, status }) => {
+                setBranchStatus(prev => ({ ...prev, [branch]: status }));
+            });
+
             newSocket.on('stream_end', ({ metrics }) => {
                 setIsStreaming(false);
                 setIsProcessing(false);
                 setToolStatus(null);
+                setBranchStatus({});
                 // Optionally update the last message with final metrics
             });
 
@@ -156,7 +185,18 @@ export default function ChatPage() {
                                 <Chip icon={<ConstructionIcon />} label={tool.replace(/_/g, ' ')} size="small" variant="outlined" />
                             </Tooltip>
                         )) : <Chip label="No tools assigned" size="small" />}
+                        <Chip
+                            icon={speakAnswers ? <VolumeUpIcon /> : <VolumeOffIcon />}
+                            label={speakAnswers ? 'Reading answers aloud' : 'Read answers aloud'}
+                            size="small"
+                            color={speakAnswers ? 'primary' : 'default'}
+                            onClick={() => setSpeakAnswers(on => !on)}
+                            disabled={!chatSession}
+                        />
                     </Stack>
+                    {speakAnswers && chatSession && (
+                        <VoiceChat chatId={chatSession.chat_id} resumeToken={chatSession.resume_token} />
+                    )}
                     <Divider />
                 </Box>
 
@@ -170,6 +210,10 @@ export default function ChatPage() {
                 <Box sx={{ height: '24px', display: 'flex', alignItems: 'center', justifyContent: 'center', mb:1 }}>
                     {isProcessing && !toolStatus && !isStreaming && <LinearProgress sx={{width: '100%'}} />}
                     {toolStatus && <Chip icon={<SmartToyIcon/>} label={toolStatus} size="small" color="secondary"/>}
+                    {!isStreaming && Object.entries(branchStatus).map(([name, status]) => (
+                        <Chip key={name} label={`${name.replace(/_/g, ' ')}: ${status.replace(/_/g, ' ')}`} size="small" sx={{ ml: 1 }}
+                              color={status === 'completed' ? 'success' : status === 'running' || status === 'tool' ? 'default' : 'warning'}/>
+                    ))}
                 </Box>
                 
                 {error && <Alert severity="error" onClose={() => setError('')} sx={{ mb: 2 }}>{error}</Alert>}
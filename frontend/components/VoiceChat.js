@@ -1,19 +1,27 @@
 import { useState, useEffect, useRef } from 'react';
 import { io } from 'socket.io-client';
 
-const VoiceChat = () => {
+// Sentences queued for playback before the backend is asked to pause sending
+const MAX_QUEUED_SENTENCES = 3;
+
+// Speaks the answers of a /text chat: attaches to it on the /voice namespace and
+// plays each sentence as soon as its audio has arrived, while the agent is still writing.
+const VoiceChat = ({ chatId, resumeToken }) => {
   const [isConnected, setIsConnected] = useState(false);
-  const [isRecording, setIsRecording] = useState(false);
   const [status, setStatus] = useState('Idle');
 
   const socketRef = useRef(null);
-  const mediaRecorderRef = useRef(null);
   const audioPlayerRef = useRef(new Audio());
-  const audioQueueRef = useRef([]);
+  const audioQueueRef = useRef([]); // complete sentences waiting to be played
+  const sentenceRef = useRef({ key: null, chunks: [], mimeType: 'audio/mpeg' });
+  const pausedRef = useRef(false); // the backend was asked to hold audio back
   const isPlayingRef = useRef(false);
+  const currentTurnRef = useRef(null);
+  const stoppedTurnRef = useRef(null);
 
   useEffect(() => {
-    // This connection logic is now perfect for the namespaced backend.
+    if (!chatId || !resumeToken) return;
+
     const socket = io('http://localhost:8000/voice', {
       path: '/socket.io/',
       transports: ['websocket'],
@@ -21,40 +29,73 @@ const VoiceChat = () => {
     socketRef.current = socket;
 
     socket.on('connect', () => {
-      console.log('Connected to Voice WebSocket Namespace!');
       setIsConnected(true);
-      setStatus('Connected. Ready to talk.');
+      pausedRef.current = false; // a new stream starts unpaused
+      socket.emit('start_voice', { chat_id: chatId, resume_token: resumeToken });
     });
 
+    socket.on('voice_started', () => setStatus('Answers will be read aloud.'));
+
     socket.on('disconnect', () => {
-      console.log('Disconnected from WebSocket server.');
       setIsConnected(false);
       setStatus('Disconnected.');
     });
 
-    socket.on('response_audio', (audioChunk) => {
-      const blob = new Blob([audioChunk], { type: 'audio/webm' });
-      audioQueueRef.current.push(blob);
-      // Kick off the playback chain if it's not already running.
-      playNextInQueue();
+    socket.on('response_audio', (frame, ack) => {
+      // Acked on receipt: the backend counts a missing ack as a stalled client
+      ack();
+      currentTurnRef.current = frame.turn;
+      if (frame.turn === stoppedTurnRef.current) return;
+      const sentence = sentenceRef.current;
+      const key = `${frame.turn}:${frame.sentence}`;
+      if (sentence.key !== key) {
+        sentenceRef.current = { key, chunks: [], mimeType: frame.mime_type || sentence.mimeType };
+      }
+      if (frame.audio.byteLength) sentenceRef.current.chunks.push(frame.audio);
+      if (frame.last) {
+        const { chunks, mimeType } = sentenceRef.current;
+        audioQueueRef.current.push(new Blob(chunks, { type: mimeType }));
+        sentenceRef.current = { key: null, chunks: [], mimeType };
+        playNextInQueue();
+        // Backpressure: enough audio is queued, pause until some of it was played
+        if (audioQueueRef.current.length >= MAX_QUEUED_SENTENCES && !pausedRef.current) {
+          pausedRef.current = true;
+          socket.emit('pause_audio');
+        }
+      }
+    });
+
+    socket.on('voice_end', ({ turn, status: endStatus, time_to_first_audio }) => {
+      if (endStatus !== 'completed') clearQueue();
+      if (time_to_first_audio != null) console.log(`Turn ${turn}: first audio after ${time_to_first_audio}s`);
     });
 
     socket.on('error', (error) => {
       console.error('Received error from server:', error.message);
       setStatus(`Error: ${error.message}`);
-      if (isRecording) {
-        stopRecording();
-      }
     });
 
-    // Cleanup function is perfect.
     return () => {
       socket.disconnect();
-      if (mediaRecorderRef.current && mediaRecorderRef.current.state === 'recording') {
-        stopRecording();
-      }
+      clearQueue();
     };
-  }, []); // Empty dependency array is correct.
+  }, [chatId, resumeToken]);
+
+  const resumeIfRoom = () => {
+    if (pausedRef.current && audioQueueRef.current.length < MAX_QUEUED_SENTENCES) {
+      pausedRef.current = false;
+      socketRef.current?.emit('resume_audio');
+    }
+  };
+
+  const clearQueue = () => {
+    audioQueueRef.current = [];
+    sentenceRef.current = { key: null, chunks: [], mimeType: sentenceRef.current.mimeType };
+    audioPlayerRef.current.pause();
+    isPlayingRef.current = false;
+    resumeIfRoom();
+    setStatus('Answers will be read aloud.');
+  };
 
   const playNextInQueue = () => {
     if (isPlayingRef.current || audioQueueRef.current.length === 0) {
@@ -62,70 +103,42 @@ const VoiceChat = () => {
     }
     isPlayingRef.current = true;
     setStatus('Agent is speaking...');
-    
+
     const audioBlob = audioQueueRef.current.shift();
+    resumeIfRoom();
     const audioUrl = URL.createObjectURL(audioBlob);
     const audioPlayer = audioPlayerRef.current;
-    
+
     audioPlayer.src = audioUrl;
     audioPlayer.play();
 
-    // The robust, corrected onended handler
     audioPlayer.onended = () => {
+      URL.revokeObjectURL(audioUrl);
       isPlayingRef.current = false;
       if (audioQueueRef.current.length > 0) {
         playNextInQueue();
       } else {
-        setStatus('Connected. Ready to talk.');
+        setStatus('Answers will be read aloud.');
       }
     };
   };
 
-  const startRecording = async () => {
-    if (!navigator.mediaDevices || !navigator.mediaDevices.getUserMedia) {
-      alert('Your browser does not support audio recording.');
-      return;
-    }
-    try {
-      const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-      mediaRecorderRef.current = new MediaRecorder(stream, { mimeType: 'audio/webm' });
-
-      mediaRecorderRef.current.ondataavailable = (event) => {
-        if (event.data.size > 0 && socketRef.current?.connected) {
-          socketRef.current.emit('audio_stream', event.data);
-        }
-      };
-
-      mediaRecorderRef.current.start(500); // Send data every 500ms
-      setIsRecording(true);
-      setStatus('Listening...');
-    } catch (err) {
-      console.error("Error accessing microphone:", err);
-      setStatus("Microphone access denied.");
-    }
-  };
-
-  const stopRecording = () => {
-    if (mediaRecorderRef.current && mediaRecorderRef.current.state === 'recording') {
-      mediaRecorderRef.current.stop();
-      // This is crucial for turning off the mic light. Correct.
-      mediaRecorderRef.current.stream.getTracks().forEach(track => track.stop());
-    }
-    setIsRecording(false);
-    setStatus('Processing...');
+  const stopSpeaking = () => {
+    // Barge-in: the backend stops synthesizing, frames of this turn still in flight are dropped
+    stoppedTurnRef.current = currentTurnRef.current;
+    socketRef.current?.emit('stop_audio');
+    clearQueue();
   };
 
   return (
     <div>
-      <h2>ADK Voice Agent</h2>
-      <p>Status: {status}</p>
+      <p>Voice: {status}</p>
       <button
-        onClick={isRecording ? stopRecording : startRecording}
+        onClick={stopSpeaking}
         disabled={!isConnected}
         style={{
-          padding: '1rem',
-          fontSize: '1.2rem',
-          backgroundColor: isRecording ? '#d32f2f' : '#388e3c', // Using theme-like colors
+          padding: '0.5rem 1rem',
+          backgroundColor: '#d32f2f',
           color: 'white',
           border: 'none',
           borderRadius: '8px',
@@ -133,10 +146,10 @@ const VoiceChat = () => {
           opacity: isConnected ? 1 : 0.6,
         }}
       >
-        {isRecording ? 'Stop Talking' : 'Start Talking'}
+        Stop Speaking
       </button>
     </div>
   );
 };
 
-export default VoiceChat;
\ No newline at end of file
+export default VoiceChat;